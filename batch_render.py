@@ -0,0 +1,302 @@
+#!/usr/bin/python
+"""
+Renders many high and low priority alarm configurations in parallel.
+
+Every configuration file (or every *_config.py and *_alarm.py file of a
+given directory) is rendered by generate_high_priority or
+generate_low_priority (depending on whether the configuration has a half
+burst spacing) in a pool of worker processes, optionally at all sample
+rates offered by the generators (optionally resampled from one master
+sample rate).
+Prints a summary of the output files and the IEC 60601-1-8 warnings.
+
+NOTE: requires concurrent.futures (part of Python 3, for Python 2 install
+      the 'futures' backport).
+"""
+from __future__ import print_function
+from wavtools import loadConfig
+from wavtools import sampleRates_Hz
+from wavtools import PulseCache
+import concurrent.futures
+import fnmatch
+import argparse
+import signal
+import time
+import os
+import sys
+
+# pulse caches of this (worker) process by cache directory, i.e. jobs
+# rendered by the same worker share their pulses
+_pulseCaches = {}
+
+# configurations of a directory: the examples and the files written by the
+# generator scripts (other *.py files, e.g. the scripts themselves, must not
+# be executed by loadConfig)
+configFilePatterns = ['*_config.py', '*_alarm.py']
+
+class JobTimeout(Exception):
+    pass
+
+def _raiseJobTimeout(signum, frame):
+    raise JobTimeout()
+
+def isHighPriorityConfig(config):
+    """high priority configurations have a half burst spacing"""
+    return 'defaultHalfBurstSpacing_ms' in config
+
+def compareWavs(fileName1, fileName2):
+    """
+    Returns the maximum absolute difference (in LSB) of the samples of two
+    wav files of equal length and the ratio of the energy of the first
+    file to the energy of the difference in dB
+    """
+    from wav_analyzer import readWav
+    import numpy
+    samples1, sampleRate1_Hz = readWav(fileName1)
+    samples2, sampleRate2_Hz = readWav(fileName2)
+    if len(samples1) != len(samples2) or sampleRate1_Hz != sampleRate2_Hz:
+        raise ValueError(fileName1 + ' and ' + fileName2 + ' differ in length or sample rate')
+    difference = (samples1 - samples2) * 32768
+    energy = numpy.sum((samples1 * 32768)**2)
+    differenceEnergy = numpy.sum(difference**2)
+    if differenceEnergy == 0:
+        return 0, float('inf')
+    return int(numpy.abs(difference).max()), 10.0 * numpy.log10(energy / differenceEnergy)
+
+def renderJob(configFileName, outputFilePath, sampleRate_Hz = None, timeout_s = None, pulseCacheDirectory = None, masterSampleRate_Hz = None, compareDirect = False, pruneFloor_dBFS = None, normalization = None, targetLevel_dBFS = None, sampleDtype = None, fixedPoint = None):
+    """
+    Renders one configuration file (at sampleRate_Hz if given) into
+    outputFilePath. Runs in a worker process; if timeout_s is given the
+    job is aborted after timeout_s seconds (needs signal.setitimer, i.e.
+    a Unix system).
+    If masterSampleRate_Hz is given the pulses are synthesized at the
+    master sample rate and resampled (see PulseCache.createHarmonicWave).
+    If pruneFloor_dBFS is given, inaudible harmonics are not synthesized
+    (see pruneFloor_dBFS of the generator scripts).
+    normalization and targetLevel_dBFS (if given) override the ones of the
+    configuration (see normalization of the generator scripts), e.g. to
+    render all alarms of a batch at the same A-weighted level.
+    sampleDtype and fixedPoint (if given) override the ones of the
+    configuration as well (see sampleDtype and fixedPoint of the generator
+    scripts).
+    If compareDirect is set as well, the configuration is also rendered
+    directly with all harmonics in float64 and compared to the resampled,
+    pruned, float32 and/or fixed point rendering (see compareWavs).
+    Returns a dictionary with the 'config', 'priority', 'sampleRate_Hz',
+    'outputFilePath', 'warnings', 'prunedHarmonics', 'levels_dBFS', 'error'
+    (None on success), 'time_s' and (if compared) 'directTime_s',
+    'deviation_LSB' and 'deviation_dB'.
+    """
+    result = {'config':          configFileName,
+              'priority':        None,
+              'sampleRate_Hz':   sampleRate_Hz,
+              'outputFilePath':  outputFilePath,
+              'warnings':        [],
+              'prunedHarmonics': {},
+              'levels_dBFS':     {},
+              'error':           None,
+              'time_s':          0.0}
+    start = time.time()
+    useAlarm = timeout_s is not None and hasattr(signal, 'setitimer')
+    if useAlarm:
+        signal.signal(signal.SIGALRM, _raiseJobTimeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout_s)
+    try:
+        config = loadConfig(configFileName)
+        if sampleRate_Hz is not None:
+            config['defaultSampleRate_Hz'] = sampleRate_Hz
+        if pulseCacheDirectory not in _pulseCaches:
+            _pulseCaches[pulseCacheDirectory] = PulseCache(directory=pulseCacheDirectory)
+        if isHighPriorityConfig(config):
+            from high_prio_sound_gen import generate_high_priority as generate
+            result['priority'] = 'high'
+        else:
+            from low_prio_sound_gen import generate_low_priority as generate
+            result['priority'] = 'low'
+        config['masterSampleRate_Hz'] = masterSampleRate_Hz
+        if pruneFloor_dBFS is not None:
+            config['pruneFloor_dBFS'] = pruneFloor_dBFS
+        if normalization is not None:
+            config['normalization'] = normalization
+        if targetLevel_dBFS is not None:
+            config['targetLevel_dBFS'] = targetLevel_dBFS
+        if sampleDtype is not None:
+            config['sampleDtype'] = sampleDtype
+        if fixedPoint is not None:
+            config['fixedPoint'] = fixedPoint
+        rendered = generate(config, outputFilePath, _pulseCaches[pulseCacheDirectory])
+        result['sampleRate_Hz'] = rendered['sampleRate_Hz']
+        result['warnings'] = rendered['warnings']
+        result['prunedHarmonics'] = rendered['prunedHarmonics']
+        result['levels_dBFS'] = rendered['levels_dBFS']
+        result['time_s'] = time.time() - start
+        if compareDirect and (masterSampleRate_Hz is not None or config.get('pruneFloor_dBFS') is not None or
+                              config.get('sampleDtype', 'float64') != 'float64' or config.get('fixedPoint')):
+            directFilePath = outputFilePath + ".direct.wav"
+            config['masterSampleRate_Hz'] = None
+            config['pruneFloor_dBFS'] = None
+            config['sampleDtype'] = 'float64'
+            config['fixedPoint'] = False
+            try:
+                directStart = time.time()
+                generate(config, directFilePath, _pulseCaches[pulseCacheDirectory])
+                result['directTime_s'] = time.time() - directStart
+                result['deviation_LSB'], result['deviation_dB'] = compareWavs(directFilePath, outputFilePath)
+            finally:
+                if os.path.exists(directFilePath):
+                    os.remove(directFilePath)
+    except JobTimeout:
+        result['error'] = "timeout after " + str(timeout_s) + "s"
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        if useAlarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if pulseCacheDirectory in _pulseCaches:
+            # a timeout during a disk write leaves a temporary file
+            _pulseCaches[pulseCacheDirectory].removeTmpFiles()
+    if result['error'] is not None:
+        result['time_s'] = time.time() - start
+        if os.path.exists(outputFilePath):
+            # do not leave a partially written wav file
+            os.remove(outputFilePath)
+    return result
+
+def findConfigs(paths):
+    """
+    Returns the configuration files of paths: files are taken as they are,
+    directories are searched (not recursively) for files matching
+    configFilePatterns
+    """
+    configFileNames = []
+    for path in paths:
+        if os.path.isdir(path):
+            configFileNames += sorted(os.path.join(path, name) for name in os.listdir(path)
+                                      if any(fnmatch.fnmatch(name, pattern) for pattern in configFilePatterns))
+        else:
+            configFileNames.append(path)
+    return configFileNames
+
+def renderBatch(configFileNames, outputDirectory = '.', workers = None, timeout_s = None, allSampleRates = False, pulseCacheDirectory = None, maxInFlight = None, masterSampleRate_Hz = None, compareDirect = False, pruneFloor_dBFS = None, normalization = None, targetLevel_dBFS = None, sampleDtype = None, fixedPoint = None):
+    """
+    Renders all configuration files in a pool of workers (default: number
+    of CPUs) processes. At most maxInFlight (default: 2 * workers) jobs are
+    submitted at a time. If allSampleRates is set, every configuration is
+    rendered at all sampleRates_Hz and saved as <config name>_<rate>Hz.wav,
+    otherwise as <config name>.wav in outputDirectory.
+    masterSampleRate_Hz, compareDirect, pruneFloor_dBFS, normalization,
+    targetLevel_dBFS, sampleDtype and fixedPoint are passed to renderJob
+    (use a pulseCacheDirectory to share the master pulses between workers).
+    Returns the results of renderJob in the order of the jobs.
+    """
+    if workers is None:
+        workers = os.cpu_count() if hasattr(os, 'cpu_count') else None
+        if workers is None:
+            import multiprocessing
+            workers = multiprocessing.cpu_count()
+    if maxInFlight is None:
+        maxInFlight = 2 * workers
+    if not os.path.isdir(outputDirectory):
+        os.makedirs(outputDirectory)
+
+    jobs = []
+    for configFileName in configFileNames:
+        name = os.path.splitext(os.path.basename(configFileName))[0]
+        if allSampleRates:
+            for sampleRate_Hz in sampleRates_Hz:
+                jobs.append((configFileName, os.path.join(outputDirectory, name + "_" + str(sampleRate_Hz) + "Hz.wav"), sampleRate_Hz))
+        else:
+            jobs.append((configFileName, os.path.join(outputDirectory, name + ".wav"), None))
+
+    results = [None] * len(jobs)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        nextJob = 0
+        while nextJob < len(jobs) or pending:
+            # keep the number of submitted jobs bounded
+            while nextJob < len(jobs) and len(pending) < maxInFlight:
+                configFileName, outputFilePath, sampleRate_Hz = jobs[nextJob]
+                future = executor.submit(renderJob, configFileName, outputFilePath, sampleRate_Hz, timeout_s, pulseCacheDirectory, masterSampleRate_Hz, compareDirect, pruneFloor_dBFS, normalization, targetLevel_dBFS, sampleDtype, fixedPoint)
+                pending[future] = nextJob
+                nextJob += 1
+            done, notDone = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    # e.g. a crashed worker process
+                    configFileName, outputFilePath, sampleRate_Hz = jobs[index]
+                    results[index] = {'config':          configFileName,
+                                      'priority':        None,
+                                      'sampleRate_Hz':   sampleRate_Hz,
+                                      'outputFilePath':  outputFilePath,
+                                      'warnings':        [],
+                                      'prunedHarmonics': {},
+                                      'levels_dBFS':     {},
+                                      'error':           str(e),
+                                      'time_s':          0.0}
+    return results
+
+def printSummary(results):
+    """prints one line per job followed by its warnings or error"""
+    warningCount = 0
+    errorCount = 0
+    for result in results:
+        print(result['config'] + " (" + str(result['priority']) + ", " + str(result['sampleRate_Hz']) + " Hz) -> " + result['outputFilePath'] + " [" + "%.2f" % result['time_s'] + "s]")
+        if 'deviation_dB' in result:
+            print("    vs. direct rendering [" + "%.2f" % result['directTime_s'] + "s]: max. " + str(result['deviation_LSB']) + " LSB, SNR " + "%.1f" % result['deviation_dB'] + " dB")
+        for name, levels in sorted(result['levels_dBFS'].items()):
+            print("    level of " + name + " pulse: " + "%.1f" % levels['rms'] + " dBFS RMS, " + "%.1f" % levels['aweighted'] + " dBFS(A)")
+        for name, removedHarmonics in sorted(result['prunedHarmonics'].items()):
+            print("    pruned harmonics of " + name + " pulse: " + (" ".join(removedHarmonics) or "none"))
+        for warning in result['warnings']:
+            print("    *** WARNING: " + warning)
+        warningCount += len(result['warnings'])
+        if result['error'] is not None:
+            print("    *** ERROR: " + result['error'])
+            errorCount += 1
+    print(str(len(results)) + " jobs, " + str(warningCount) + " warnings, " + str(errorCount) + " errors")
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders IEC 60601-1-8 high and low priority alarm configurations in parallel.")
+    parser.add_argument('paths', nargs='+', metavar='path',
+                        help='configuration file or directory with *_config.py and *_alarm.py configuration files')
+    parser.add_argument('-o', '--output-dir', default='.',
+                        help='directory of the wav files (default: current directory)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='abort a job after this many seconds')
+    parser.add_argument('--all-rates', action='store_true',
+                        help='render every configuration at all sample rates')
+    parser.add_argument('--cache-dir', default=None,
+                        help='directory of a pulse cache shared by all workers')
+    parser.add_argument('--master-rate', type=int, default=None,
+                        help='synthesize the pulses at this sample rate and resample them')
+    parser.add_argument('--compare-direct', action='store_true',
+                        help='report the deviation of the resampled/pruned/float32/fixed point from the direct rendering (requires numpy)')
+    parser.add_argument('--prune-floor', default=None,
+                        help="skip harmonics below this level in dBFS or 'lsb' (1 LSB after gain)")
+    parser.add_argument('--normalize', choices=['peak', 'rms', 'aweighted'], default=None,
+                        help='normalize the peak or the (A-weighted) RMS level of the loudest pulse (default: as configured)')
+    parser.add_argument('--target-level', type=float, default=None,
+                        help='level in dBFS of the loudest pulse for --normalize rms|aweighted')
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default=None,
+                        help='synthesize and scale the pulses in this precision (default: as configured)')
+    parser.add_argument('--fixed-point', action='store_true', default=None,
+                        help='synthesize the pulses in Q15 fixed point')
+    args = parser.parse_args()
+
+    pruneFloor_dBFS = args.prune_floor
+    if pruneFloor_dBFS is not None and pruneFloor_dBFS != 'lsb':
+        pruneFloor_dBFS = float(pruneFloor_dBFS)
+    results = renderBatch(findConfigs(args.paths), args.output_dir, args.jobs, args.timeout, args.all_rates, args.cache_dir,
+                          masterSampleRate_Hz=args.master_rate, compareDirect=args.compare_direct, pruneFloor_dBFS=pruneFloor_dBFS,
+                          normalization=args.normalize, targetLevel_dBFS=args.target_level,
+                          sampleDtype=args.dtype, fixedPoint=args.fixed_point)
+    printSummary(results)
+    sys.exit(1 if any(result['error'] is not None for result in results) else 0)
+
+if __name__ == '__main__':
+    main()
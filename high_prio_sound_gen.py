@@ -5,29 +5,72 @@ from wavtools import getVolumes
 from wavtools import volumesOutOfDbRange
 from wavtools import hasEnoughHarmonics
 from wavtools import hasSignificantVolumesInsideDbRange
+from wavtools import prepareHarmonics
 from wavtools import getMax
-from wavtools import save_wav
+from wavtools import compileTimeline
+from wavtools import save_wav_plan
+from wavtools import WavFileLockedError
+from wavtools import scaleSamplesQ15
+from wavtools import normalize
+from wavtools import getFixedPointWarnings
+from wavtools import PulseCache
+from wavtools import loadConfig
+from wavtools import runBatch
 from wavtools import IEC_60601_1_8_Pulse
-from wavtools import PulseMerger
 from wavtools import introduction
 from wavtools import maxDiffSoundPressureToPulseFrequencyInDB
 from shutil   import copyfile
 import subprocess
+import argparse
 import os
 import sys
 
 # specify, where you want to save the file and its filename:
 #outputFilePath = os.environ['HOME'] + "/Downloads/sounds/high-prio-new.wav"
 outputFilePath = "new-hp.wav"
-# name where a new configuration is saved:
-# IMPORTANT NOTE: name must be the same as in the (next) import statement
-#                 below around line 116
+# name where a new configuration is saved (it is read as defaults on the
+# next run):
 hpConfigFilename = 'hp_alarm'
 # if you want to also remote copy it to a device via scp, specify
 # the remote target here in the form of a scp target, e.g.
 # someuser@host:path. See scp for more details. If you set
 # the remote to None, no attempt for scp is made.
 remoteSCPtarget = None
+# if you want to keep rendered pulses across runs (e.g. when generating many
+# alarm variants with equal pulses), specify a directory for the pulse cache
+# here. If you set it to None, pulses are only reused within one run.
+pulseCacheDirectory = None
+# if you want to synthesize the pulses at one (master) sample rate and
+# resample them to the requested sample rate, specify the master sample
+# rate here. Resampling is slower than synthesizing at the requested
+# sample rate and removes (or attenuates by up to 6dB) the harmonics above
+# 95% (86.5%) of the lower Nyquist frequency (see wavtools.resample). If
+# you set it to None, pulses are synthesized at the requested sample rate.
+masterSampleRate_Hz = None
+# the synthesis backend of the pulses, e.g. 'numpy' or 'pure' (see
+# wavtools.getSynthesisBackends). If you set it to None, the fastest
+# backend is selected automatically.
+synthesisBackend = None
+# if you want the pulses synthesized, mixed and scaled in Q15 fixed point
+# (int16/int32 with saturation like a firmware mixer, see
+# wavtools.Pulse.createHarmonicWaveQ15), set fixedPoint to True. The
+# masterSampleRate_Hz, synthesisBackend and pulseCacheDirectory are ignored
+# (with a warning) then.
+fixedPoint = False
+# harmonics at or above the Nyquist frequency (half the sample rate) less
+# this guard band (in % of the Nyquist frequency) are not synthesized as
+# they would alias back into the audible band. If you set it to None, all
+# harmonics are synthesized.
+nyquistGuardBand_pc = 0
+# if you want to skip the synthesis of harmonics which are inaudible in the
+# output, specify the floor in dBFS here (or 'lsb' for 1 LSB of the 16 bit
+# samples after the gain). If you set it to None, all harmonics are
+# synthesized.
+pruneFloor_dBFS = None
+# the numpy dtype of the synthesized pulses: 'float64' or
+# 'float32' (half the memory, max. 1 LSB deviation of the int16 samples,
+# see wavtools.Pulse.setDtype). Ignored in fixed point and without numpy.
+sampleDtype = 'float64'
 
 
 # NOTE: you will see several sections of settings the later overwriting the
@@ -65,6 +108,14 @@ defaultBurstSpacing_ms = 2459.53
 #       it merged the files.
 # gain in (0.0; 1.0]
 gain = 0.98
+# normalization of the output: 'peak' scales the peak of the loudest pulse
+# to the gain; 'rms' and 'aweighted' scale the RMS or A-weighted RMS level
+# of the loudest pulse to targetLevel_dBFS (e.g. for alarms of equal
+# loudness), with the peak limited to the gain. The 10dB difference
+# between any two pulses is checked with the RMS levels ('aweighted':
+# with the A-weighted levels).
+normalization = 'peak'
+targetLevel_dBFS = -20
 
 ###############################################################################
 # Some devices may require a small silence period at the start of a HP alarm
@@ -77,36 +128,10 @@ defaultStartWithSilence_ms = 0
 ###############################################################################
 ###############################################################################
 
-if len(sys.argv) > 1:
-    copyfile(sys.argv[1], 'hp_alarm.py')
-# NOTE: This import must come after all initialization.
-#       By the way Python is made hp_alarm must be located in the directory in
-#       which THIS script (high_prio_sound_gen.py) resides.
-try:
-    from hp_alarm import defaultSampleRate_Hz
-    from hp_alarm import defaultPulseSpacing_ms
-    from hp_alarm import defaultPulseDuration_ms
-    from hp_alarm import defaultRiseTime_pc
-    from hp_alarm import defaultFallTime_pc
-    from hp_alarm import defaultBaseFrequency1
-    from hp_alarm import defaultHarmonicStr1
-    from hp_alarm import defaultVolumeStr1
-    from hp_alarm import defaultBaseFrequency2
-    from hp_alarm import defaultHarmonicStr2
-    from hp_alarm import defaultVolumeStr2
-    from hp_alarm import defaultHalfBurstSpacing_ms
-    from hp_alarm import defaultBurstSpacing_ms
-    from hp_alarm import defaultStartWithSilence_ms
-except:
-    print("No config " + hpConfigFilename + ".py found\n")
-    pass
-
-# TODO:
-# the follwing comment is left in here, if someone wants to create another script
-# for medium priority alarms
-# medium priority alarm pulse duration (t_d): 125ms to 250ms
-#pulseDurationMP_ms_min=125
-#pulseDurationMP_ms_max=250
+
+# NOTE: medium priority alarms need no script of their own: see
+#       IEC_60601_1_8_Medium_Priority_Pulse and mediumPriorityTimeline in
+#       wavtools.py
 
 def HP_introduction():
     print "Terminology - High Priority Alarm:"
@@ -185,403 +210,606 @@ class IEC_60601_1_8_High_Priority_Pulse(IEC_60601_1_8_Pulse):
     def isBurstSpacingInRange(self):
         return self._burstSpacing_ms >= self.burstSpacing_ms_min and self._burstSpacing_ms <= self.burstSpacing_ms_max
 
+def highPriorityTimeline(pulse, startWithSilence_ms = 0):
+    """
+    Timeline (see wavtools.compileTimeline) of a high priority burst of
+    pulse: the silence at start, pulse 1-5 ('p1' three times and 'p2'
+    twice), the half burst spacing, pulse 6-10 and the burst spacing
+    """
+    # IEC 60601-1-8 page 17 - silence btw Pulse 3 and 4: 2 x + t_d, x 
+    # t_d is here called pulseDuration_ms (see also wavetools.py)
+    silenceBtw3_and_4 = 2 * pulse.getPulseSpacing_ms() + pulse.getPulseDuration_ms() + 10
+    halfBurst = [('pulse',   'p1'),
+                 ('spacing', None),
+                 ('pulse',   'p1'),
+                 ('spacing', None),
+                 ('pulse',   'p1'),
+                 ('spacing', silenceBtw3_and_4),
+                 ('pulse',   'p2'),
+                 ('spacing', None),
+                 ('pulse',   'p2')]
+    return [('silence', startWithSilence_ms)] + halfBurst + \
+           [('spacing', pulse.getHalfBurstSpacing_ms())] + halfBurst + \
+           [('spacing', pulse.getBurstSpacing_ms())]
 
-###############################################################################
-###############################################################################
-###############################################################################
-
-print
-introduction()
-print
-HP_introduction()
-print
-print
-
-sampleRate_Hz = defaultSampleRate_Hz
-try:
-    select = input("Sample rate\n  0) 8kHz\n  1) 9.6kHz\n  2) 12kHz\n  3) 16kHz\n  4) 19.2kHz\n  5) 24kHz\n  6) 32kHz\n  7) 44.1kHz\n  8) 48kHz\n  9) 96kHz\nSelect [0; 9] (default: " + str(defaultSampleRate_Hz) + "): ")
-    if select == 0:
-        sampleRate_Hz = 8000
-    if select == 1:
-        sampleRate_Hz = 9600
-    if select == 2:
-        sampleRate_Hz = 12000
-    if select == 3:
-        sampleRate_Hz = 16000
-    if select == 4:
-        sampleRate_Hz = 19200
-    if select == 5:
-        sampleRate_Hz = 24000
-    if select == 6:
-        sampleRate_Hz = 32000
-    if select == 7:
-        sampleRate_Hz = 44100
-    if select == 8:
-        sampleRate_Hz = 48000
-    if select == 9:
-        sampleRate_Hz = 96000
-except:
-    pass
-        
-print("==> Selected sample rate: " + str(sampleRate_Hz) + " Hz\n")
-
-pulse = IEC_60601_1_8_High_Priority_Pulse()
-pulse.setSampleRate_Hz(sampleRate_Hz)
-
-###############################################################################
-
-try:
-    pulseSpacing_ms = input("Pulse spacing [" + str(pulse.pulse_90pc_spacing_ms_min) +  "ms; " + str(pulse.pulse_90pc_spacing_ms_max) + "ms] (default: " + str(defaultPulseSpacing_ms) + "ms): ")
-except:
-    pulseSpacing_ms = defaultPulseSpacing_ms
-
-print("==> Selected pulse spacing: " + str(pulse.setPulseSpacing_ms(pulseSpacing_ms)) + " ms")
-if (not pulse.isPulseSpacingInRange()):
-    print("*** WARNING: pulse spacing out of range")
-print
 
 ###############################################################################
-
-try:
-    pulseDuration_ms = input("Pulse duration [" + str(pulse.pulseDuration_ms_min) +  "ms; " + str(pulse.pulseDuration_ms_max) + "ms] (default: " + str(defaultPulseDuration_ms) + "ms): ")
-except:
-    pulseDuration_ms = defaultPulseDuration_ms
-
-print("==> Selected pulse duration: " + str(pulse.setPulseDuration_ms(pulseDuration_ms)) + " ms")
-if (not pulse.isPulseDurationInRange()):
-    print("*** WARNING: pulse duration out of range")
-print
- 
 ###############################################################################
-
-try:
-    riseTime_pc = input("Rise time [" + str(pulse.riseTime_pc_min) +  "%; " + str(pulse.riseTime_pc_max) + "%] (default: " + str(defaultRiseTime_pc) + "%): ")
-except:
-    riseTime_pc = defaultRiseTime_pc  # 100 * (11 / 125) = 8.8% measures with Audaciy
-
-print("==> Selected rise time: " + str(pulse.setRiseTime_pc(riseTime_pc)) + " %")
-if (not pulse.isRiseTimeInRange()):
-    print("*** WARNING: rise time out of range")
-print
-
-###############################################################################
-
-try:
-    fallTime_pc = input("Fall time [0%; 100%] (default: " + str(defaultFallTime_pc) + "%): ")
-except:
-    fallTime_pc = defaultFallTime_pc
-
-print("==> Selected fall time: " + str(pulse.setFallTime_pc(fallTime_pc)) + " %")
-if (not pulse.isFallTimeInRange()):
-    print("*** WARNING: fall time out of range")
-print
-
 ###############################################################################
 
-try:
-    baseFrequency1 = input("Base frequency of 1st pulse [" + str(baseFrequency_Hz_min) + "Hz; " + str(baseFrequency_Hz_max) + "Hz] (default: " + str(defaultBaseFrequency1) + "Hz): ")
-except:
-    baseFrequency1 = defaultBaseFrequency1 
-  
-print("==> Selected base frequency of 1st pulse: " + str(baseFrequency1))
-# IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
-if (baseFrequency_Hz_min > baseFrequency1 or baseFrequency1 > baseFrequency_Hz_max):
-    print("*** WARNING: pulse frequency f_0 out of range")
-print
-
-# to keep this code simple we leave this task to the user: first harmonic is 1 and harmonics
-# are sorted ascending.
-print("IMPORTANT NOTE: the first harmonic must be 1 and the harmonics must be in ascending order!!!")
-harmonicsStr1 = raw_input("Harmonics [positive integer] (default: " + defaultHarmonicStr1 + "): ")
-if len(harmonicsStr1) == 0:
-    harmonicsStr1 = defaultHarmonicStr1
- 
-print("==> Selected harmonics of 1st pulse: " + harmonicsStr1)
-   
-harmonics1 = harmonicsStr1.split()
-noHarmonics = len(harmonics1)
-
-# hasEnoughHarmonics ensures the correct format of harmonics. Hence call before
-# working on harmonics
-if (not hasEnoughHarmonics(baseFrequency1, harmonics1)):
-    print("*** WARNING: less than required number of harmonics in range [300Hz, 4000Hz]")
-print
+def getDefaultConfig():
+    """
+    Returns the default settings of this script as configuration, i.e. as
+    dictionary with the names used in the configuration files (see
+    example_HP_config.py) plus the gain, the normalization,
+    targetLevel_dBFS, the masterSampleRate_Hz, the synthesisBackend,
+    fixedPoint, nyquistGuardBand_pc, pruneFloor_dBFS and sampleDtype
+    """
+    return {'defaultSampleRate_Hz':       defaultSampleRate_Hz,
+            'defaultPulseSpacing_ms':     defaultPulseSpacing_ms,
+            'defaultPulseDuration_ms':    defaultPulseDuration_ms,
+            'defaultRiseTime_pc':         defaultRiseTime_pc,
+            'defaultFallTime_pc':         defaultFallTime_pc,
+            'defaultBaseFrequency1':      defaultBaseFrequency1,
+            'defaultHarmonicStr1':        defaultHarmonicStr1,
+            'defaultVolumeStr1':          defaultVolumeStr1,
+            'defaultBaseFrequency2':      defaultBaseFrequency2,
+            'defaultHarmonicStr2':        defaultHarmonicStr2,
+            'defaultVolumeStr2':          defaultVolumeStr2,
+            'defaultHalfBurstSpacing_ms': defaultHalfBurstSpacing_ms,
+            'defaultBurstSpacing_ms':     defaultBurstSpacing_ms,
+            'defaultStartWithSilence_ms': defaultStartWithSilence_ms,
+            'gain':                       gain,
+            'normalization':              normalization,
+            'targetLevel_dBFS':           targetLevel_dBFS,
+            'masterSampleRate_Hz':        masterSampleRate_Hz,
+            'synthesisBackend':           synthesisBackend,
+            'fixedPoint':                 fixedPoint,
+            'nyquistGuardBand_pc':        nyquistGuardBand_pc,
+            'pruneFloor_dBFS':            pruneFloor_dBFS,
+            'sampleDtype':                sampleDtype}
+
+def generate_high_priority(config, wavFilePath = None, pulseCache = None, verbose = False):
+    """
+    Generates the high priority alarm of config without any query and saves
+    it in wavFilePath (default: outputFilePath of this script).
+    config is a dictionary with (some of) the settings of a configuration
+    file, e.g. loadConfig('example_HP_config.py'); missing settings are
+    taken from getDefaultConfig().
+    Pulses are taken from pulseCache if given (see PulseCache).
+    Returns a dictionary with the 'outputFilePath', the 'sampleRate_Hz',
+    the 'warnings' (list of IEC 60601-1-8 violations), the
+    'prunedHarmonics' (by pulse, see pruneFloor_dBFS) and the
+    'levels_dBFS' ('rms' and 'aweighted' by pulse) of the output.
+    """
+    settings = getDefaultConfig()
+    settings.update(config)
+    if wavFilePath is None:
+        wavFilePath = outputFilePath
+    if pulseCache is None:
+        pulseCache = PulseCache()
+    warnings = []
+
+    def report(text):
+        if verbose:
+            print text
+
+    sampleRate_Hz = settings['defaultSampleRate_Hz']
+    pulse = IEC_60601_1_8_High_Priority_Pulse()
+    pulse.setSampleRate_Hz(sampleRate_Hz)
+    pulse.setDtype(settings['sampleDtype'])
+    pulse.setPulseSpacing_ms(settings['defaultPulseSpacing_ms'])
+    if (not pulse.isPulseSpacingInRange()):
+        warnings.append("pulse spacing out of range")
+    pulse.setPulseDuration_ms(settings['defaultPulseDuration_ms'])
+    if (not pulse.isPulseDurationInRange()):
+        warnings.append("pulse duration out of range")
+    pulse.setRiseTime_pc(settings['defaultRiseTime_pc'])
+    if (not pulse.isRiseTimeInRange()):
+        warnings.append("rise time out of range")
+    pulse.setFallTime_pc(settings['defaultFallTime_pc'])
+    if (not pulse.isFallTimeInRange()):
+        warnings.append("fall time out of range")
+    pulse.setHalfBurstSpacing_ms(settings['defaultHalfBurstSpacing_ms'])
+    if (not pulse.isHalfBurstSpacingInRange()):
+        warnings.append("half burst spacing out of range")
+    pulse.setBurstSpacing_ms(settings['defaultBurstSpacing_ms'])
+    if (not pulse.isBurstSpacingInRange()):
+        warnings.append("burst spacing out of range")
+    startWithSilence_ms = max(0, settings['defaultStartWithSilence_ms'])
+
+    baseFrequency1 = settings['defaultBaseFrequency1']
+    baseFrequency2 = settings['defaultBaseFrequency2']
+    harmonics1 = str(settings['defaultHarmonicStr1']).split()
+    harmonics2 = str(settings['defaultHarmonicStr2']).split()
+    volumes1 = getVolumes(str(settings['defaultVolumeStr1']))
+    volumes2 = getVolumes(str(settings['defaultVolumeStr2']))
+    dBvalue=str(maxDiffSoundPressureToPulseFrequencyInDB)
+    for name, baseFrequency, harmonics, volumes in [("1st", baseFrequency1, harmonics1, volumes1),
+                                                    ("2nd", baseFrequency2, harmonics2, volumes2)]:
+        if len(volumes) != len(harmonics):
+            raise ValueError(str(len(harmonics)) + " volumes required for the harmonics of the " + name + " pulse")
+        # IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
+        if (baseFrequency_Hz_min > baseFrequency or baseFrequency > baseFrequency_Hz_max):
+            warnings.append("pulse frequency f_0 of " + name + " pulse out of range [150Hz, 1000Hz]")
+        if (not hasEnoughHarmonics(baseFrequency, harmonics)):
+            warnings.append("less than required number of harmonics in range [300Hz, 4000Hz] in " + name + " pulse")
+        if (not hasSignificantVolumesInsideDbRange(volumes, baseFrequency, harmonics)):
+            warnings.append("less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume in " + name + " pulse")
+
+    # skip the harmonics which cannot be represented at the sample rate
+    # and the ones which are inaudible after scaling and quantization
+    # before any samples are computed
+    pulses, harmonicWarnings, prunedHarmonics = prepareHarmonics([("1st", baseFrequency1, harmonics1, volumes1),
+                                                                  ("2nd", baseFrequency2, harmonics2, volumes2)], sampleRate_Hz, settings)
+    (_, _, harmonics1, volumes1), (_, _, harmonics2, volumes2) = pulses
+    for warning in harmonicWarnings:
+        warnings.append(warning)
+        report("*** WARNING: " + warning)
+    for name, removedHarmonics in sorted(prunedHarmonics.items()):
+        report("Pruned harmonics of " + name + " pulse below " + str(settings['pruneFloor_dBFS']) + " dBFS: " + (" ".join(removedHarmonics) or "none"))
+    for warning in getFixedPointWarnings(settings, pulseCache):
+        warnings.append(warning)
+        report("*** WARNING: " + warning)
+
+    ###########################################################################
+
+    report("\nDetermine max volume across all pulses")
+    maxVol1 = getMax(volumes1)
+    maxVol2 = getMax(volumes2)
+    maxVol  = max(maxVol1, maxVol2)    
+
+    if maxVol == 0:
+        raise ValueError('volumes of all harmonics in pulses cannot be all 0')
+
+    ###########################################################################
+
+    # create array of integer volumes and normalize volume across all volChar1+2
+    report("Normalizing volumes across pulses")
+
+    # it is maxVol != 0
+    for i, vol in enumerate(volumes1):
+        volumes1[i] = vol / maxVol
+    for i, vol in enumerate(volumes2):
+        volumes2[i] = vol / maxVol
+
+    ###########################################################################
+
+    # p1Array/p2Array are the pulses with all harmonics merged
+    # (equal pulses are synthesized only once, see PulseCache; in fixed point
+    # the pulses are Q15 integers)
+    report("Creating wave and harmonics for pulse 1")
+    if settings['fixedPoint']:
+        p1Array, maxAbs1 = pulse.createHarmonicWaveQ15(baseFrequency1, harmonics1, volumes1)
+    else:
+        p1Array, maxAbs1 = pulseCache.createHarmonicWave(pulse, baseFrequency1, harmonics1, volumes1, settings['masterSampleRate_Hz'], settings['synthesisBackend'])
+    report("Creating wave and harmonics for pulse 2")
+    if settings['fixedPoint']:
+        p2Array, maxAbs2 = pulse.createHarmonicWaveQ15(baseFrequency2, harmonics2, volumes2)
+    else:
+        p2Array, maxAbs2 = pulseCache.createHarmonicWave(pulse, baseFrequency2, harmonics2, volumes2, settings['masterSampleRate_Hz'], settings['synthesisBackend'])
+
+    maxAbs = max(maxAbs1, maxAbs2)
+    # maxAbs != 0 since maxVol != 0
+
+    ###########################################################################
+
+    report("Normalizing (" + settings['normalization'] + ") with max gain across burst of " + str(settings['gain']))
+
+    # set the volume of the final output here: the peak of the loudest pulse
+    # becomes the gain ('peak') or the level of the loudest pulse becomes
+    # targetLevel_dBFS with the peak limited to the gain ('rms', 'aweighted').
+    # The levels are computed from the synthesis parameters, i.e. without a
+    # pass over the samples. In fixed point maxAbs is in Q15.
+    peak, levels_dBFS, levelWarnings = normalize(pulse, [("1st", baseFrequency1, harmonics1, volumes1),
+                                                    ("2nd", baseFrequency2, harmonics2, volumes2)], maxAbs, settings)
+    for name in sorted(levels_dBFS):
+        report("Level of " + name + " pulse: %.1f dBFS RMS, %.1f dBFS(A)" % (levels_dBFS[name]['rms'], levels_dBFS[name]['aweighted']))
+    for warning in levelWarnings:
+        warnings.append(warning)
+        report("*** WARNING: " + warning + "\n")
+    if maxAbs != 0:
+        scale = peak / maxAbs
+    else:
+        scale = 0
+
+    # only the pulses need scaling, the silences are 0. The floating point
+    # pulses are scaled, converted to 16 bit and quantized in one pass when
+    # they are written (see RenderPlan.segments).
+    if settings['fixedPoint']:
+        # int16 samples which are written as they are
+        scale = 1.0
+        p1Array = scaleSamplesQ15(p1Array, peak, maxAbs)
+        p2Array = scaleSamplesQ15(p2Array, peak, maxAbs)
+
+    ###########################################################################
+
+    report("Merging harmonics and creating final burst with 10 pulses")
+    # the burst is compiled from its timeline into a render plan with the
+    # sample offset of every pulse; each pulse is converted once and written
+    # at each of its offsets, the silences are written as zeroed blocks.
+
+    # IEC 60601-1-8 page 17 - silence btw Pulse 1 and 2: x = 50ms to 125ms
+    # x is here called pulse_90pc_spacing_ms (see also wavetools.py)
+    timeline = highPriorityTimeline(pulse, startWithSilence_ms)
+    # the silence btw Pulse 3 and 4 (see highPriorityTimeline) is the 3rd
+    # spacing of the timeline
+    silenceBtw3_and_4 = [value for event, value in timeline if event == 'spacing'][2]
+
+    report("Pulse 1:\t" + str(pulse.getPulseDuration_ms()) + "ms")
+    report("Silence 1:\t" + str(pulse.getPulseSpacing_ms()) + "ms")
+    report("Pulse 2:\t" + str(pulse.getPulseDuration_ms()) + "ms")
+    report("Silence 2:\t" + str(pulse.getPulseSpacing_ms()) + "ms")
+    report("Pulse 3:\t" + str(pulse.getPulseDuration_ms()) + "ms")
+    report("Silence 3:\t" + str(silenceBtw3_and_4) + "ms")
+    report("Pulse 4:\t" + str(pulse.getPulseDuration_ms()) + "ms")
+    report("Silence 4:\t" + str(pulse.getPulseSpacing_ms()) + "ms")
+    report("Pulse 5:\t" + str(pulse.getPulseDuration_ms()) + "ms")
+    # IEC 60601-1-8 page 17 - silence btw Pulse 5 and 6: 0.35 to 1.3 seconds
+    # here called halfBurstSpacing_ms
+    report("Silence 5:\t" + str(pulse.getHalfBurstSpacing_ms()) + "ms")
+    # see IEC 60601-1-8 page 17
+    report("Pulse 6-10:\trepeat pulse 1-5")
+    # IEC 60601-1-8 page 17 - silence btw two bursts: 2.5 to 15.0 seconds
+    # here called burstSpacing_ms
+    report("Silence 10:\t" + str(pulse.getBurstSpacing_ms()) + "ms")
+
+    plan = compileTimeline(timeline, pulse)
+
+    ###########################################################################
+
+    report("Saving wave in " + wavFilePath)
+
+    save_wav_plan(plan, {'p1': p1Array, 'p2': p2Array}, wavFilePath, sampleRate_Hz, scale=scale)
+
+    return {'outputFilePath':  wavFilePath,
+            'sampleRate_Hz':   sampleRate_Hz,
+            'warnings':        warnings,
+            'prunedHarmonics': prunedHarmonics,
+            'levels_dBFS':     levels_dBFS}
 
 ###############################################################################
-
-volumes1 = []
-while len(volumes1) != noHarmonics:
-    volumesStr1 = raw_input(str(noHarmonics) + " Volumes (default: " + defaultVolumeStr1 + "): ")
-    if len(volumesStr1) == 0:
-        volumesStr1 = defaultVolumeStr1
-    volumes1 = getVolumes(volumesStr1)
-
-print("==> Selected volumes of 1st pulse: " + volumesStr1)
-
-dBvalue=str(maxDiffSoundPressureToPulseFrequencyInDB)
-if (not hasSignificantVolumesInsideDbRange(volumes1, baseFrequency1, harmonics1)):
-    print("*** WARNING: less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume")
-    print("            "),
-    vOODbR = volumesOutOfDbRange(volumes1)
-    print("             The following volumes differ more than " + dBvalue + "dB from base frequency's volume:")
-    for v in vOODbR:
-        print(str(v) + ", "),
-print
-
 ###############################################################################
-
-try:
-    baseFrequency2 = input("Base frequency of 2nd pulse [" + str(baseFrequency_Hz_min) + "Hz; " + str(baseFrequency_Hz_max) + "Hz] (default: " + str(defaultBaseFrequency2) + "Hz): ")
-except:
-    baseFrequency2 = defaultBaseFrequency2
- 
-print("==> Selected base frequency of 2nd pulse: " + str(baseFrequency2))
-# IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
-if (baseFrequency_Hz_min > baseFrequency2 or baseFrequency2 > baseFrequency_Hz_max):
-    print("*** WARNING: pulse frequency f_0 out of range [150Hz, 1000Hz]")
-print
-
-# to keep this code simple we leave this task to the user: first harmonic is 1 and harmonics
-# are sorted ascending.
-print("IMPORTANT NOTE: the first harmonic must be 1 and the harmonics must be in ascending order!!!")
-harmonicsStr2 = raw_input("Harmonics [positive integer] (default: " + defaultHarmonicStr2 + "): ")
-if len(harmonicsStr2) == 0:
-    harmonicsStr2 = defaultHarmonicStr2
- 
-print("==> Selected harmonics of 2nd pulse: " + harmonicsStr2)
-   
-harmonics2 = harmonicsStr2.split()
-noHarmonics = len(harmonics2)
-
-# hasEnoughHarmonics ensures the correct format of harmonics. Hence call before
-# working on harmonics
-if (not hasEnoughHarmonics(baseFrequency2, harmonics2)):
-    print("*** WARNING: less than required number of harmonics in range [300Hz, 4000Hz]")
-print
-
 ###############################################################################
 
-volumes2 = []
-while len(volumes2) != noHarmonics:
-    volumesStr2 = raw_input(str(noHarmonics) + " Volumes (default: " + defaultVolumeStr2 + "): ")
-    if len(volumesStr2) == 0:
-        volumesStr2 = defaultVolumeStr2
-    volumes2 = getVolumes(volumesStr2)
-
-print("==> Selected volumes of 2nd pulse: " + volumesStr2)
-
-dBvalue=str(maxDiffSoundPressureToPulseFrequencyInDB)
-if (not hasSignificantVolumesInsideDbRange(volumes2, baseFrequency2, harmonics2)):
-    print("*** WARNING: less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume")
-    print("            "),
-    vOODbR = volumesOutOfDbRange(volumes2)
-    print("             The following volumes differ more than " + dBvalue + "dB from base frequency's volume:")
-    for v in vOODbR:
-        print(str(v) + ", "),
-print
-
-###############################################################################
+def queryConfig(defaults):
+    """
+    Queries all parameters (proposing the settings of defaults) and returns
+    them as configuration (see getDefaultConfig); the settings of defaults
+    which are not queried (e.g. the gain) are kept. Optionally saves them as
+    new defaults in hpConfigFilename.py.
+    """
 
-try:
-    halfBurstSpacing_ms = input("Spacing between first 5 pulses and second 5 pulses in ms [" + str(pulse.halfBurstSpacing_ms_min) +  "ms; " + str(pulse.halfBurstSpacing_ms_max) + "ms] (default: " + str(defaultHalfBurstSpacing_ms) + "ms): ")
-except:
-    halfBurstSpacing_ms = defaultHalfBurstSpacing_ms
+    defaultSampleRate_Hz       = defaults['defaultSampleRate_Hz']
+    defaultPulseSpacing_ms     = defaults['defaultPulseSpacing_ms']
+    defaultPulseDuration_ms    = defaults['defaultPulseDuration_ms']
+    defaultRiseTime_pc         = defaults['defaultRiseTime_pc']
+    defaultFallTime_pc         = defaults['defaultFallTime_pc']
+    defaultBaseFrequency1      = defaults['defaultBaseFrequency1']
+    defaultHarmonicStr1        = defaults['defaultHarmonicStr1']
+    defaultVolumeStr1          = defaults['defaultVolumeStr1']
+    defaultBaseFrequency2      = defaults['defaultBaseFrequency2']
+    defaultHarmonicStr2        = defaults['defaultHarmonicStr2']
+    defaultVolumeStr2          = defaults['defaultVolumeStr2']
+    defaultHalfBurstSpacing_ms = defaults['defaultHalfBurstSpacing_ms']
+    defaultBurstSpacing_ms     = defaults['defaultBurstSpacing_ms']
+    defaultStartWithSilence_ms = defaults['defaultStartWithSilence_ms']
+
+    sampleRate_Hz = defaultSampleRate_Hz
+    try:
+        select = input("Sample rate\n  0) 8kHz\n  1) 9.6kHz\n  2) 12kHz\n  3) 16kHz\n  4) 19.2kHz\n  5) 24kHz\n  6) 32kHz\n  7) 44.1kHz\n  8) 48kHz\n  9) 96kHz\nSelect [0; 9] (default: " + str(defaultSampleRate_Hz) + "): ")
+        if select == 0:
+            sampleRate_Hz = 8000
+        if select == 1:
+            sampleRate_Hz = 9600
+        if select == 2:
+            sampleRate_Hz = 12000
+        if select == 3:
+            sampleRate_Hz = 16000
+        if select == 4:
+            sampleRate_Hz = 19200
+        if select == 5:
+            sampleRate_Hz = 24000
+        if select == 6:
+            sampleRate_Hz = 32000
+        if select == 7:
+            sampleRate_Hz = 44100
+        if select == 8:
+            sampleRate_Hz = 48000
+        if select == 9:
+            sampleRate_Hz = 96000
+    except:
+        pass
 
-print("==> Selected half burst spacing: " + str(pulse.setHalfBurstSpacing_ms(halfBurstSpacing_ms)) + " ms")
-if (not pulse.isHalfBurstSpacingInRange()):
-    print("*** WARNING: half burst spacing out of range")
-print
+    print("==> Selected sample rate: " + str(sampleRate_Hz) + " Hz\n")
 
-###############################################################################
+    pulse = IEC_60601_1_8_High_Priority_Pulse()
+    pulse.setSampleRate_Hz(sampleRate_Hz)
 
-try:
-    burstSpacing_ms = input("Spacing between two bursts in ms [" + str(pulse.burstSpacing_ms_min) +  "ms; " + str(pulse.burstSpacing_ms_max) + "ms] (default: " + str(defaultBurstSpacing_ms) + "ms): ")
-except:
-    burstSpacing_ms = defaultBurstSpacing_ms
+    ###############################################################################
 
-print("==> Selected burst spacing: " + str(pulse.setBurstSpacing_ms(burstSpacing_ms)) + " ms")
-if (not pulse.isBurstSpacingInRange()):
-    print("*** WARNING: burst spacing out of range")
-print
+    try:
+        pulseSpacing_ms = input("Pulse spacing [" + str(pulse.pulse_90pc_spacing_ms_min) +  "ms; " + str(pulse.pulse_90pc_spacing_ms_max) + "ms] (default: " + str(defaultPulseSpacing_ms) + "ms): ")
+    except:
+        pulseSpacing_ms = defaultPulseSpacing_ms
 
-###############################################################################
+    print("==> Selected pulse spacing: " + str(pulse.setPulseSpacing_ms(pulseSpacing_ms)) + " ms")
+    if (not pulse.isPulseSpacingInRange()):
+        print("*** WARNING: pulse spacing out of range")
+    print
 
-try:
-    print("Some devices require a silence period at the very start")
-    print("which is beyond IEC 60601-1-8 compliance.")
-    startWithSilence_ms = input("Silence at start in ms (default: " + str(defaultStartWithSilence_ms) + "ms): ")
-except:
-    startWithSilence_ms = defaultStartWithSilence_ms
+    ###############################################################################
 
-startWithSilence_ms = max(0, startWithSilence_ms)
-print("==> Selected silence at start: " + str(startWithSilence_ms) + " ms")
-print
+    try:
+        pulseDuration_ms = input("Pulse duration [" + str(pulse.pulseDuration_ms_min) +  "ms; " + str(pulse.pulseDuration_ms_max) + "ms] (default: " + str(defaultPulseDuration_ms) + "ms): ")
+    except:
+        pulseDuration_ms = defaultPulseDuration_ms
 
-###############################################################################
+    print("==> Selected pulse duration: " + str(pulse.setPulseDuration_ms(pulseDuration_ms)) + " ms")
+    if (not pulse.isPulseDurationInRange()):
+        print("*** WARNING: pulse duration out of range")
+    print
 
-doSave = 'y'
-try:
-    doSave = raw_input("Save parameters as new defaults [Y|n]? ")
-except:
-    doSave = 'y'
+    ###############################################################################
 
-if (doSave != 'n' and doSave != 'N'):
     try:
-        f=open(hpConfigFilename + ".py","w")
-        f.write("#!/usr/bin/python"                                          + "\n" +
-                "defaultSampleRate_Hz       = "   + str(sampleRate_Hz)       + "\n" +
-                "defaultPulseSpacing_ms     = "   + str(pulseSpacing_ms)     + "\n" +
-                "defaultPulseDuration_ms    = "   + str(pulseDuration_ms)    + "\n" +
-                "defaultRiseTime_pc         = "   + str(riseTime_pc)         + "\n" +
-                "defaultFallTime_pc         = "   + str(fallTime_pc)         + "\n" +
-                "defaultBaseFrequency1      = "   + str(baseFrequency1)      + "\n" +
-                "defaultHarmonicStr1        = \"" + str(harmonicsStr1)       + "\"\n" +
-                "defaultVolumeStr1          = \"" + str(volumesStr1)         + "\"\n" +
-                "defaultBaseFrequency2      = "   + str(baseFrequency2)      + "\n" +
-                "defaultHarmonicStr2        = \"" + str(harmonicsStr2)       + "\"\n" +
-                "defaultVolumeStr2          = \"" + str(volumesStr2)         + "\"\n" +
-                "defaultHalfBurstSpacing_ms = "   + str(halfBurstSpacing_ms) + "\n" +
-                "defaultBurstSpacing_ms     = "   + str(burstSpacing_ms)     + "\n" +
-                "defaultStartWithSilence_ms = "   + str(startWithSilence_ms) + "\n")
-        f.close()
-        print("Configuration saved in " + hpConfigFilename + ".py\n")
+        riseTime_pc = input("Rise time [" + str(pulse.riseTime_pc_min) +  "%; " + str(pulse.riseTime_pc_max) + "%] (default: " + str(defaultRiseTime_pc) + "%): ")
     except:
-        print(hpConfigFilename + ".py locked by other application - please close\n")
-        raw_input()
+        riseTime_pc = defaultRiseTime_pc  # 100 * (11 / 125) = 8.8% measures with Audaciy
 
-###############################################################################
+    print("==> Selected rise time: " + str(pulse.setRiseTime_pc(riseTime_pc)) + " %")
+    if (not pulse.isRiseTimeInRange()):
+        print("*** WARNING: rise time out of range")
+    print
 
-print "\n#############################################\n"
-print "\nDetermine max volume across all pulses"
-maxVol1 = getMax(volumes1)
-maxVol2 = getMax(volumes2)
-maxVol  = max(maxVol1, maxVol2)    
+    ###############################################################################
 
-if maxVol == 0:
-    raise ValueError('volumes of all harmonics in pulses cannot be all 0')
+    try:
+        fallTime_pc = input("Fall time [0%; 100%] (default: " + str(defaultFallTime_pc) + "%): ")
+    except:
+        fallTime_pc = defaultFallTime_pc
 
-###############################################################################
+    print("==> Selected fall time: " + str(pulse.setFallTime_pc(fallTime_pc)) + " %")
+    if (not pulse.isFallTimeInRange()):
+        print("*** WARNING: fall time out of range")
+    print
 
-# create array of integer volumes and normalize volume across all volChar1+2
-print "Normalizing volumes across pulses"
+    ###############################################################################
 
-# it is maxVol != 0
-for i, vol in enumerate(volumes1):
-    volumes1[i] = vol / maxVol
-for i, vol in enumerate(volumes2):
-    volumes2[i] = vol / maxVol
+    try:
+        baseFrequency1 = input("Base frequency of 1st pulse [" + str(baseFrequency_Hz_min) + "Hz; " + str(baseFrequency_Hz_max) + "Hz] (default: " + str(defaultBaseFrequency1) + "Hz): ")
+    except:
+        baseFrequency1 = defaultBaseFrequency1 
+
+    print("==> Selected base frequency of 1st pulse: " + str(baseFrequency1))
+    # IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
+    if (baseFrequency_Hz_min > baseFrequency1 or baseFrequency1 > baseFrequency_Hz_max):
+        print("*** WARNING: pulse frequency f_0 out of range")
+    print
+
+    # to keep this code simple we leave this task to the user: first harmonic is 1 and harmonics
+    # are sorted ascending.
+    print("IMPORTANT NOTE: the first harmonic must be 1 and the harmonics must be in ascending order!!!")
+    harmonicsStr1 = raw_input("Harmonics [positive integer] (default: " + defaultHarmonicStr1 + "): ")
+    if len(harmonicsStr1) == 0:
+        harmonicsStr1 = defaultHarmonicStr1
+
+    print("==> Selected harmonics of 1st pulse: " + harmonicsStr1)
+
+    harmonics1 = harmonicsStr1.split()
+    noHarmonics = len(harmonics1)
+
+    # hasEnoughHarmonics ensures the correct format of harmonics. Hence call before
+    # working on harmonics
+    if (not hasEnoughHarmonics(baseFrequency1, harmonics1)):
+        print("*** WARNING: less than required number of harmonics in range [300Hz, 4000Hz]")
+    print
+
+    ###############################################################################
+
+    volumes1 = []
+    while len(volumes1) != noHarmonics:
+        volumesStr1 = raw_input(str(noHarmonics) + " Volumes (default: " + defaultVolumeStr1 + "): ")
+        if len(volumesStr1) == 0:
+            volumesStr1 = defaultVolumeStr1
+        volumes1 = getVolumes(volumesStr1)
+
+    print("==> Selected volumes of 1st pulse: " + volumesStr1)
+
+    dBvalue=str(maxDiffSoundPressureToPulseFrequencyInDB)
+    if (not hasSignificantVolumesInsideDbRange(volumes1, baseFrequency1, harmonics1)):
+        print("*** WARNING: less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume")
+        print("            "),
+        vOODbR = volumesOutOfDbRange(volumes1)
+        print("             The following volumes differ more than " + dBvalue + "dB from base frequency's volume:")
+        for v in vOODbR:
+            print(str(v) + ", "),
+    print
+
+    ###############################################################################
 
-###############################################################################
+    try:
+        baseFrequency2 = input("Base frequency of 2nd pulse [" + str(baseFrequency_Hz_min) + "Hz; " + str(baseFrequency_Hz_max) + "Hz] (default: " + str(defaultBaseFrequency2) + "Hz): ")
+    except:
+        baseFrequency2 = defaultBaseFrequency2
+
+    print("==> Selected base frequency of 2nd pulse: " + str(baseFrequency2))
+    # IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
+    if (baseFrequency_Hz_min > baseFrequency2 or baseFrequency2 > baseFrequency_Hz_max):
+        print("*** WARNING: pulse frequency f_0 out of range [150Hz, 1000Hz]")
+    print
+
+    # to keep this code simple we leave this task to the user: first harmonic is 1 and harmonics
+    # are sorted ascending.
+    print("IMPORTANT NOTE: the first harmonic must be 1 and the harmonics must be in ascending order!!!")
+    harmonicsStr2 = raw_input("Harmonics [positive integer] (default: " + defaultHarmonicStr2 + "): ")
+    if len(harmonicsStr2) == 0:
+        harmonicsStr2 = defaultHarmonicStr2
+
+    print("==> Selected harmonics of 2nd pulse: " + harmonicsStr2)
+
+    harmonics2 = harmonicsStr2.split()
+    noHarmonics = len(harmonics2)
+
+    # hasEnoughHarmonics ensures the correct format of harmonics. Hence call before
+    # working on harmonics
+    if (not hasEnoughHarmonics(baseFrequency2, harmonics2)):
+        print("*** WARNING: less than required number of harmonics in range [300Hz, 4000Hz]")
+    print
+
+    ###############################################################################
+
+    volumes2 = []
+    while len(volumes2) != noHarmonics:
+        volumesStr2 = raw_input(str(noHarmonics) + " Volumes (default: " + defaultVolumeStr2 + "): ")
+        if len(volumesStr2) == 0:
+            volumesStr2 = defaultVolumeStr2
+        volumes2 = getVolumes(volumesStr2)
+
+    print("==> Selected volumes of 2nd pulse: " + volumesStr2)
+
+    dBvalue=str(maxDiffSoundPressureToPulseFrequencyInDB)
+    if (not hasSignificantVolumesInsideDbRange(volumes2, baseFrequency2, harmonics2)):
+        print("*** WARNING: less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume")
+        print("            "),
+        vOODbR = volumesOutOfDbRange(volumes2)
+        print("             The following volumes differ more than " + dBvalue + "dB from base frequency's volume:")
+        for v in vOODbR:
+            print(str(v) + ", "),
+    print
+
+    ###############################################################################
 
-# pulse1/2 are arrays of harmonics
-pulse1 = []
-pulse2 = []
+    try:
+        halfBurstSpacing_ms = input("Spacing between first 5 pulses and second 5 pulses in ms [" + str(pulse.halfBurstSpacing_ms_min) +  "ms; " + str(pulse.halfBurstSpacing_ms_max) + "ms] (default: " + str(defaultHalfBurstSpacing_ms) + "ms): ")
+    except:
+        halfBurstSpacing_ms = defaultHalfBurstSpacing_ms
 
-print "Creating wave and harmonics for pulse 1"
-for i, volume in enumerate(volumes1):
-    pulse1.append(pulse.createWave(baseFrequency1 * int(harmonics1[i]), volume))
-print "Creating wave and harmonics for pulse 2"
-for i, volume in enumerate(volumes2):
-    pulse2.append(pulse.createWave(baseFrequency2 * int(harmonics2[i]), volume))
+    print("==> Selected half burst spacing: " + str(pulse.setHalfBurstSpacing_ms(halfBurstSpacing_ms)) + " ms")
+    if (not pulse.isHalfBurstSpacingInRange()):
+        print("*** WARNING: half burst spacing out of range")
+    print
 
-###############################################################################
+    ###############################################################################
 
-print "Merging harmonics and creating final burst with 10 pulses"
-# merge the audio files
-audio = []
+    try:
+        burstSpacing_ms = input("Spacing between two bursts in ms [" + str(pulse.burstSpacing_ms_min) +  "ms; " + str(pulse.burstSpacing_ms_max) + "ms] (default: " + str(defaultBurstSpacing_ms) + "ms): ")
+    except:
+        burstSpacing_ms = defaultBurstSpacing_ms
 
-p1 = PulseMerger(pulse1)
-p1Array = p1.merge()
-print "Pulse 1:\t" + str(pulse.getPulseDuration_ms()) + "ms"
-audio = audio + p1Array
-maxAbs1 = p1.getMaxVolume()
+    print("==> Selected burst spacing: " + str(pulse.setBurstSpacing_ms(burstSpacing_ms)) + " ms")
+    if (not pulse.isBurstSpacingInRange()):
+        print("*** WARNING: burst spacing out of range")
+    print
 
-# IEC 60601-1-8 page 17 - silence btw Pulse 1 and 2: x = 50ms to 125ms
-# x is here called pulse_90pc_spacing_ms (see also wavetools.py)
-print "Silence 1:\t" + str(pulse.getPulseSpacing_ms()) + "ms"
-audio = audio + pulse.createSilence()
-   
-print "Pulse 2:\t" + str(pulse.getPulseDuration_ms()) + "ms"
-audio = audio + p1Array
-
-# IEC 60601-1-8 page 17 - silence btw Pulse 2 and 3: x = 50ms to 125ms
-print "Silence 2:\t" + str(pulse.getPulseSpacing_ms()) + "ms"
-audio = audio + pulse.createSilence()
-
-print "Pulse 3:\t" + str(pulse.getPulseDuration_ms()) + "ms"
-audio = audio + p1Array
-
-# IEC 60601-1-8 page 17 - silence btw Pulse 3 and 4: 2 x + t_d, x 
-# t_d is here called pulseDuration_ms (see also wavetools.py)
-silenceBtw3_and_4 = 2 * pulse.getPulseSpacing_ms() + pulse.getPulseDuration_ms() + 10
-print "Silence 3:\t" + str(silenceBtw3_and_4) + "ms"
-audio = audio + pulse.createSilence(silenceBtw3_and_4)
-
-p2 = PulseMerger(pulse2)
-p2Array = p2.merge()
-print "Pulse 4:\t" + str(pulse.getPulseDuration_ms()) + "ms"
-audio = audio + p2Array
-maxAbs2 = p2.getMaxVolume()
-
-maxAbs = max(maxAbs1, maxAbs2)
-# maxAbs != 0 since maxVol != 0
-
-# IEC 60601-1-8 page 17 - silence btw Pulse 4 and 5: x = 50ms to 125ms
-print "Silence 4:\t" + str(pulse.getPulseSpacing_ms()) + "ms"
-audio = audio + pulse.createSilence()
-
-print "Pulse 5:\t" + str(pulse.getPulseDuration_ms()) + "ms"
-audio = audio + p2Array
-
-# IEC 60601-1-8 page 17 - silence btw Pulse 5 and 6: 0.35 to 1.3 seconds
-# here called halfBurstSpacing_ms
-print "Silence 5:\t" + str(pulse.getHalfBurstSpacing_ms()) + "ms"
-# see IEC 60601-1-8 page 17
-print "Pulse 6-10:\trepeat pulse 1-5" # add total length of 1-5 incl. spacing
-audio = ([0.0] * pulse._getSamplesFromMs(startWithSilence_ms)) + audio + pulse.createSilence(pulse.getHalfBurstSpacing_ms()) + audio
-
-# IEC 60601-1-8 page 17 - silence btw two bursts: 2.5 to 15.0 seconds
-# here called burstSpacing_ms
-print "Silence 10:\t" + str(pulse.getBurstSpacing_ms()) + "ms"
-# NOTE: since we copied pulse 1-5 for pulses 6-10 we also copied the
-#       halfBurstSpace after pulse 5 which we now need to subtract
-#       from the burstSpacing
-audio = audio + pulse.createSilence(pulse.getBurstSpacing_ms())
+    ###############################################################################
 
-###############################################################################
+    try:
+        print("Some devices require a silence period at the very start")
+        print("which is beyond IEC 60601-1-8 compliance.")
+        startWithSilence_ms = input("Silence at start in ms (default: " + str(defaultStartWithSilence_ms) + "ms): ")
+    except:
+        startWithSilence_ms = defaultStartWithSilence_ms
 
-# checking IEC 60601-1-8 Table 3:
-maxDiffSoundPressureAnyPulsesInDB=10
-maxDiffSoundPressureAnyPulses=10.0**(maxDiffSoundPressureAnyPulsesInDB/20.0)
-# Max difference in amplitude between any two PULSES is 10dB (as factor: 3.16)
-if maxAbs2 != 0 and maxAbs1 / maxAbs2 > maxDiffSoundPressureAnyPulses:
-    print("*** WARNING: more than " + maxDiffSoundPressureAnyPulses + "dB difference in amplitude between pulses\n")
-if maxAbs1 != 0 and maxAbs2 / maxAbs1 > maxDiffSoundPressureAnyPulses:
-    print("*** WARNING: more than " + maxDiffSoundPressureAnyPulses + "dB difference in amplitude between pulses\n")
+    startWithSilence_ms = max(0, startWithSilence_ms)
+    print("==> Selected silence at start: " + str(startWithSilence_ms) + " ms")
+    print
 
-###############################################################################
+    ###############################################################################
+    doSave = 'y'
+    try:
+        doSave = raw_input("Save parameters as new defaults [Y|n]? ")
+    except:
+        doSave = 'y'
+
+    if (doSave != 'n' and doSave != 'N'):
+        try:
+            f=open(hpConfigFilename + ".py","w")
+            f.write("#!/usr/bin/python"                                          + "\n" +
+                    "defaultSampleRate_Hz       = "   + str(sampleRate_Hz)       + "\n" +
+                    "defaultPulseSpacing_ms     = "   + str(pulseSpacing_ms)     + "\n" +
+                    "defaultPulseDuration_ms    = "   + str(pulseDuration_ms)    + "\n" +
+                    "defaultRiseTime_pc         = "   + str(riseTime_pc)         + "\n" +
+                    "defaultFallTime_pc         = "   + str(fallTime_pc)         + "\n" +
+                    "defaultBaseFrequency1      = "   + str(baseFrequency1)      + "\n" +
+                    "defaultHarmonicStr1        = \"" + str(harmonicsStr1)       + "\"\n" +
+                    "defaultVolumeStr1          = \"" + str(volumesStr1)         + "\"\n" +
+                    "defaultBaseFrequency2      = "   + str(baseFrequency2)      + "\n" +
+                    "defaultHarmonicStr2        = \"" + str(harmonicsStr2)       + "\"\n" +
+                    "defaultVolumeStr2          = \"" + str(volumesStr2)         + "\"\n" +
+                    "defaultHalfBurstSpacing_ms = "   + str(halfBurstSpacing_ms) + "\n" +
+                    "defaultBurstSpacing_ms     = "   + str(burstSpacing_ms)     + "\n" +
+                    "defaultStartWithSilence_ms = "   + str(startWithSilence_ms) + "\n")
+            f.close()
+            print("Configuration saved in " + hpConfigFilename + ".py\n")
+        except:
+            print(hpConfigFilename + ".py locked by other application - please close\n")
+            raw_input()
+
+    config = dict(defaults)
+    config.update({'defaultSampleRate_Hz':       sampleRate_Hz,
+                   'defaultPulseSpacing_ms':     pulseSpacing_ms,
+                   'defaultPulseDuration_ms':    pulseDuration_ms,
+                   'defaultRiseTime_pc':         riseTime_pc,
+                   'defaultFallTime_pc':         fallTime_pc,
+                   'defaultBaseFrequency1':      baseFrequency1,
+                   'defaultHarmonicStr1':        harmonicsStr1,
+                   'defaultVolumeStr1':          volumesStr1,
+                   'defaultBaseFrequency2':      baseFrequency2,
+                   'defaultHarmonicStr2':        harmonicsStr2,
+                   'defaultVolumeStr2':          volumesStr2,
+                   'defaultHalfBurstSpacing_ms': halfBurstSpacing_ms,
+                   'defaultBurstSpacing_ms':     burstSpacing_ms,
+                   'defaultStartWithSilence_ms': startWithSilence_ms})
+    return config
+
+def main():
+    if '--batch' in sys.argv[1:]:
+        parser = argparse.ArgumentParser(description="Generates IEC 60601-1-8 high priority alarms from configuration files without any query.")
+        parser.add_argument('--batch', action='store_true',
+                            help='render the configuration files without any query')
+        parser.add_argument('-o', '--output-dir', default='.',
+                            help='directory of the wav files (default: current directory)')
+        parser.add_argument('configs', nargs='+', metavar='config',
+                            help='configuration file, e.g. example_HP_config.py')
+        args = parser.parse_args()
+        sys.exit(runBatch(args.configs, generate_high_priority, args.output_dir, pulseCacheDirectory))
+
+    defaults = getDefaultConfig()
+    if len(sys.argv) > 1:
+        copyfile(sys.argv[1], hpConfigFilename + '.py')
+    try:
+        defaults.update(loadConfig(hpConfigFilename + '.py'))
+    except:
+        print("No config " + hpConfigFilename + ".py found\n")
 
-print "Setting max gain across burst to " + str(gain)
-  
-# set the volume of the final output here:
-if maxAbs != 0:
-    scale = gain / maxAbs
-else:
-    scale = 0
+    print
+    introduction()
+    print
+    HP_introduction()
+    print
+    print
 
-for i, sample in enumerate(audio):
-    audio[i] = sample * scale
+    config = queryConfig(defaults)
 
-###############################################################################
+    print "\n#############################################\n"
 
-print "Saving wave in " + outputFilePath
+    # the sound file may be locked by a player: retry after closing it
+    while True:
+        try:
+            generate_high_priority(config, outputFilePath, PulseCache(directory=pulseCacheDirectory), verbose=True)
+            break
+        except WavFileLockedError as e:
+            print(str(e) + " - please close\n")
+            raw_input()
 
-save_wav(audio, outputFilePath, sampleRate_Hz)
+    ###########################################################################
 
-###############################################################################
+    if remoteSCPtarget != None:
+        print "Copying " + outputFilePath + " to " + remoteSCPtarget
+        subprocess.check_output(['scp', outputFilePath, remoteSCPtarget])
 
-if remoteSCPtarget != None:
-    print "Copying " + outputFilePath + " to " + remoteSCPtarget
-    subprocess.check_output(['scp', outputFilePath, remoteSCPtarget])
+    print("All Done!")
 
-print("All Done!")
+if __name__ == '__main__':
+    main()
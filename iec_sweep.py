@@ -0,0 +1,138 @@
+"""
+Vectorized IEC 60601-1-8 parameter sweep.
+
+sweep evaluates every IEC 60601-1-8 rule of an IEC_60601_1_8_*_Pulse class
+(pulse duration, pulse spacing, rise time, fall time, burst spacings, base
+frequency, harmonics and their volumes) for all combinations of grids of
+the parameters at once as numpy array operations and returns the
+compliant combinations ranked by an objective.
+
+The rules give the same results as the range checkers of the pulse
+classes and hasEnoughHarmonics/hasSignificantVolumesInsideDbRange of
+wavtools for a single configuration.
+
+NOTE: requires numpy.
+"""
+from __future__ import division
+from wavtools import maxDiffSoundPressureToPulseFrequencyInDB
+import numpy
+
+def _samplesFromMs(ms, sampleRate_Hz):
+    """vectorized Pulse._getSamplesFromMs"""
+    return numpy.trunc(ms * 0.001 * sampleRate_Hz)
+
+def harmonicRules(baseFrequencies_Hz, harmonics, volumes):
+    """
+    Returns two boolean arrays over baseFrequencies_Hz: hasEnoughHarmonics
+    and hasSignificantVolumesInsideDbRange of wavtools for each base
+    frequency
+    """
+    baseFrequencies_Hz = numpy.asarray(baseFrequencies_Hz, dtype=float)
+    harmonics = numpy.array([int(h) for h in harmonics])
+    volumes = numpy.asarray(volumes, dtype=float)
+    if len(harmonics) != len(volumes):
+        raise ValueError('Equal number of harmonics and volumes required')
+    # (base frequencies x harmonics)
+    hFrequencies = harmonics[numpy.newaxis, :] * baseFrequencies_Hz[:, numpy.newaxis]
+    inBand = (300 <= hFrequencies) & (hFrequencies <= 4000)
+    enoughHarmonics = inBand.sum(axis=1) >= 4
+
+    maxSoundPressureDiff = 10.0**(maxDiffSoundPressureToPulseFrequencyInDB/20.0)
+    if len(volumes) > 0:
+        baseVolume = volumes[0]
+        inDbRange = (volumes <= maxSoundPressureDiff * baseVolume) & (maxSoundPressureDiff * volumes >= baseVolume)
+        # the base volume is the reference and not counted
+        inDbRange[0] = False
+    else:
+        inDbRange = numpy.zeros(0, dtype=bool)
+    significantVolumes = (inBand & inDbRange[numpy.newaxis, :]).sum(axis=1) >= 3
+    return enoughHarmonics, significantVolumes
+
+def sweep(pulseClass, sampleRate_Hz,
+          pulseDurations_ms, pulseSpacings_ms, riseTimes_pc, fallTimes_pc, baseFrequencies_Hz,
+          harmonics, volumes,
+          burstSpacings_ms = None, halfBurstSpacings_ms = None,
+          objective = None, maxResults = None,
+          baseFrequency_Hz_min = 150, baseFrequency_Hz_max = 1000):
+    """
+    Evaluates all IEC 60601-1-8 rules of pulseClass (e.g.
+    IEC_60601_1_8_High_Priority_Pulse) for every combination of the
+    given grids (sequences) of pulse durations, pulse spacings, rise and
+    fall times (in % of the pulse duration) and base frequencies at
+    sampleRate_Hz. The harmonics and volumes are the same for all base
+    frequencies. Burst spacings (and half burst spacings for high priority
+    pulses) are swept as well if grids are given.
+    objective(candidates) gets the dictionary of the compliant candidates
+    (see below) and returns one score per candidate; candidates are sorted
+    by ascending score. At most maxResults candidates are returned.
+    Returns a dictionary with arrays (one entry per compliant candidate)
+    'pulseDuration_ms', 'pulseSpacing_ms', 'riseTime_pc', 'fallTime_pc',
+    'baseFrequency_Hz' (, 'burstSpacing_ms', 'halfBurstSpacing_ms'),
+    'score' (if objective is given) and the number of 'evaluated'
+    combinations.
+    """
+    # every parameter gets its own axis; the rules are evaluated on the
+    # axes they depend on and broadcast to the whole grid
+    names = ['pulseDuration_ms', 'pulseSpacing_ms', 'riseTime_pc', 'fallTime_pc', 'baseFrequency_Hz']
+    grids = [pulseDurations_ms, pulseSpacings_ms, riseTimes_pc, fallTimes_pc, baseFrequencies_Hz]
+    if burstSpacings_ms is not None:
+        names.append('burstSpacing_ms')
+        grids.append(burstSpacings_ms)
+    if halfBurstSpacings_ms is not None:
+        names.append('halfBurstSpacing_ms')
+        grids.append(halfBurstSpacings_ms)
+    shape = [len(grid) for grid in grids]
+    axes = {}
+    for axis, (name, grid) in enumerate(zip(names, grids)):
+        axisShape = [1] * len(grids)
+        axisShape[axis] = len(grid)
+        axes[name] = numpy.asarray(grid, dtype=float).reshape(axisShape)
+
+    # the setters of IEC_60601_1_8_Pulse limit the values
+    pulseDuration_ms = numpy.maximum(0, axes['pulseDuration_ms'])
+    pulseSpacing_ms = numpy.maximum(0, axes['pulseSpacing_ms'])
+    riseTime_pc = numpy.clip(axes['riseTime_pc'], 0, 100)
+    fallTime_pc = numpy.clip(axes['fallTime_pc'], 0, 100)
+    baseFrequency_Hz = axes['baseFrequency_Hz']
+
+    compliant = numpy.ones(shape, dtype=bool)
+    # isPulseDurationInRange
+    compliant &= (pulseDuration_ms >= pulseClass.pulseDuration_ms_min) & (pulseDuration_ms <= pulseClass.pulseDuration_ms_max)
+    # isPulseSpacingInRange
+    compliant &= (pulseSpacing_ms >= pulseClass.pulse_90pc_spacing_ms_min) & (pulseSpacing_ms <= pulseClass.pulse_90pc_spacing_ms_max)
+    # isRiseTimeInRange
+    compliant &= (riseTime_pc >= pulseClass.riseTime_pc_min) & (riseTime_pc <= pulseClass.riseTime_pc_max)
+    # isFallTimeInRange: rise and fall samples must fit into the spacing
+    pulseDuration_samples = _samplesFromMs(pulseDuration_ms, sampleRate_Hz)
+    riseTime_samples = numpy.trunc(riseTime_pc/100.0 * pulseDuration_samples)
+    fallTime_samples = numpy.trunc(fallTime_pc/100.0 * pulseDuration_samples)
+    compliant &= riseTime_samples + fallTime_samples <= _samplesFromMs(pulseSpacing_ms, sampleRate_Hz)
+    # IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
+    compliant &= (baseFrequency_Hz >= baseFrequency_Hz_min) & (baseFrequency_Hz <= baseFrequency_Hz_max)
+    # hasEnoughHarmonics and hasSignificantVolumesInsideDbRange
+    enoughHarmonics, significantVolumes = harmonicRules(numpy.ravel(baseFrequency_Hz), harmonics, volumes)
+    compliant &= (enoughHarmonics & significantVolumes).reshape(baseFrequency_Hz.shape)
+    # isBurstSpacingInRange (low priority pulses have no maximum)
+    if 'burstSpacing_ms' in axes:
+        burstSpacing_ms = numpy.maximum(0, axes['burstSpacing_ms'])
+        compliant &= burstSpacing_ms >= pulseClass.burstSpacing_ms_min
+        if hasattr(pulseClass, 'burstSpacing_ms_max'):
+            compliant &= burstSpacing_ms <= pulseClass.burstSpacing_ms_max
+    # isHalfBurstSpacingInRange
+    if 'halfBurstSpacing_ms' in axes:
+        halfBurstSpacing_ms = numpy.maximum(0, axes['halfBurstSpacing_ms'])
+        compliant &= (halfBurstSpacing_ms >= pulseClass.halfBurstSpacing_ms_min) & (halfBurstSpacing_ms <= pulseClass.halfBurstSpacing_ms_max)
+
+    indices = numpy.unravel_index(numpy.flatnonzero(compliant), shape)
+    candidates = {}
+    for axis, (name, grid) in enumerate(zip(names, grids)):
+        candidates[name] = numpy.asarray(grid, dtype=float)[indices[axis]]
+    if objective is not None:
+        score = numpy.asarray(objective(candidates), dtype=float)
+        order = numpy.argsort(score, kind='mergesort')
+        candidates = dict((name, values[order]) for name, values in candidates.items())
+        candidates['score'] = score[order]
+    if maxResults is not None:
+        candidates = dict((name, values[:maxResults]) for name, values in candidates.items())
+    candidates['evaluated'] = compliant.size
+    return candidates
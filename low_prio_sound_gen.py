@@ -5,29 +5,72 @@ from wavtools import getVolumes
 from wavtools import volumesOutOfDbRange
 from wavtools import hasEnoughHarmonics
 from wavtools import hasSignificantVolumesInsideDbRange
+from wavtools import prepareHarmonics
 from wavtools import getMax
-from wavtools import save_wav
+from wavtools import compileTimeline
+from wavtools import save_wav_plan
+from wavtools import WavFileLockedError
+from wavtools import scaleSamplesQ15
+from wavtools import normalize
+from wavtools import getFixedPointWarnings
+from wavtools import PulseCache
+from wavtools import loadConfig
+from wavtools import runBatch
 from wavtools import IEC_60601_1_8_Pulse
-from wavtools import PulseMerger
 from wavtools import introduction
 from wavtools import maxDiffSoundPressureToPulseFrequencyInDB
 from shutil   import copyfile
 import subprocess
+import argparse
 import os
 import sys
 
 # specify, where you want to save the file and its filename:
 #outputFilePath = os.environ['HOME'] + "/Downloads/sounds/low-prio-new.wav"
 outputFilePath = "new-lp.wav"
-# name where a new configuration is saved:
-# IMPORTANT NOTE: name must be the same as in the (next) import statement
-#                 below around line 122
+# name where a new configuration is saved (it is read as defaults on the
+# next run):
 lpConfigFilename = 'lp_alarm'
 # if you want to also remote copy it to a device via scp, specify
 # the remote target here in the form of a scp target, e.g.
 # someuser@host:path. See scp for more details. If you set
 # the remote to None, no attempt for scp is made.
 remoteSCPtarget = None
+# if you want to keep rendered pulses across runs (e.g. when generating many
+# alarm variants with equal pulses), specify a directory for the pulse cache
+# here. If you set it to None, pulses are only reused within one run.
+pulseCacheDirectory = None
+# if you want to synthesize the pulses at one (master) sample rate and
+# resample them to the requested sample rate, specify the master sample
+# rate here. Resampling is slower than synthesizing at the requested
+# sample rate and removes (or attenuates by up to 6dB) the harmonics above
+# 95% (86.5%) of the lower Nyquist frequency (see wavtools.resample). If
+# you set it to None, pulses are synthesized at the requested sample rate.
+masterSampleRate_Hz = None
+# the synthesis backend of the pulses, e.g. 'numpy' or 'pure' (see
+# wavtools.getSynthesisBackends). If you set it to None, the fastest
+# backend is selected automatically.
+synthesisBackend = None
+# if you want the pulses synthesized, mixed and scaled in Q15 fixed point
+# (int16/int32 with saturation like a firmware mixer, see
+# wavtools.Pulse.createHarmonicWaveQ15), set fixedPoint to True. The
+# masterSampleRate_Hz, synthesisBackend and pulseCacheDirectory are ignored
+# (with a warning) then.
+fixedPoint = False
+# harmonics at or above the Nyquist frequency (half the sample rate) less
+# this guard band (in % of the Nyquist frequency) are not synthesized as
+# they would alias back into the audible band. If you set it to None, all
+# harmonics are synthesized.
+nyquistGuardBand_pc = 0
+# if you want to skip the synthesis of harmonics which are inaudible in the
+# output, specify the floor in dBFS here (or 'lsb' for 1 LSB of the 16 bit
+# samples after the gain). If you set it to None, all harmonics are
+# synthesized.
+pruneFloor_dBFS = None
+# the numpy dtype of the synthesized pulses: 'float64' or
+# 'float32' (half the memory, max. 1 LSB deviation of the int16 samples,
+# see wavtools.Pulse.setDtype). Ignored in fixed point and without numpy.
+sampleDtype = 'float64'
 
 
 # NOTE: you will see several sections of settings the later overwriting the
@@ -64,6 +107,14 @@ defaultBurstSpacing_ms = 25000
 #       it merged the files.
 # gain in (0.0; 1.0]
 gain = 0.98
+# normalization of the output: 'peak' scales the peak of the loudest pulse
+# to the gain; 'rms' and 'aweighted' scale the RMS or A-weighted RMS level
+# of the loudest pulse to targetLevel_dBFS (e.g. for alarms of equal
+# loudness), with the peak limited to the gain. The 10dB difference
+# between any two pulses is checked with the RMS levels ('aweighted':
+# with the A-weighted levels).
+normalization = 'peak'
+targetLevel_dBFS = -20
 
 ###############################################################################
 # Some devices may require a small silence period at the start of a HP alarm
@@ -76,29 +127,6 @@ defaultStartWithSilence_ms = 0
 ###############################################################################
 ###############################################################################
 
-if len(sys.argv) > 1:
-    copyfile(sys.argv[1], 'lp_alarm.py')
-# NOTE: this import must come after all initialization
-#       By the way Python is made lp_alarm must be located in the directory in
-#       which THIS script (low_prio_sound_gen.py) resides.
-try:
-    from lp_alarm import defaultSampleRate_Hz
-    from lp_alarm import defaultPulseSpacing_ms
-    from lp_alarm import defaultPulseDuration_ms
-    from lp_alarm import defaultRiseTime_pc
-    from lp_alarm import defaultFallTime_pc
-    from lp_alarm import defaultBaseFrequency1
-    from lp_alarm import defaultHarmonicStr1
-    from lp_alarm import defaultVolumeStr1
-    from lp_alarm import defaultBaseFrequency2
-    from lp_alarm import defaultHarmonicStr2
-    from lp_alarm import defaultVolumeStr2
-    from lp_alarm import defaultBurstSpacing_ms
-    from lp_alarm import defaultStartWithSilence_ms
-except:
-    print("No config " + lpConfigFilename + ".py found\n")
-    pass
-
 
 def LP_introduction():
     print "Terminology - Low Priority Alarm:"
@@ -152,369 +180,589 @@ class IEC_60601_1_8_Low_Priority_Pulse(IEC_60601_1_8_Pulse):
     def isBurstSpacingInRange(self):
         return self._burstSpacing_ms >= self.burstSpacing_ms_min
 
+def lowPriorityTimeline(pulse, startWithSilence_ms = 0, hasPulse2 = True):
+    """
+    Timeline (see wavtools.compileTimeline) of a low priority burst of
+    pulse: the silence at start, pulse 'p1', (if hasPulse2) the pulse
+    spacing and pulse 'p2' and the burst spacing
+    """
+    timeline = [('silence', startWithSilence_ms),
+                ('pulse',   'p1')]
+    if hasPulse2:
+        timeline += [('spacing', None),
+                     ('pulse',   'p2')]
+    return timeline + [('spacing', pulse.getBurstSpacing_ms())]
+
 ###############################################################################
 ###############################################################################
 ###############################################################################
 
-print
-introduction()
-print
-LP_introduction()
-print
-print
-
-sampleRate_Hz = defaultSampleRate_Hz
-try:
-    select = input("Sample rate\n  0) 8kHz\n  1) 9.6kHz\n  2) 12kHz\n  3) 16kHz\n  4) 19.2kHz\n  5) 24kHz\n  6) 32kHz\n  7) 44.1kHz\n  8) 48kHz\n  9) 96kHz\nSelect [0; 9] (default: " + str(defaultSampleRate_Hz) + "): ")
-    if select == 0:
-        sampleRate_Hz = 8000
-    if select == 1:
-        sampleRate_Hz = 9600
-    if select == 2:
-        sampleRate_Hz = 12000
-    if select == 3:
-        sampleRate_Hz = 16000
-    if select == 4:
-        sampleRate_Hz = 19200
-    if select == 5:
-        sampleRate_Hz = 24000
-    if select == 6:
-        sampleRate_Hz = 32000
-    if select == 7:
-        sampleRate_Hz = 44100
-    if select == 8:
-        sampleRate_Hz = 48000
-    if select == 9:
-        sampleRate_Hz = 96000
-except:
-    pass
-        
-print("==> Selected sample rate: " + str(sampleRate_Hz) + " Hz\n")
-
-pulse = IEC_60601_1_8_Low_Priority_Pulse()
-pulse.setSampleRate_Hz(sampleRate_Hz)
+def getDefaultConfig():
+    """
+    Returns the default settings of this script as configuration, i.e. as
+    dictionary with the names used in the configuration files (see
+    example_LP_config.py) plus the gain, the normalization,
+    targetLevel_dBFS, the masterSampleRate_Hz, the synthesisBackend,
+    fixedPoint, nyquistGuardBand_pc, pruneFloor_dBFS and sampleDtype
+    """
+    return {'defaultSampleRate_Hz':       defaultSampleRate_Hz,
+            'defaultPulseSpacing_ms':     defaultPulseSpacing_ms,
+            'defaultPulseDuration_ms':    defaultPulseDuration_ms,
+            'defaultRiseTime_pc':         defaultRiseTime_pc,
+            'defaultFallTime_pc':         defaultFallTime_pc,
+            'defaultBaseFrequency1':      defaultBaseFrequency1,
+            'defaultHarmonicStr1':        defaultHarmonicStr1,
+            'defaultVolumeStr1':          defaultVolumeStr1,
+            'defaultBaseFrequency2':      defaultBaseFrequency2,
+            'defaultHarmonicStr2':        defaultHarmonicStr2,
+            'defaultVolumeStr2':          defaultVolumeStr2,
+            'defaultBurstSpacing_ms':     defaultBurstSpacing_ms,
+            'defaultStartWithSilence_ms': defaultStartWithSilence_ms,
+            'gain':                       gain,
+            'normalization':              normalization,
+            'targetLevel_dBFS':           targetLevel_dBFS,
+            'masterSampleRate_Hz':        masterSampleRate_Hz,
+            'synthesisBackend':           synthesisBackend,
+            'fixedPoint':                 fixedPoint,
+            'nyquistGuardBand_pc':        nyquistGuardBand_pc,
+            'pruneFloor_dBFS':            pruneFloor_dBFS,
+            'sampleDtype':                sampleDtype}
+
+def generate_low_priority(config, wavFilePath = None, pulseCache = None, verbose = False):
+    """
+    Generates the low priority alarm of config without any query and saves
+    it in wavFilePath (default: outputFilePath of this script).
+    config is a dictionary with (some of) the settings of a configuration
+    file, e.g. loadConfig('example_LP_config.py'); missing settings are
+    taken from getDefaultConfig(). A 2nd pulse is only created if it has
+    a base frequency > 0, harmonics and volumes.
+    Pulses are taken from pulseCache if given (see PulseCache).
+    Returns a dictionary with the 'outputFilePath', the 'sampleRate_Hz',
+    the 'warnings' (list of IEC 60601-1-8 violations), the
+    'prunedHarmonics' (by pulse, see pruneFloor_dBFS) and the
+    'levels_dBFS' ('rms' and 'aweighted' by pulse) of the output.
+    """
+    settings = getDefaultConfig()
+    settings.update(config)
+    if wavFilePath is None:
+        wavFilePath = outputFilePath
+    if pulseCache is None:
+        pulseCache = PulseCache()
+    warnings = []
+
+    def report(text):
+        if verbose:
+            print text
+
+    sampleRate_Hz = settings['defaultSampleRate_Hz']
+    pulse = IEC_60601_1_8_Low_Priority_Pulse()
+    pulse.setSampleRate_Hz(sampleRate_Hz)
+    pulse.setDtype(settings['sampleDtype'])
+    pulse.setPulseSpacing_ms(settings['defaultPulseSpacing_ms'])
+    if (not pulse.isPulseSpacingInRange()):
+        warnings.append("pulse spacing out of range")
+    pulseDuration_ms = settings['defaultPulseDuration_ms']
+    pulse.setPulseDuration_ms(pulseDuration_ms)
+    if (not pulse.isPulseDurationInRange()):
+        warnings.append("pulse duration out of range")
+    pulse.setRiseTime_pc(settings['defaultRiseTime_pc'])
+    if (not pulse.isRiseTimeInRange()):
+        warnings.append("rise time out of range")
+    pulse.setFallTime_pc(settings['defaultFallTime_pc'])
+    if (not pulse.isFallTimeInRange()):
+        warnings.append("fall time out of range")
+    pulse.setBurstSpacing_ms(settings['defaultBurstSpacing_ms'])
+    if (not pulse.isBurstSpacingInRange()):
+        warnings.append("burst spacing out of range")
+    startWithSilence_ms = max(0, settings['defaultStartWithSilence_ms'])
+
+    baseFrequency1 = settings['defaultBaseFrequency1']
+    baseFrequency2 = settings['defaultBaseFrequency2']
+    harmonics1 = str(settings['defaultHarmonicStr1']).split()
+    harmonics2 = str(settings['defaultHarmonicStr2']).split()
+    volumes1 = getVolumes(str(settings['defaultVolumeStr1']))
+    volumes2 = getVolumes(str(settings['defaultVolumeStr2']))
+    hasPulse2 = len(harmonics2) != 0 and len(volumes2) != 0 and baseFrequency2 > 0 and pulseDuration_ms > 0
+    if not hasPulse2:
+        volumes2 = []
+    pulses = [("1st", baseFrequency1, harmonics1, volumes1)]
+    if hasPulse2:
+        pulses.append(("2nd", baseFrequency2, harmonics2, volumes2))
+    dBvalue=str(maxDiffSoundPressureToPulseFrequencyInDB)
+    for name, baseFrequency, harmonics, volumes in pulses:
+        if len(volumes) != len(harmonics):
+            raise ValueError(str(len(harmonics)) + " volumes required for the harmonics of the " + name + " pulse")
+        # IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
+        if (baseFrequency_Hz_min > baseFrequency or baseFrequency > baseFrequency_Hz_max):
+            warnings.append("pulse frequency f_0 of " + name + " pulse out of range [150Hz, 1000Hz]")
+        if (not hasEnoughHarmonics(baseFrequency, harmonics)):
+            warnings.append("less than required number of harmonics in range [300Hz, 4000Hz] in " + name + " pulse")
+        if (not hasSignificantVolumesInsideDbRange(volumes, baseFrequency, harmonics)):
+            warnings.append("less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume in " + name + " pulse")
+
+    # skip the harmonics which cannot be represented at the sample rate
+    # and the ones which are inaudible after scaling and quantization
+    # before any samples are computed
+    pulses, harmonicWarnings, prunedHarmonics = prepareHarmonics(pulses, sampleRate_Hz, settings)
+    harmonics1, volumes1 = pulses[0][2:]
+    if hasPulse2:
+        harmonics2, volumes2 = pulses[1][2:]
+    for warning in harmonicWarnings:
+        warnings.append(warning)
+        report("*** WARNING: " + warning)
+    for name, removedHarmonics in sorted(prunedHarmonics.items()):
+        report("Pruned harmonics of " + name + " pulse below " + str(settings['pruneFloor_dBFS']) + " dBFS: " + (" ".join(removedHarmonics) or "none"))
+    for warning in getFixedPointWarnings(settings, pulseCache):
+        warnings.append(warning)
+        report("*** WARNING: " + warning)
+
+    ###########################################################################
+
+    report("\nDetermine max volume across all pulses")
+    maxVol1 = getMax(volumes1)
+    maxVol2 = getMax(volumes2)
+    maxVol  = max(maxVol1, maxVol2)    
+
+    if maxVol == 0:
+        raise ValueError('volumes of all harmonics in pulses cannot be all 0')
+
+    ###########################################################################
+
+    # create array of integer volumes and normalize volume across all volChar1+2
+    report("Normalizing volumes across pulses")
+
+    # it is maxVol != 0
+    for i, vol in enumerate(volumes1):
+        volumes1[i] = vol / maxVol
+    for i, vol in enumerate(volumes2):
+        volumes2[i] = vol / maxVol
+
+    ###########################################################################
+
+    # p1Array/p2Array are the pulses with all harmonics merged
+    # (equal pulses are synthesized only once, see PulseCache; in fixed point
+    # the pulses are Q15 integers)
+    report("Creating wave and harmonics for pulse 1")
+    if settings['fixedPoint']:
+        p1Array, maxAbs1 = pulse.createHarmonicWaveQ15(baseFrequency1, harmonics1, volumes1)
+    else:
+        p1Array, maxAbs1 = pulseCache.createHarmonicWave(pulse, baseFrequency1, harmonics1, volumes1, settings['masterSampleRate_Hz'], settings['synthesisBackend'])
+
+    if hasPulse2:
+        report("Creating wave and harmonics for pulse 2")
+        if settings['fixedPoint']:
+            p2Array, maxAbs2 = pulse.createHarmonicWaveQ15(baseFrequency2, harmonics2, volumes2)
+        else:
+            p2Array, maxAbs2 = pulseCache.createHarmonicWave(pulse, baseFrequency2, harmonics2, volumes2, settings['masterSampleRate_Hz'], settings['synthesisBackend'])
+    else:
+        maxAbs2 = 0
+
+    maxAbs = max(maxAbs1, maxAbs2)
+    # maxAbs != 0 since maxVol != 0
+
+    ###########################################################################
+
+    report("Normalizing (" + settings['normalization'] + ") with max gain across burst of " + str(settings['gain']))
+
+    # set the volume of the final output here: the peak of the loudest pulse
+    # becomes the gain ('peak') or the level of the loudest pulse becomes
+    # targetLevel_dBFS with the peak limited to the gain ('rms', 'aweighted').
+    # The levels are computed from the synthesis parameters, i.e. without a
+    # pass over the samples. In fixed point maxAbs is in Q15.
+    synthesized = [("1st", baseFrequency1, harmonics1, volumes1)]
+    if hasPulse2:
+        synthesized.append(("2nd", baseFrequency2, harmonics2, volumes2))
+    peak, levels_dBFS, levelWarnings = normalize(pulse, synthesized, maxAbs, settings)
+    for name in sorted(levels_dBFS):
+        report("Level of " + name + " pulse: %.1f dBFS RMS, %.1f dBFS(A)" % (levels_dBFS[name]['rms'], levels_dBFS[name]['aweighted']))
+    for warning in levelWarnings:
+        warnings.append(warning)
+        report("*** WARNING: " + warning + "\n")
+    if maxAbs != 0:
+        scale = peak / maxAbs
+    else:
+        scale = 0
+
+    # only the pulses need scaling, the silences are 0. The floating point
+    # pulses are scaled, converted to 16 bit and quantized in one pass when
+    # they are written (see RenderPlan.segments).
+    if settings['fixedPoint']:
+        # int16 samples which are written as they are
+        scale = 1.0
+        p1Array = scaleSamplesQ15(p1Array, peak, maxAbs)
+        if hasPulse2:
+            p2Array = scaleSamplesQ15(p2Array, peak, maxAbs)
+
+    ###########################################################################
+
+    report("Merging harmonics and creating final burst with 2 pulses")
+    # the burst is compiled from its timeline into a render plan with the
+    # sample offset of every pulse; each pulse is converted once and written
+    # at each of its offsets, the silences are written as zeroed blocks.
+
+    report("Pulse 1:\t" + str(pulse.getPulseDuration_ms()) + "ms")
+    if hasPulse2:
+        # IEC 60601-1-8 page 17 - silence btw Pulse 1 and 2: y = 125ms to 250ms
+        # y is here called pulse_90pc_spacing_ms (see also wavetools.py)
+        report("Silence 1:\t" + str(pulse.getPulseSpacing_ms()) + "ms")
+        report("Pulse 2:\t" + str(pulse.getPulseDuration_ms()) + "ms")
+    # IEC 60601-1-8 page 17 - silence btw two bursts: > 15.0 seconds
+    # here called burstSpacing_ms
+    report("Silence 2:\t" + str(pulse.getBurstSpacing_ms()) + "ms")
+
+    plan = compileTimeline(lowPriorityTimeline(pulse, startWithSilence_ms, hasPulse2), pulse)
+    pulses = {'p1': p1Array}
+    if hasPulse2:
+        pulses['p2'] = p2Array
+
+    ###########################################################################
+
+    report("Saving wave in " + wavFilePath)
+
+    save_wav_plan(plan, pulses, wavFilePath, sampleRate_Hz, scale=scale)
+
+    return {'outputFilePath':             wavFilePath,
+            'sampleRate_Hz':              sampleRate_Hz,
+            'warnings':                   warnings,
+            'prunedHarmonics':            prunedHarmonics,
+            'levels_dBFS':                levels_dBFS}
 
 ###############################################################################
+###############################################################################
+###############################################################################
 
-try:
-    pulseSpacing_ms = input("Pulse spacing [" + str(pulse.pulse_90pc_spacing_ms_min) +  "ms; " + str(pulse.pulse_90pc_spacing_ms_max) + "ms] (default: " + str(defaultPulseSpacing_ms) + "ms): ")
-except:
-    pulseSpacing_ms = defaultPulseSpacing_ms
+def queryConfig(defaults):
+    """
+    Queries all parameters (proposing the settings of defaults) and returns
+    them as configuration (see getDefaultConfig); the settings of defaults
+    which are not queried (e.g. the gain) are kept. Optionally saves them as
+    new defaults in lpConfigFilename.py.
+    """
+    defaultSampleRate_Hz       = defaults['defaultSampleRate_Hz']
+    defaultPulseSpacing_ms     = defaults['defaultPulseSpacing_ms']
+    defaultPulseDuration_ms    = defaults['defaultPulseDuration_ms']
+    defaultRiseTime_pc         = defaults['defaultRiseTime_pc']
+    defaultFallTime_pc         = defaults['defaultFallTime_pc']
+    defaultBaseFrequency1      = defaults['defaultBaseFrequency1']
+    defaultHarmonicStr1        = defaults['defaultHarmonicStr1']
+    defaultVolumeStr1          = defaults['defaultVolumeStr1']
+    defaultBaseFrequency2      = defaults['defaultBaseFrequency2']
+    defaultHarmonicStr2        = defaults['defaultHarmonicStr2']
+    defaultVolumeStr2          = defaults['defaultVolumeStr2']
+    defaultBurstSpacing_ms     = defaults['defaultBurstSpacing_ms']
+    defaultStartWithSilence_ms = defaults['defaultStartWithSilence_ms']
+
+    sampleRate_Hz = defaultSampleRate_Hz
+    try:
+        select = input("Sample rate\n  0) 8kHz\n  1) 9.6kHz\n  2) 12kHz\n  3) 16kHz\n  4) 19.2kHz\n  5) 24kHz\n  6) 32kHz\n  7) 44.1kHz\n  8) 48kHz\n  9) 96kHz\nSelect [0; 9] (default: " + str(defaultSampleRate_Hz) + "): ")
+        if select == 0:
+            sampleRate_Hz = 8000
+        if select == 1:
+            sampleRate_Hz = 9600
+        if select == 2:
+            sampleRate_Hz = 12000
+        if select == 3:
+            sampleRate_Hz = 16000
+        if select == 4:
+            sampleRate_Hz = 19200
+        if select == 5:
+            sampleRate_Hz = 24000
+        if select == 6:
+            sampleRate_Hz = 32000
+        if select == 7:
+            sampleRate_Hz = 44100
+        if select == 8:
+            sampleRate_Hz = 48000
+        if select == 9:
+            sampleRate_Hz = 96000
+    except:
+        pass
 
-print("==> Selected pulse spacing: " + str(pulse.setPulseSpacing_ms(pulseSpacing_ms)) + " ms")
-if (not pulse.isPulseSpacingInRange()):
-    print("*** WARNING: pulse spacing out of range")
-print
+    print("==> Selected sample rate: " + str(sampleRate_Hz) + " Hz\n")
 
-###############################################################################
+    pulse = IEC_60601_1_8_Low_Priority_Pulse()
+    pulse.setSampleRate_Hz(sampleRate_Hz)
 
-try:
-    pulseDuration_ms = input("Pulse duration [" + str(pulse.pulseDuration_ms_min) +  "ms; " + str(pulse.pulseDuration_ms_max) + "ms] (default: " + str(defaultPulseDuration_ms) + "ms): ")
-except:
-    pulseDuration_ms = defaultPulseDuration_ms
+    ###############################################################################
 
-print("==> Selected pulse duration: " + str(pulse.setPulseDuration_ms(pulseDuration_ms)) + " ms")
-if (not pulse.isPulseDurationInRange()):
-    print("*** WARNING: pulse duration out of range")
-print
- 
-###############################################################################
+    try:
+        pulseSpacing_ms = input("Pulse spacing [" + str(pulse.pulse_90pc_spacing_ms_min) +  "ms; " + str(pulse.pulse_90pc_spacing_ms_max) + "ms] (default: " + str(defaultPulseSpacing_ms) + "ms): ")
+    except:
+        pulseSpacing_ms = defaultPulseSpacing_ms
 
-try:
-    riseTime_pc = input("Rise time [" + str(pulse.riseTime_pc_min) +  "%; " + str(pulse.riseTime_pc_max) + "%] (default: " + str(defaultRiseTime_pc) + "%): ")
-except:
-    riseTime_pc = defaultRiseTime_pc  # 100 * (11 / 125) = 8.8% measures with Audaciy
+    print("==> Selected pulse spacing: " + str(pulse.setPulseSpacing_ms(pulseSpacing_ms)) + " ms")
+    if (not pulse.isPulseSpacingInRange()):
+        print("*** WARNING: pulse spacing out of range")
+    print
 
-print("==> Selected rise time: " + str(pulse.setRiseTime_pc(riseTime_pc)) + " %")
-if (not pulse.isRiseTimeInRange()):
-    print("*** WARNING: rise time out of range")
-print
+    ###############################################################################
 
-###############################################################################
+    try:
+        pulseDuration_ms = input("Pulse duration [" + str(pulse.pulseDuration_ms_min) +  "ms; " + str(pulse.pulseDuration_ms_max) + "ms] (default: " + str(defaultPulseDuration_ms) + "ms): ")
+    except:
+        pulseDuration_ms = defaultPulseDuration_ms
 
-try:
-    fallTime_pc = input("Fall time [0%; 100%] (default: " + str(defaultFallTime_pc) + "%): ")
-except:
-    fallTime_pc = defaultFallTime_pc
+    print("==> Selected pulse duration: " + str(pulse.setPulseDuration_ms(pulseDuration_ms)) + " ms")
+    if (not pulse.isPulseDurationInRange()):
+        print("*** WARNING: pulse duration out of range")
+    print
 
-print("==> Selected fall time: " + str(pulse.setFallTime_pc(fallTime_pc)) + " %")
-if (not pulse.isFallTimeInRange()):
-    print("*** WARNING: fall time out of range")
-print
+    ###############################################################################
 
-###############################################################################
+    try:
+        riseTime_pc = input("Rise time [" + str(pulse.riseTime_pc_min) +  "%; " + str(pulse.riseTime_pc_max) + "%] (default: " + str(defaultRiseTime_pc) + "%): ")
+    except:
+        riseTime_pc = defaultRiseTime_pc  # 100 * (11 / 125) = 8.8% measures with Audaciy
 
-try:
-    baseFrequency1 = input("Base frequency of 1st pulse [" + str(baseFrequency_Hz_min) + "Hz; " + str(baseFrequency_Hz_max) + "Hz] (default: " + str(defaultBaseFrequency1) + "Hz): ")
-except:
-    baseFrequency1 = defaultBaseFrequency1 
-  
-print("==> Selected base frequency of 1st pulse: " + str(baseFrequency1))
-# IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
-if (baseFrequency_Hz_min > baseFrequency1 or baseFrequency1 > baseFrequency_Hz_max):
-    print("*** WARNING: pulse frequency f_0 out of range")
-print
-
-# to keep this code simple we leave this task to the user: first harmonic is 1 and harmonics
-# are sorted ascending.
-print("IMPORTANT NOTE: the first harmonic must be 1 and the harmonics must be in ascending order!!!")
-harmonicsStr1 = raw_input("Harmonics [positive integer] (default: " + defaultHarmonicStr1 + "): ")
-if len(harmonicsStr1) == 0:
-    harmonicsStr1 = defaultHarmonicStr1
- 
-print("==> Selected harmonics of 1st pulse: " + harmonicsStr1)
-   
-harmonics1 = harmonicsStr1.split()
-noHarmonics = len(harmonics1)
-
-# hasEnoughHarmonics ensures the correct format of harmonics. Hence call before
-# working on harmonics
-if (not hasEnoughHarmonics(baseFrequency1, harmonics1)):
-    print("*** WARNING: less than required number of harmonics in range [300Hz, 4000Hz]")
-print
+    print("==> Selected rise time: " + str(pulse.setRiseTime_pc(riseTime_pc)) + " %")
+    if (not pulse.isRiseTimeInRange()):
+        print("*** WARNING: rise time out of range")
+    print
 
-###############################################################################
+    ###############################################################################
 
-volumes1 = []
-while len(volumes1) != noHarmonics:
-    volumesStr1 = raw_input(str(noHarmonics) + " Volumes (default: " + defaultVolumeStr1 + "): ")
-    if len(volumesStr1) == 0:
-        volumesStr1 = defaultVolumeStr1
-    volumes1 = getVolumes(volumesStr1)
-
-print("==> Selected volumes of 1st pulse: " + volumesStr1)
-
-dBvalue=str(maxDiffSoundPressureToPulseFrequencyInDB)
-if (not hasSignificantVolumesInsideDbRange(volumes1, baseFrequency1, harmonics1)):
-    print("*** WARNING: less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume")
-    print("            "),
-    vOODbR = volumesOutOfDbRange(volumes1)
-    print("             The following volumes differ more than " + dBvalue + "dB from base frequency's volume:")
-    for v in vOODbR:
-        print(str(v) + ", "),
-print
-    
-###############################################################################
+    try:
+        fallTime_pc = input("Fall time [0%; 100%] (default: " + str(defaultFallTime_pc) + "%): ")
+    except:
+        fallTime_pc = defaultFallTime_pc
+
+    print("==> Selected fall time: " + str(pulse.setFallTime_pc(fallTime_pc)) + " %")
+    if (not pulse.isFallTimeInRange()):
+        print("*** WARNING: fall time out of range")
+    print
+
+    ###############################################################################
+
+    try:
+        baseFrequency1 = input("Base frequency of 1st pulse [" + str(baseFrequency_Hz_min) + "Hz; " + str(baseFrequency_Hz_max) + "Hz] (default: " + str(defaultBaseFrequency1) + "Hz): ")
+    except:
+        baseFrequency1 = defaultBaseFrequency1 
+
+    print("==> Selected base frequency of 1st pulse: " + str(baseFrequency1))
+    # IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
+    if (baseFrequency_Hz_min > baseFrequency1 or baseFrequency1 > baseFrequency_Hz_max):
+        print("*** WARNING: pulse frequency f_0 out of range")
+    print
 
-try:
-    print("NOTE: if you wish to create a low priority alarm with 1 pulse enter frequency 0 here!")
-    baseFrequency2 = input("Base frequency of 2nd pulse [" + str(baseFrequency_Hz_min) + "Hz; " + str(baseFrequency_Hz_max) + "Hz] (default: " + str(defaultBaseFrequency2) + "Hz): ")
-except:
-    baseFrequency2 = defaultBaseFrequency2
-
-print("==> Selected base frequency of 2nd pulse: " + str(baseFrequency2))
-# IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
-if baseFrequency2 == 0:
-    print("NOTE: Second pulse disabled!")
-else:
-    if (baseFrequency_Hz_min > baseFrequency2 or baseFrequency2 > baseFrequency_Hz_max):
-        print("*** WARNING: pulse frequency f_0 out of range [150Hz, 1000Hz]")
-print
-
-harmonics2 = []
-volumes2 = []
-
-if baseFrequency2 != 0:
-    # to keep this code simple we leave this task to the user: 
-    # first harmonic is 1 and harmonics are sorted ascending.
+    # to keep this code simple we leave this task to the user: first harmonic is 1 and harmonics
+    # are sorted ascending.
     print("IMPORTANT NOTE: the first harmonic must be 1 and the harmonics must be in ascending order!!!")
-    while len(harmonics2) != noHarmonics:
-        harmonicsStr2 = raw_input(str(noHarmonics) + " Harmonics [positive integer] (default: " + harmonicsStr1 + "): ")
-        if len(harmonicsStr2) == 0:
-            harmonicsStr2 = harmonicsStr1 
-            harmonics2 = harmonicsStr2.split()
-            noHarmonics = len(harmonics2)
-
-    print("==> Selected harmonics of 2nd pulse: " + harmonicsStr2)
-   
-    # hasEnoughHarmonics ensures the correct format of harmonics. 
-    # Hence call before working on harmonics
-    if (not hasEnoughHarmonics(baseFrequency2, harmonics2)):
+    harmonicsStr1 = raw_input("Harmonics [positive integer] (default: " + defaultHarmonicStr1 + "): ")
+    if len(harmonicsStr1) == 0:
+        harmonicsStr1 = defaultHarmonicStr1
+
+    print("==> Selected harmonics of 1st pulse: " + harmonicsStr1)
+
+    harmonics1 = harmonicsStr1.split()
+    noHarmonics = len(harmonics1)
+
+    # hasEnoughHarmonics ensures the correct format of harmonics. Hence call before
+    # working on harmonics
+    if (not hasEnoughHarmonics(baseFrequency1, harmonics1)):
         print("*** WARNING: less than required number of harmonics in range [300Hz, 4000Hz]")
     print
 
     ###############################################################################
 
-    while len(volumes2) != noHarmonics:
-        volumesStr2 = raw_input(str(noHarmonics) + " Volumes (default: " + volumesStr1 + "): ")
-        if len(volumesStr2) == 0:
-            volumesStr2 = volumesStr1
-        volumes2 = getVolumes(volumesStr2)
+    volumes1 = []
+    while len(volumes1) != noHarmonics:
+        volumesStr1 = raw_input(str(noHarmonics) + " Volumes (default: " + defaultVolumeStr1 + "): ")
+        if len(volumesStr1) == 0:
+            volumesStr1 = defaultVolumeStr1
+        volumes1 = getVolumes(volumesStr1)
 
-    print("==> Selected volumes of 2nd pulse: " + volumesStr2)
+    print("==> Selected volumes of 1st pulse: " + volumesStr1)
 
     dBvalue=str(maxDiffSoundPressureToPulseFrequencyInDB)
-    if (not hasSignificantVolumesInsideDbRange(volumes2, baseFrequency2, harmonics2)):
+    if (not hasSignificantVolumesInsideDbRange(volumes1, baseFrequency1, harmonics1)):
         print("*** WARNING: less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume")
         print("            "),
-        vOODbR = volumesOutOfDbRange(volumes2)
+        vOODbR = volumesOutOfDbRange(volumes1)
         print("             The following volumes differ more than " + dBvalue + "dB from base frequency's volume:")
         for v in vOODbR:
             print(str(v) + ", "),
     print
 
-else:
-    harmonicsStr2 = ''
-    volumesStr2   = '' 
-    
-###############################################################################
-
-try:
-    burstSpacing_ms = input("Spacing between two bursts in ms [" + str(pulse.burstSpacing_ms_min) +  "ms; infinity) (default: " + str(defaultBurstSpacing_ms) + "ms): ")
-except:
-    burstSpacing_ms = defaultBurstSpacing_ms
-
-print("==> Selected burst spacing: " + str(pulse.setBurstSpacing_ms(burstSpacing_ms)) + " ms")
-if (not pulse.isBurstSpacingInRange()):
-    print("*** WARNING: burst spacing out of range")
-print
-
-###############################################################################
-
-try:
-    print("Some devices require a silence period at the very start")
-    print("which is beyond IEC 60601-1-8 compliance.")
-    startWithSilence_ms = input("Silence at start in ms (default: " + str(defaultStartWithSilence_ms) + "ms): ")
-except:
-    startWithSilence_ms = defaultStartWithSilence_ms
-
-startWithSilence_ms = max(0, startWithSilence_ms)
-print("==> Selected silence at start: " + str(startWithSilence_ms) + " ms")
-print
-
-###############################################################################
-
-doSave = 'y'
-try:
-    doSave = raw_input("Save parameters as new defaults [Y|n]? ")
-except:
-    doSave = 'y'
+    ###############################################################################
 
-if (doSave != 'n' and doSave != 'N'):
     try:
-        f=open(lpConfigFilename + ".py","w")
-        f.write("#!/usr/bin/python"                                          + "\n" +
-                "defaultSampleRate_Hz       = "   + str(sampleRate_Hz)       + "\n" +
-                "defaultPulseSpacing_ms     = "   + str(pulseSpacing_ms)     + "\n" +
-                "defaultPulseDuration_ms    = "   + str(pulseDuration_ms)    + "\n" +
-                "defaultRiseTime_pc         = "   + str(riseTime_pc)         + "\n" +
-                "defaultFallTime_pc         = "   + str(fallTime_pc)         + "\n" +
-                "defaultBaseFrequency1      = "   + str(baseFrequency1)      + "\n" +
-                "defaultHarmonicStr1        = \"" + str(harmonicsStr1)       + "\"\n" +
-                "defaultVolumeStr1          = \"" + str(volumesStr1)         + "\"\n" +
-                "defaultBaseFrequency2      = "   + str(baseFrequency2)      + "\n" +
-                "defaultHarmonicStr2        = \"" + str(harmonicsStr2)       + "\"\n" +
-                "defaultVolumeStr2          = \"" + str(volumesStr2)         + "\"\n" +
-                "defaultBurstSpacing_ms     = "   + str(burstSpacing_ms)     + "\n"   +
-                "defaultStartWithSilence_ms = "   + str(startWithSilence_ms) + "\n")
-        f.close()
-        print("Configuration saved in " + lpConfigFilename + ".py\n")
+        print("NOTE: if you wish to create a low priority alarm with 1 pulse enter frequency 0 here!")
+        baseFrequency2 = input("Base frequency of 2nd pulse [" + str(baseFrequency_Hz_min) + "Hz; " + str(baseFrequency_Hz_max) + "Hz] (default: " + str(defaultBaseFrequency2) + "Hz): ")
     except:
-        print(lpConfigFilename + ".py locked by other application - please close\n")
-        raw_input()
-
-###############################################################################
-
-print "\n#############################################\n"
-print "\nDetermine max volume across all pulses"
-maxVol1 = getMax(volumes1)
-maxVol2 = getMax(volumes2)
-maxVol  = max(maxVol1, maxVol2)    
-
-if maxVol == 0:
-    raise ValueError('volumes of all harmonics in pulses cannot be all 0')
-
-###############################################################################
-
-# create array of integer volumes and normalize volume across all volChar1+2
-print "Normalizing volumes across pulses"
+        baseFrequency2 = defaultBaseFrequency2
+
+    print("==> Selected base frequency of 2nd pulse: " + str(baseFrequency2))
+    # IEC 60601-1-8 page 17 requires base frequency in range [150Hz, 1000Hz]
+    if baseFrequency2 == 0:
+        print("NOTE: Second pulse disabled!")
+    else:
+        if (baseFrequency_Hz_min > baseFrequency2 or baseFrequency2 > baseFrequency_Hz_max):
+            print("*** WARNING: pulse frequency f_0 out of range [150Hz, 1000Hz]")
+    print
 
-# it is maxVol != 0
-for i, vol in enumerate(volumes1):
-    volumes1[i] = vol / maxVol
-for i, vol in enumerate(volumes2):
-    volumes2[i] = vol / maxVol
+    harmonics2 = []
+    volumes2 = []
+
+    if baseFrequency2 != 0:
+        # to keep this code simple we leave this task to the user: 
+        # first harmonic is 1 and harmonics are sorted ascending.
+        print("IMPORTANT NOTE: the first harmonic must be 1 and the harmonics must be in ascending order!!!")
+        while len(harmonics2) != noHarmonics:
+            harmonicsStr2 = raw_input(str(noHarmonics) + " Harmonics [positive integer] (default: " + harmonicsStr1 + "): ")
+            if len(harmonicsStr2) == 0:
+                harmonicsStr2 = harmonicsStr1 
+                harmonics2 = harmonicsStr2.split()
+                noHarmonics = len(harmonics2)
+
+        print("==> Selected harmonics of 2nd pulse: " + harmonicsStr2)
+
+        # hasEnoughHarmonics ensures the correct format of harmonics. 
+        # Hence call before working on harmonics
+        if (not hasEnoughHarmonics(baseFrequency2, harmonics2)):
+            print("*** WARNING: less than required number of harmonics in range [300Hz, 4000Hz]")
+        print
+
+        ###############################################################################
+
+        while len(volumes2) != noHarmonics:
+            volumesStr2 = raw_input(str(noHarmonics) + " Volumes (default: " + volumesStr1 + "): ")
+            if len(volumesStr2) == 0:
+                volumesStr2 = volumesStr1
+            volumes2 = getVolumes(volumesStr2)
+
+        print("==> Selected volumes of 2nd pulse: " + volumesStr2)
+
+        dBvalue=str(maxDiffSoundPressureToPulseFrequencyInDB)
+        if (not hasSignificantVolumesInsideDbRange(volumes2, baseFrequency2, harmonics2)):
+            print("*** WARNING: less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume")
+            print("            "),
+            vOODbR = volumesOutOfDbRange(volumes2)
+            print("             The following volumes differ more than " + dBvalue + "dB from base frequency's volume:")
+            for v in vOODbR:
+                print(str(v) + ", "),
+        print
+
+    else:
+        harmonicsStr2 = ''
+        volumesStr2   = '' 
 
-###############################################################################
+    ###############################################################################
 
-# pulse1/2 are arrays of harmonics
-pulse1 = []
-pulse2 = []
+    try:
+        burstSpacing_ms = input("Spacing between two bursts in ms [" + str(pulse.burstSpacing_ms_min) +  "ms; infinity) (default: " + str(defaultBurstSpacing_ms) + "ms): ")
+    except:
+        burstSpacing_ms = defaultBurstSpacing_ms
 
-print "Creating wave and harmonics for pulse 1"
-for i, volume in enumerate(volumes1):
-    pulse1.append(pulse.createWave(baseFrequency1 * int(harmonics1[i]), volume))
-print "Creating wave and harmonics for pulse 2"
-for i, volume in enumerate(volumes2):
-    pulse2.append(pulse.createWave(baseFrequency2 * int(harmonics2[i]), volume))
+    print("==> Selected burst spacing: " + str(pulse.setBurstSpacing_ms(burstSpacing_ms)) + " ms")
+    if (not pulse.isBurstSpacingInRange()):
+        print("*** WARNING: burst spacing out of range")
+    print
 
-###############################################################################
+    ###############################################################################
 
-print "Merging harmonics and creating final burst with 2 pulses"
-# merge the audio files
-audio = ([0.0] * pulse._getSamplesFromMs(startWithSilence_ms))
-
-p1 = PulseMerger(pulse1)
-p1Array = p1.merge()
-print "Pulse 1:\t" + str(pulse.getPulseDuration_ms()) + "ms"
-audio = audio + p1Array
-maxAbs1 = p1.getMaxVolume()
-
-if len(harmonicsStr2) != 0 and len(volumesStr2) != 0 and defaultBaseFrequency2 > 0 and pulseDuration_ms > 0:
-    # IEC 60601-1-8 page 17 - silence btw Pulse 1 and 2: y = 125ms to 250ms
-    # y is here called pulse_90pc_spacing_ms (see also wavetools.py)
-    print "Silence 1:\t" + str(pulse.getPulseSpacing_ms()) + "ms"
-    audio = audio + pulse.createSilence()
-
-    p2 = PulseMerger(pulse2)
-    print "Pulse 2:\t" + str(pulse.getPulseDuration_ms()) + "ms"
-    audio = audio + p2.merge()
-    maxAbs2 = p2.getMaxVolume()
-else:
-    maxAbs2 = 0
-
-maxAbs = max(maxAbs1, maxAbs2)
-# maxAbs != 0 since maxVol != 0
-
-# IEC 60601-1-8 page 17 - silence btw two bursts: > 15.0 seconds
-# here called burstSpacing_ms
-print "Silence 2:\t" + str(pulse.getBurstSpacing_ms()) + "ms"
-audio = audio + pulse.createSilence(pulse.getBurstSpacing_ms())
-  
-###############################################################################
+    try:
+        print("Some devices require a silence period at the very start")
+        print("which is beyond IEC 60601-1-8 compliance.")
+        startWithSilence_ms = input("Silence at start in ms (default: " + str(defaultStartWithSilence_ms) + "ms): ")
+    except:
+        startWithSilence_ms = defaultStartWithSilence_ms
 
-# checking IEC 60601-1-8 Table 3:
-maxDiffSoundPressureAnyPulsesInDB=10
-maxDiffSoundPressureAnyPulses=10.0**(maxDiffSoundPressureAnyPulsesInDB/20.0)
-# Max difference in amplitude between any two PULSES is 10dB (as factor: 3.16)
-if maxAbs2 != 0 and maxAbs1 / maxAbs2 > maxDiffSoundPressureAnyPulses:
-    print("*** WARNING: more than " + maxDiffSoundPressureAnyPulses + "dB difference in amplitude between pulses\n")
-if maxAbs1 != 0 and maxAbs2 / maxAbs1 > maxDiffSoundPressureAnyPulses:
-    print("*** WARNING: more than " + maxDiffSoundPressureAnyPulses + "dB difference in amplitude between pulses\n")
+    startWithSilence_ms = max(0, startWithSilence_ms)
+    print("==> Selected silence at start: " + str(startWithSilence_ms) + " ms")
+    print
 
-###############################################################################
+    doSave = 'y'
+    try:
+        doSave = raw_input("Save parameters as new defaults [Y|n]? ")
+    except:
+        doSave = 'y'
+
+    if (doSave != 'n' and doSave != 'N'):
+        try:
+            f=open(lpConfigFilename + ".py","w")
+            f.write("#!/usr/bin/python"                                          + "\n" +
+                    "defaultSampleRate_Hz       = "   + str(sampleRate_Hz)       + "\n" +
+                    "defaultPulseSpacing_ms     = "   + str(pulseSpacing_ms)     + "\n" +
+                    "defaultPulseDuration_ms    = "   + str(pulseDuration_ms)    + "\n" +
+                    "defaultRiseTime_pc         = "   + str(riseTime_pc)         + "\n" +
+                    "defaultFallTime_pc         = "   + str(fallTime_pc)         + "\n" +
+                    "defaultBaseFrequency1      = "   + str(baseFrequency1)      + "\n" +
+                    "defaultHarmonicStr1        = \"" + str(harmonicsStr1)       + "\"\n" +
+                    "defaultVolumeStr1          = \"" + str(volumesStr1)         + "\"\n" +
+                    "defaultBaseFrequency2      = "   + str(baseFrequency2)      + "\n" +
+                    "defaultHarmonicStr2        = \"" + str(harmonicsStr2)       + "\"\n" +
+                    "defaultVolumeStr2          = \"" + str(volumesStr2)         + "\"\n" +
+                    "defaultBurstSpacing_ms     = "   + str(burstSpacing_ms)     + "\n"   +
+                    "defaultStartWithSilence_ms = "   + str(startWithSilence_ms) + "\n")
+            f.close()
+            print("Configuration saved in " + lpConfigFilename + ".py\n")
+        except:
+            print(lpConfigFilename + ".py locked by other application - please close\n")
+            raw_input()
+
+    config = dict(defaults)
+    config.update({'defaultSampleRate_Hz':       sampleRate_Hz,
+                   'defaultPulseSpacing_ms':     pulseSpacing_ms,
+                   'defaultPulseDuration_ms':    pulseDuration_ms,
+                   'defaultRiseTime_pc':         riseTime_pc,
+                   'defaultFallTime_pc':         fallTime_pc,
+                   'defaultBaseFrequency1':      baseFrequency1,
+                   'defaultHarmonicStr1':        harmonicsStr1,
+                   'defaultVolumeStr1':          volumesStr1,
+                   'defaultBaseFrequency2':      baseFrequency2,
+                   'defaultHarmonicStr2':        harmonicsStr2,
+                   'defaultVolumeStr2':          volumesStr2,
+                   'defaultBurstSpacing_ms':     burstSpacing_ms,
+                   'defaultStartWithSilence_ms': startWithSilence_ms})
+    return config
+
+def main():
+    if '--batch' in sys.argv[1:]:
+        parser = argparse.ArgumentParser(description="Generates IEC 60601-1-8 low priority alarms from configuration files without any query.")
+        parser.add_argument('--batch', action='store_true',
+                            help='render the configuration files without any query')
+        parser.add_argument('-o', '--output-dir', default='.',
+                            help='directory of the wav files (default: current directory)')
+        parser.add_argument('configs', nargs='+', metavar='config',
+                            help='configuration file, e.g. example_LP_config.py')
+        args = parser.parse_args()
+        sys.exit(runBatch(args.configs, generate_low_priority, args.output_dir, pulseCacheDirectory))
+
+    defaults = getDefaultConfig()
+    if len(sys.argv) > 1:
+        copyfile(sys.argv[1], lpConfigFilename + '.py')
+    try:
+        defaults.update(loadConfig(lpConfigFilename + '.py'))
+    except:
+        print("No config " + lpConfigFilename + ".py found\n")
 
-print "Setting max gain across burst to " + str(gain)
-  
-# set the volume of the final output here:
-if maxAbs != 0:
-    scale = gain / maxAbs
-else:
-    scale = 0
+    print
+    introduction()
+    print
+    LP_introduction()
+    print
+    print
 
-for i, sample in enumerate(audio):
-    audio[i] = sample * scale
+    config = queryConfig(defaults)
 
-###############################################################################
+    print "\n#############################################\n"
 
-print "Saving wave in " + outputFilePath
+    # the sound file may be locked by a player: retry after closing it
+    while True:
+        try:
+            generate_low_priority(config, outputFilePath, PulseCache(directory=pulseCacheDirectory), verbose=True)
+            break
+        except WavFileLockedError as e:
+            print(str(e) + " - please close\n")
+            raw_input()
 
-save_wav(audio, outputFilePath, sampleRate_Hz)
+    ###########################################################################
 
-###############################################################################
+    if remoteSCPtarget != None:
+        print "Copying " + outputFilePath + " to " + remoteSCPtarget
+        subprocess.check_output(['scp', outputFilePath, remoteSCPtarget])
 
-if remoteSCPtarget != None:
-    print "Copying " + outputFilePath + " to " + remoteSCPtarget
-    subprocess.check_output(['scp', outputFilePath, remoteSCPtarget])
+    print("All Done!")
 
-print("All Done!")
+if __name__ == '__main__':
+    main()
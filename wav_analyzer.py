@@ -0,0 +1,524 @@
+#!/usr/bin/python
+"""
+Measures the timing of the pulses in a wav file written by save_wav and
+checks it against the IEC 60601-1-8 limits.
+
+The envelope of every pulse is the rectified signal smoothed by a sliding
+maximum over the longest carrier period of the file (the carrier periods
+of all pulses are estimated from the autocorrelations of their centers,
+computed by one FFT), i.e. the measured times t_1, t_2, t_5 and t_6 (see
+wavtools.introduction()) are accurate to half a carrier period. Silence is
+skipped in blocks, so only the pulses are analyzed sample by sample. Files
+with several bursts are split at the silences of at least the shortest
+burst spacing and every burst is checked on its own.
+
+t_3 and t_4 (start and end of the full amplitude) are not measured:
+IEC 60601-1-8 has no limits for them and the envelope of a sampled
+carrier only reaches 100% within the ripple of its sampled peaks, so they
+would be neither needed nor accurate. Instead the envelope between t_2
+and t_5 is checked not to drop below 90%, which the 90% marks alone
+would not reveal.
+
+verifyHarmonics measures the levels of the harmonics of every pulse in
+the rendered files (i.e. after normalization, gain and quantization) with
+a Hann windowed FFT of the pulse's plateau and applies the harmonic rules
+of wavtools to the measured levels.
+
+NOTE: requires numpy.
+"""
+from __future__ import division
+from __future__ import print_function
+from high_prio_sound_gen import IEC_60601_1_8_High_Priority_Pulse
+from low_prio_sound_gen import IEC_60601_1_8_Low_Priority_Pulse
+from wavtools import IEC_60601_1_8_Medium_Priority_Pulse
+from wavtools import maxDiffSoundPressureToPulseFrequencyInDB
+import numpy
+import wave
+import sys
+
+# lowest base frequency allowed by IEC 60601-1-8 (page 17) and highest one
+# searched for the carrier period
+minBaseFrequency_Hz = 150
+maxBaseFrequency_Hz = 1000
+
+# samples below this fraction of the file's peak do not belong to a pulse
+silenceThreshold = 0.01
+
+# number of periods of the lowest base frequency in the center of a pulse
+# whose autocorrelation gives the carrier period
+carrierAnalysisPeriods = 8
+
+# lowest envelope (relative to the peak) allowed between t_2 and t_5
+plateauMin = 0.9
+
+# bursts are separated by at least the shortest burst spacing of all
+# priorities (all other spacings are shorter)
+minBurstSpacing_ms = min(IEC_60601_1_8_High_Priority_Pulse.burstSpacing_ms_min,
+                         IEC_60601_1_8_Medium_Priority_Pulse.burstSpacing_ms_min,
+                         IEC_60601_1_8_Low_Priority_Pulse.burstSpacing_ms_min)
+
+def readWav(fileName):
+    """
+    Returns (samples, sampleRate_Hz) of a mono 16 bit wav file; the
+    samples are floats in [-1.0; 1.0)
+    """
+    wav_file = wave.open(fileName, "r")
+    try:
+        if wav_file.getnchannels() != 1 or wav_file.getsampwidth() != 2:
+            raise ValueError(fileName + ' is not a mono 16 bit wav file')
+        sampleRate_Hz = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+    finally:
+        wav_file.close()
+    return numpy.frombuffer(frames, dtype='<i2') / 32768.0, sampleRate_Hz
+
+def slidingMax(x, width):
+    """
+    Returns the maximum of x over a window of width samples centered at
+    every sample. Needs log2(width) vectorized passes.
+    """
+    width = max(1, int(width))
+    # pad so that the window never leaves the array
+    padded = numpy.concatenate((numpy.zeros(width // 2), x, numpy.zeros(width)))
+    # m[i] = max(padded[i:i + span]) for the largest power of 2 span <= width
+    m = padded.copy()
+    span = 1
+    while 2 * span <= width:
+        m[:-span] = numpy.maximum(m[:-span], m[span:])
+        span *= 2
+    result = numpy.maximum(m[:len(x)], m[width - span:width - span + len(x)])
+    return result
+
+def findPulseRegions(rectified, blockSize, threshold):
+    """
+    Returns the (start, stop) sample indices of the regions with samples
+    above threshold; regions closer than 2 blocks are merged and every
+    region is extended by one block on both sides
+    """
+    numberOfBlocks = len(rectified) // blockSize
+    blockMax = numpy.zeros(numberOfBlocks + 1)
+    if numberOfBlocks > 0:
+        blockMax[:numberOfBlocks] = rectified[:numberOfBlocks * blockSize].reshape(numberOfBlocks, blockSize).max(axis=1)
+    if len(rectified) > numberOfBlocks * blockSize:
+        blockMax[numberOfBlocks] = rectified[numberOfBlocks * blockSize:].max()
+    active = numpy.flatnonzero(blockMax > threshold)
+    regions = []
+    if len(active) == 0:
+        return regions
+    # split where more than 2 inactive blocks are in between
+    splits = numpy.flatnonzero(numpy.diff(active) > 2)
+    starts = numpy.concatenate(([active[0]], active[splits + 1]))
+    stops = numpy.concatenate((active[splits], [active[-1]]))
+    for start, stop in zip(starts, stops):
+        regions.append((max(0, (start - 1) * blockSize), min(len(rectified), (stop + 2) * blockSize)))
+    return regions
+
+def estimateCarrierPeriods(segments, sampleRate_Hz):
+    """
+    Returns the periods (in samples) of the carriers of the segments (one
+    pulse each): the lags of the maxima of the autocorrelations of their
+    centers (carrierAnalysisPeriods of the lowest base frequency) between
+    1/maxBaseFrequency_Hz and 1/minBaseFrequency_Hz. The autocorrelations
+    of all segments are computed by one rfft.
+    """
+    minLag = max(1, int(sampleRate_Hz / maxBaseFrequency_Hz))
+    maxLag = int(numpy.ceil(sampleRate_Hz / minBaseFrequency_Hz))
+    length = min(max([len(segment) for segment in segments] + [0]), carrierAnalysisPeriods * maxLag)
+    if length <= maxLag:
+        return [maxLag] * len(segments)
+    centers = numpy.zeros((len(segments), length))
+    for center, segment in zip(centers, segments):
+        start = max(0, (len(segment) - length) // 2)
+        part = segment[start:start + length]
+        center[:len(part)] = part
+    n = 1 << int(numpy.ceil(numpy.log2(2 * length)))
+    spectra = numpy.fft.rfft(centers, n, axis=1)
+    autocorrelations = numpy.fft.irfft(spectra.real ** 2 + spectra.imag ** 2, n, axis=1)
+    return [minLag + int(lag) for lag in numpy.argmax(autocorrelations[:, minLag:maxLag + 1], axis=1)]
+
+def _crossing(envelope, level, index):
+    """
+    Returns the (interpolated) sample position where envelope crosses level
+    between index - 1 and index
+    """
+    if index == 0:
+        return 0.0
+    before = envelope[index - 1]
+    after = envelope[index]
+    if after == before:
+        return float(index)
+    fraction = (level - before) / (after - before)
+    return index - 1 + min(max(fraction, 0.0), 1.0)
+
+def measurePulse(rectified, offset, sampleRate_Hz, window):
+    """
+    Measures one pulse (rectified samples starting at sample offset of the
+    file) on its envelope, the sliding maximum over window samples.
+    Returns a dictionary with t_1, t_2, t_5, t_6 (in ms from the start of
+    the file), the peak and the 'plateauMin' (minimum of the envelope
+    relative to the peak between t_2 and t_5)
+    """
+    peak = rectified.max()
+    envelope = slidingMax(rectified, window) / peak
+
+    above10 = numpy.flatnonzero(envelope >= 0.1)
+    above90 = numpy.flatnonzero(envelope >= 0.9)
+    t_1 = _crossing(envelope, 0.1, above10[0])
+    t_2 = _crossing(envelope, 0.9, above90[0])
+    # falling edges: crossings after the last samples above the levels
+    t_5 = above90[-1] + 1 - _fallingFraction(envelope, 0.9, above90[-1])
+    t_6 = above10[-1] + 1 - _fallingFraction(envelope, 0.1, above10[-1])
+    toMs = 1000.0 / sampleRate_Hz
+    return {'t_1':        (offset + t_1) * toMs,
+            't_2':        (offset + t_2) * toMs,
+            't_5':        (offset + t_5) * toMs,
+            't_6':        (offset + t_6) * toMs,
+            'peak':       peak,
+            'plateauMin': envelope[above90[0]:above90[-1] + 1].min()}
+
+def _fallingFraction(envelope, level, index):
+    """
+    Returns how much of the sample step after index (the last sample at or
+    above level) is below level
+    """
+    if index + 1 >= len(envelope):
+        return 0.0
+    before = envelope[index]
+    after = envelope[index + 1]
+    if before == after:
+        return 0.0
+    return 1.0 - min(max((before - level) / (before - after), 0.0), 1.0)
+
+def measurePulses(samples, sampleRate_Hz):
+    """
+    Measures all pulses of samples (see measurePulse) and adds their
+    'start' and 'stop' sample index, 'carrierPeriod_ms', 'baseFrequency_Hz'
+    (estimate), 'riseTime_ms', 'fallTime_ms', 'pulseDuration_ms',
+    'riseTime_pc' and 'fallTime_pc'. The envelopes of all pulses are
+    smoothed over the longest carrier period of the file.
+    """
+    rectified = numpy.abs(samples)
+    peak = rectified.max() if len(rectified) > 0 else 0.0
+    blockSize = int(numpy.ceil(sampleRate_Hz / minBaseFrequency_Hz))
+    regions = findPulseRegions(rectified, blockSize, silenceThreshold * peak)
+    periods = estimateCarrierPeriods([samples[start:stop] for start, stop in regions], sampleRate_Hz)
+    window = max(periods + [1])
+    toMs = 1000.0 / sampleRate_Hz
+
+    pulses = []
+    for (start, stop), period in zip(regions, periods):
+        pulse = measurePulse(rectified[start:stop], start, sampleRate_Hz, window)
+        pulse['start'] = start
+        pulse['stop'] = stop
+        pulse['carrierPeriod_ms'] = period * toMs
+        pulse['baseFrequency_Hz'] = sampleRate_Hz / period
+        pulse['riseTime_ms'] = pulse['t_2'] - pulse['t_1']
+        pulse['fallTime_ms'] = pulse['t_6'] - pulse['t_5']
+        pulse['pulseDuration_ms'] = pulse['t_5'] - pulse['t_2']
+        pulse['riseTime_pc'] = 100.0 * pulse['riseTime_ms'] / pulse['pulseDuration_ms']
+        pulse['fallTime_pc'] = 100.0 * pulse['fallTime_ms'] / pulse['pulseDuration_ms']
+        pulses.append(pulse)
+    return pulses
+
+def splitBursts(pulses, minGap_ms):
+    """
+    Returns the pulses split into bursts (lists of pulses) at the spacings
+    (t_5 to t_2) of at least minGap_ms
+    """
+    bursts = []
+    for pulse in pulses:
+        if not bursts or pulse['t_2'] - bursts[-1][-1]['t_5'] >= minGap_ms:
+            bursts.append([])
+        bursts[-1].append(pulse)
+    return bursts
+
+def checkBurst(pulses, priority, burstSpacing_ms, tolerance_ms):
+    """
+    Checks the timing of the pulses of one burst against the limits of
+    IEC_60601_1_8_High_Priority_Pulse (priority 'high'),
+    IEC_60601_1_8_Medium_Priority_Pulse (priority 'medium') or
+    IEC_60601_1_8_Low_Priority_Pulse (priority 'low'). If priority is None
+    it is taken from the number of pulses (5 or 10: high, 3: medium, 1 or
+    2: low). burstSpacing_ms is the silence to the next burst. The limits
+    are widened by tolerance_ms.
+    Returns a dictionary with the 'priority', the 'pulses', the
+    'pulseSpacings_ms' between successive pulses, the 'halfBurstSpacing_ms'
+    (high priority only), the 'burstSpacing_ms' and the 'warnings' (list
+    of IEC 60601-1-8 violations).
+    """
+    if priority is None:
+        if len(pulses) in (5, 10):
+            priority = 'high'
+        elif len(pulses) == 3:
+            priority = 'medium'
+        elif len(pulses) in (1, 2):
+            priority = 'low'
+    pulseClass = {'high':   IEC_60601_1_8_High_Priority_Pulse,
+                  'medium': IEC_60601_1_8_Medium_Priority_Pulse,
+                  'low':    IEC_60601_1_8_Low_Priority_Pulse}.get(priority)
+
+    # spacings are measured from 90% of the fall to 90% of the rise
+    spacings_ms = [pulses[i + 1]['t_2'] - pulses[i]['t_5'] for i in range(len(pulses) - 1)]
+    halfBurstSpacing_ms = None
+    pulseSpacings_ms = spacings_ms
+    if priority == 'high' and len(pulses) == 10:
+        halfBurstSpacing_ms = spacings_ms[4]
+        # the spacing btw. pulse 3 and 4 (and 8 and 9) is 2 x + t_d
+        pulseSpacings_ms = [spacings_ms[i] for i in (0, 1, 3, 5, 6, 8)]
+    elif priority == 'high' and len(pulses) == 5:
+        pulseSpacings_ms = [spacings_ms[i] for i in (0, 1, 3)]
+
+    warnings = []
+    if pulseClass is None:
+        warnings.append(str(len(pulses)) + " pulses match neither a high, a medium nor a low priority alarm")
+    else:
+        for index, pulse in enumerate(pulses):
+            name = "pulse " + str(index + 1) + ": "
+            if not pulseClass.pulseDuration_ms_min - tolerance_ms <= pulse['pulseDuration_ms'] <= pulseClass.pulseDuration_ms_max + tolerance_ms:
+                warnings.append(name + "pulse duration %.1fms out of range" % pulse['pulseDuration_ms'])
+            tolerance_pc = 100.0 * tolerance_ms / pulse['pulseDuration_ms']
+            if not pulseClass.riseTime_pc_min - tolerance_pc <= pulse['riseTime_pc'] <= pulseClass.riseTime_pc_max + tolerance_pc:
+                warnings.append(name + "rise time %.1f%% out of range" % pulse['riseTime_pc'])
+            if pulse['plateauMin'] < plateauMin:
+                warnings.append(name + "amplitude drops to %.0f%% between t_2 and t_5" % (100.0 * pulse['plateauMin']))
+        for spacing_ms in pulseSpacings_ms:
+            if not pulseClass.pulse_90pc_spacing_ms_min - tolerance_ms <= spacing_ms <= pulseClass.pulse_90pc_spacing_ms_max + tolerance_ms:
+                warnings.append("pulse spacing %.1fms out of range" % spacing_ms)
+        # isFallTimeInRange: rise and fall must fit into the pulse spacing
+        for index, spacing_ms in enumerate(spacings_ms):
+            if pulses[index + 1]['riseTime_ms'] + pulses[index]['fallTime_ms'] > spacing_ms + 2 * tolerance_ms:
+                warnings.append("rise and fall time exceed the spacing after pulse " + str(index + 1))
+        if halfBurstSpacing_ms is not None and \
+           not pulseClass.halfBurstSpacing_ms_min - tolerance_ms <= halfBurstSpacing_ms <= pulseClass.halfBurstSpacing_ms_max + tolerance_ms:
+            warnings.append("half burst spacing %.1fms out of range" % halfBurstSpacing_ms)
+        if burstSpacing_ms is not None:
+            if burstSpacing_ms < pulseClass.burstSpacing_ms_min - tolerance_ms or \
+               (hasattr(pulseClass, 'burstSpacing_ms_max') and burstSpacing_ms > pulseClass.burstSpacing_ms_max + tolerance_ms):
+                warnings.append("burst spacing %.1fms out of range" % burstSpacing_ms)
+
+    return {'priority':            priority,
+            'pulses':              pulses,
+            'pulseSpacings_ms':    spacings_ms,
+            'halfBurstSpacing_ms': halfBurstSpacing_ms,
+            'burstSpacing_ms':     burstSpacing_ms,
+            'warnings':            warnings}
+
+def analyzeSamples(samples, sampleRate_Hz, priority = None):
+    """
+    Measures all pulses of samples (see readWav), splits them into bursts
+    at the spacings of at least minBurstSpacing_ms and checks the timing of
+    every burst (see checkBurst; priority None classifies every burst by its
+    number of pulses). The file is expected to repeat, i.e. the burst
+    spacing of the last burst is the silence at the end plus the one at
+    the start.
+    Returns a dictionary with the 'sampleRate_Hz', 'duration_ms', the
+    'priority' (None if the bursts differ), the measured 'pulses' (see
+    measurePulses), the 'bursts' (see checkBurst) and the 'warnings' of
+    all bursts. The limits are widened by the accuracy of the measurement
+    (half the longest carrier period).
+    """
+    duration_ms = len(samples) * 1000.0 / sampleRate_Hz
+    pulses = measurePulses(samples, sampleRate_Hz)
+
+    # the measured times are accurate to half a carrier period
+    tolerance_ms = max([pulse['carrierPeriod_ms'] for pulse in pulses] + [0.0]) / 2.0
+    groups = splitBursts(pulses, minBurstSpacing_ms - tolerance_ms) or [[]]
+    bursts = []
+    for index, burstPulses in enumerate(groups):
+        burstSpacing_ms = None
+        if index + 1 < len(groups):
+            burstSpacing_ms = groups[index + 1][0]['t_2'] - burstPulses[-1]['t_5']
+        elif burstPulses:
+            burstSpacing_ms = duration_ms - burstPulses[-1]['t_5'] + groups[0][0]['t_2']
+        bursts.append(checkBurst(burstPulses, priority, burstSpacing_ms, tolerance_ms))
+
+    warnings = []
+    for index, burst in enumerate(bursts):
+        prefix = "burst " + str(index + 1) + ": " if len(bursts) > 1 else ""
+        warnings += [prefix + warning for warning in burst['warnings']]
+    priorities = set(burst['priority'] for burst in bursts)
+
+    return {'sampleRate_Hz': sampleRate_Hz,
+            'duration_ms':   duration_ms,
+            'priority':      priorities.pop() if len(priorities) == 1 else None,
+            'pulses':        pulses,
+            'bursts':        bursts,
+            'warnings':      warnings}
+
+def analyzeWav(fileName, priority = None):
+    """analyzeSamples of the wav file"""
+    samples, sampleRate_Hz = readWav(fileName)
+    return analyzeSamples(samples, sampleRate_Hz, priority)
+
+###############################################################################
+# harmonic verification
+
+# a harmonic is present if its level relative to f_0 is above this
+harmonicPresence_dB = -60
+# zero padding factor of the FFT (reduces the scalloping of the Hann window)
+fftOversampling = 4
+# the band [300Hz; 4000Hz] is widened by the accuracy of the measured base
+# frequency (e.g. the 10th harmonic of 400Hz measured as 400.02Hz is in)
+bandTolerance_pc = 0.1
+
+def _plateau(pulse, sampleRate_Hz):
+    """returns the sample indices (start, stop) between t_2 and t_5 of pulse"""
+    start = int(numpy.ceil(pulse['t_2'] * sampleRate_Hz / 1000.0))
+    stop = int(numpy.floor(pulse['t_5'] * sampleRate_Hz / 1000.0))
+    return start, max(start, stop)
+
+def amplitudeSpectra(segments, sampleRate_Hz):
+    """
+    Returns (frequencies_Hz, spectra) of the Hann windowed segments (rows
+    of a 2 dimensional array) computed by one rfft for all segments. The
+    spectra are scaled such that a sine of amplitude a has a peak of a.
+    """
+    length = segments.shape[1]
+    n = fftOversampling << int(numpy.ceil(numpy.log2(length)))
+    window = numpy.hanning(length)
+    spectra = numpy.abs(numpy.fft.rfft(segments * window, n, axis=1)) * (2.0 / window.sum())
+    return numpy.fft.rfftfreq(n, 1.0 / sampleRate_Hz), spectra
+
+def measureHarmonicLevels(frequencies_Hz, spectrum, baseFrequency_Hz, length):
+    """
+    Refines the base frequency estimate to the maximum of spectrum within
+    +-5% of baseFrequency_Hz (interpolated between the FFT bins by a
+    parabola through the log amplitudes) and measures the amplitudes of
+    its harmonics up to 4000Hz (inclusive within bandTolerance_pc) or the
+    Nyquist frequency as the maximum of spectrum
+    within the main lobe of the Hann window of a segment with length
+    samples. Returns (baseFrequency_Hz, harmonics, levels_dB) with the
+    levels relative to the base frequency's amplitude.
+    """
+    resolution_Hz = frequencies_Hz[1]
+    sampleRate_Hz = 2.0 * frequencies_Hz[-1]
+    low = int(0.95 * baseFrequency_Hz / resolution_Hz)
+    high = int(numpy.ceil(1.05 * baseFrequency_Hz / resolution_Hz)) + 1
+    peak = low + int(numpy.argmax(spectrum[low:high]))
+    offset = 0.0
+    if 0 < peak < len(spectrum) - 1 and spectrum[peak - 1:peak + 2].min() > 0:
+        before, center, after = numpy.log(spectrum[peak - 1:peak + 2])
+        if before - 2 * center + after < 0:
+            offset = 0.5 * (before - after) / (before - 2 * center + after)
+    baseFrequency_Hz = (peak + offset) * resolution_Hz
+
+    maxFrequency_Hz = min(4000.0 * (1 + bandTolerance_pc / 100.0), frequencies_Hz[-1])
+    harmonics = numpy.arange(1, int(maxFrequency_Hz / baseFrequency_Hz) + 1)
+    centers = numpy.rint(harmonics * baseFrequency_Hz / resolution_Hz).astype(int)
+    # the main lobe of the Hann window is +-2 bins of the unpadded FFT
+    halfWidth = int(numpy.ceil(2.0 * sampleRate_Hz / length / resolution_Hz))
+    indices = numpy.clip(centers[:, numpy.newaxis] + numpy.arange(-halfWidth, halfWidth + 1), 0, len(spectrum) - 1)
+    amplitudes = spectrum[indices].max(axis=1)
+    with numpy.errstate(divide='ignore'):
+        levels_dB = 20.0 * numpy.log10(amplitudes / amplitudes[0])
+    return baseFrequency_Hz, harmonics, levels_dB
+
+def harmonicRulesOfLevels(baseFrequency_Hz, harmonics, levels_dB):
+    """
+    Applies hasEnoughHarmonics and hasSignificantVolumesInsideDbRange of
+    wavtools to measured levels: harmonics below harmonicPresence_dB are
+    not present. Returns (enoughHarmonics, significantVolumes,
+    outOfDbRange) where outOfDbRange are the present harmonics differing
+    more than maxDiffSoundPressureToPulseFrequencyInDB from f_0.
+    """
+    frequencies_Hz = harmonics * baseFrequency_Hz
+    tolerance = bandTolerance_pc / 100.0
+    inBand = (300 * (1 - tolerance) <= frequencies_Hz) & (frequencies_Hz <= 4000 * (1 + tolerance))
+    present = levels_dB >= harmonicPresence_dB
+    enoughHarmonics = (inBand & present).sum() >= 4
+    inDbRange = numpy.abs(levels_dB) <= maxDiffSoundPressureToPulseFrequencyInDB
+    # the base frequency is the reference and not counted
+    significantVolumes = (inBand & inDbRange)[1:].sum() >= 3
+    outOfDbRange = harmonics[present & ~inDbRange]
+    return enoughHarmonics, significantVolumes, outOfDbRange
+
+def verifyHarmonics(recordings):
+    """
+    Measures the spectrum of the plateau (t_2 to t_5) of every pulse in
+    all recordings, tuples (fileName, samples, sampleRate_Hz, pulses) with
+    the samples of the wav file (see readWav) and its measured pulses (see
+    measurePulses or analyzeSamples). The plateaus of all recordings with
+    equal sample rate and length are transformed by one rfft. Returns one
+    dictionary per recording
+    with the 'fileName', 'sampleRate_Hz', the 'pulses' (dictionaries with
+    'baseFrequency_Hz', 'harmonics', 'levels_dB' (relative to f_0),
+    'enoughHarmonics', 'significantVolumes' and 'outOfDbRange' (see
+    harmonicRulesOfLevels)) and the 'warnings'.
+    """
+    results = []
+    groups = {}
+    for fileName, samples, sampleRate_Hz, pulses in recordings:
+        for index, pulse in enumerate(pulses):
+            start, stop = _plateau(pulse, sampleRate_Hz)
+            groups.setdefault((sampleRate_Hz, stop - start), []).append(
+                (len(results), index, samples[start:stop], pulse['baseFrequency_Hz']))
+        results.append({'fileName':      fileName,
+                        'sampleRate_Hz': sampleRate_Hz,
+                        'pulses':        [None] * len(pulses),
+                        'warnings':      []})
+
+    for (sampleRate_Hz, length), members in groups.items():
+        frequencies_Hz, spectra = amplitudeSpectra(numpy.array([member[2] for member in members]), sampleRate_Hz)
+        for (fileIndex, index, segment, baseFrequency_Hz), spectrum in zip(members, spectra):
+            baseFrequency_Hz, harmonics, levels_dB = measureHarmonicLevels(frequencies_Hz, spectrum, baseFrequency_Hz, length)
+            enoughHarmonics, significantVolumes, outOfDbRange = harmonicRulesOfLevels(baseFrequency_Hz, harmonics, levels_dB)
+            results[fileIndex]['pulses'][index] = {'baseFrequency_Hz':   baseFrequency_Hz,
+                                                   'harmonics':          harmonics,
+                                                   'levels_dB':          levels_dB,
+                                                   'enoughHarmonics':    enoughHarmonics,
+                                                   'significantVolumes': significantVolumes,
+                                                   'outOfDbRange':       outOfDbRange}
+
+    dBvalue = str(maxDiffSoundPressureToPulseFrequencyInDB)
+    for result in results:
+        for index, pulse in enumerate(result['pulses']):
+            name = "pulse " + str(index + 1) + ": "
+            if not pulse['enoughHarmonics']:
+                result['warnings'].append(name + "less than required number of harmonics in range [300Hz, 4000Hz]")
+            if not pulse['significantVolumes']:
+                result['warnings'].append(name + "less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume")
+    return results
+
+def printHarmonicReport(result):
+    print(result['fileName'] + ": harmonics")
+    for index, pulse in enumerate(result['pulses']):
+        levels = ["%d:%.1fdB" % (h, level) for h, level in zip(pulse['harmonics'][1:], pulse['levels_dB'][1:])
+                  if level >= harmonicPresence_dB]
+        print("  pulse %2d: f_0 %.1fHz  " % (index + 1, pulse['baseFrequency_Hz']) + " ".join(levels))
+    for warning in result['warnings']:
+        print("  *** WARNING: " + warning)
+
+def printReport(fileName, analysis):
+    print(fileName + ": " + str(len(analysis['pulses'])) + " pulses in " + str(len(analysis['bursts'])) + " burst(s), " + str(analysis['sampleRate_Hz']) + " Hz")
+    for burstIndex, burst in enumerate(analysis['bursts']):
+        print("  burst %d: %s priority" % (burstIndex + 1, burst['priority']))
+        for index, pulse in enumerate(burst['pulses']):
+            print("  pulse %2d: t_1 %9.2fms  rise %6.2fms (%5.1f%%)  duration %7.2fms  fall %6.2fms (%5.1f%%)  f_0 ~%.0fHz" %
+                  (index + 1, pulse['t_1'], pulse['riseTime_ms'], pulse['riseTime_pc'], pulse['pulseDuration_ms'],
+                   pulse['fallTime_ms'], pulse['fallTime_pc'], pulse['baseFrequency_Hz']))
+        print("  spacings: " + ", ".join("%.2fms" % spacing_ms for spacing_ms in burst['pulseSpacings_ms']))
+        if burst['halfBurstSpacing_ms'] is not None:
+            print("  half burst spacing: %.2fms" % burst['halfBurstSpacing_ms'])
+        if burst['burstSpacing_ms'] is not None:
+            print("  burst spacing: %.2fms" % burst['burstSpacing_ms'])
+    for warning in analysis['warnings']:
+        print("  *** WARNING: " + warning)
+
+def main():
+    status = 0
+    recordings = []
+    for fileName in sys.argv[1:]:
+        samples, sampleRate_Hz = readWav(fileName)
+        analysis = analyzeSamples(samples, sampleRate_Hz)
+        printReport(fileName, analysis)
+        if analysis['warnings']:
+            status = 1
+        recordings.append((fileName, samples, sampleRate_Hz, analysis['pulses']))
+    for result in verifyHarmonics(recordings):
+        printHarmonicReport(result)
+        if result['warnings']:
+            status = 1
+    sys.exit(status)
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,26 @@ Created on Mon Nov  4 13:00:11 2019
 """
 import math
 import wave
-import struct
+import os
+import sys
+import itertools
+import collections
+import hashlib
+import fractions
+import copy
+import time
+import operator
+from array import array
+try:
+    import numpy
+except ImportError:
+    # numpy is optional: all functions fall back to plain Python lists
+    numpy = None
+try:
+    import numba
+except ImportError:
+    # numba is optional: only the 'numba' synthesis backend needs it
+    numba = None
 
 debug = True
 
@@ -17,6 +36,44 @@ debug = True
 # See: table 4 in IEC 60601-1-8:2007
 maxDiffSoundPressureToPulseFrequencyInDB=15
 
+# Maximum difference of sound pressure level between any two pulses.
+# See: table 3 in IEC 60601-1-8:2007
+maxDiffSoundPressureAnyPulsesInDB=10
+
+# sample rates offered by the generator scripts
+sampleRates_Hz = [8000, 9600, 12000, 16000, 19200, 24000, 32000, 44100, 48000, 96000]
+
+# number of samples synthesized at once for all harmonics of a pulse
+# (limits the temporary memory of Pulse.createHarmonicWave)
+synthesisBlock_samples = 4096
+
+# synthesis backend of the pulses (see getSynthesisBackends) or 'auto' to
+# select the fastest one for every pulse (see selectSynthesisBackend)
+synthesisBackend = 'auto'
+
+# maximum absolute error of the carrier interpolated from a table without
+# numpy (see _createInterpolatedCarrier), i.e. about 0.003 LSB of a full
+# scale 16 bit sample
+interpolatedCarrierMaxError = 1e-7
+# cost of interpolating one sample of the carrier in units of one sine of
+# one harmonic (measured), i.e. the interpolated carrier pays off for more
+# than about 5 harmonics
+interpolatedCarrierSampleCost = 5
+
+# number of samples converted and written at once by save_wav
+writeBlock_samples = 65536
+
+# filter of resample: number of zero crossings of the windowed sinc on each
+# side, beta of the Kaiser window (~90dB stop band attenuation) and cutoff
+# relative to the lower Nyquist frequency
+resampleHalfLength = 32
+resampleKaiserBeta = 9.0
+resampleCutoff = 0.95
+
+# level of one LSB of the 16 bit samples in dBFS (about -90.3dB), the floor
+# of pruneHarmonics for 'lsb'
+lsbFloor_dBFS = 20 * math.log10(1.0 / 32767)
+
 def introduction():
     print "Terminology:"
     print
@@ -131,6 +188,15 @@ def hasSignificantVolumesInsideDbRange(volumes, baseFrequency, harmonics):
     Pre-condition: all volumes > 0 and length of harmonics == length of volumes
                    and the first harmonic is 1 (= baseFrequency)
     """
+    # baseFrequency with baseVolume is the reference and within bands by definition
+    # i.e. counter 3 means 4 volumes in range
+    return countSignificantVolumesInsideDbRange(volumes, baseFrequency, harmonics) >= 3
+
+def countSignificantVolumesInsideDbRange(volumes, baseFrequency, harmonics):
+    """
+    Returns the number of harmonics (besides the base frequency) counted by
+    hasSignificantVolumesInsideDbRange
+    """
     maxSoundPressureDiff=10.0**(maxDiffSoundPressureToPulseFrequencyInDB/20.0)
     counter = 0
     baseVolume = None
@@ -143,10 +209,280 @@ def hasSignificantVolumesInsideDbRange(volumes, baseFrequency, harmonics):
                 # this is a significant harmonic
                 if v <= maxSoundPressureDiff * baseVolume and maxSoundPressureDiff * v >= baseVolume:
                     counter = counter + 1
+    return counter
 
-    # baseFrequency with baseVolume is the reference and within bands by definition
-    # i.e. counter 3 means 4 volumes in range
-    return (counter >= 3)
+def aWeighting_dB(frequency_Hz):
+    """
+    A-weighting (IEC 61672-1) of frequency_Hz in dB, 0dB at 1kHz
+    """
+    f2 = float(frequency_Hz)**2
+    if f2 == 0:
+        return float('-inf')
+    rA = 12194.0**2 * f2**2 / ((f2 + 20.6**2) * math.sqrt((f2 + 107.7**2) * (f2 + 737.9**2)) * (f2 + 12194.0**2))
+    return 20 * math.log10(rA) + 2.0
+
+def getResamplePassband_pc():
+    """
+    Returns the upper edge of the pass band of resample in % of the lower
+    Nyquist frequency: the cutoff resampleCutoff less half the transition
+    band of the Kaiser window, (A - 7.95) / (14.36 * N) with the stop band
+    attenuation A = resampleKaiserBeta / 0.1102 + 8.7 and the filter
+    length N (in units of the cutoff period), i.e. about 86.5%. Harmonics
+    between it and the cutoff (the transition band) are attenuated by up
+    to 6dB, the ones above the cutoff by more.
+    """
+    attenuation_dB = resampleKaiserBeta / 0.1102 + 8.7
+    transition = (attenuation_dB - 7.95) / (14.36 * resampleHalfLength)
+    return 100.0 * resampleCutoff * (1.0 - transition / 2.0)
+
+def bandLimitHarmonics(baseFrequency, harmonics, volumes, sampleRate_Hz, guardBand_pc = 0):
+    """
+    Removes the harmonics (and their volumes) with frequencies at or above
+    the Nyquist frequency (sampleRate_Hz / 2) less guardBand_pc percent of
+    it. Such harmonics cannot be represented at sampleRate_Hz: synthesized
+    they alias back into the audible band.
+    Returns the remaining harmonics, their volumes and the removed harmonics.
+    """
+    limit_Hz = sampleRate_Hz / 2.0 * (1.0 - guardBand_pc / 100.0)
+    keptHarmonics = []
+    keptVolumes = []
+    removedHarmonics = []
+    for h, v in zip(harmonics, volumes):
+        if int(h) * baseFrequency >= limit_Hz:
+            removedHarmonics.append(h)
+        else:
+            keptHarmonics.append(h)
+            keptVolumes.append(v)
+    return keptHarmonics, keptVolumes, removedHarmonics
+
+def getPruneVolume(volumeLists, gain, floor_dBFS):
+    """
+    Returns the volume below which a harmonic stays below floor_dBFS (or
+    below 1 LSB of the 16 bit samples for 'lsb') in the output, if the
+    pulses with the harmonic volumes of volumeLists are scaled to a peak
+    of gain. The peak of a pulse is at least its RMS sqrt(sum(v^2) / 2),
+    i.e. a harmonic of volume v ends up with an amplitude of at most
+    gain * v / RMS (of the loudest pulse).
+    """
+    if floor_dBFS == 'lsb':
+        floor_dBFS = lsbFloor_dBFS
+    maxRms = max([math.sqrt(sum(v * v for v in volumes) / 2.0) for volumes in volumeLists] + [0])
+    if gain <= 0 or maxRms == 0:
+        return 0
+    return 10.0**(floor_dBFS / 20.0) * maxRms / gain
+
+def pruneHarmonics(harmonics, volumes, minVolume):
+    """
+    Removes the harmonics (and their volumes) with volumes below minVolume
+    (see getPruneVolume) except for the first one (the base frequency).
+    Returns the remaining harmonics, their volumes and the removed harmonics.
+    """
+    keptHarmonics = list(harmonics[:1])
+    keptVolumes = list(volumes[:1])
+    removedHarmonics = []
+    for h, v in zip(harmonics[1:], volumes[1:]):
+        if v < minVolume:
+            removedHarmonics.append(h)
+        else:
+            keptHarmonics.append(h)
+            keptVolumes.append(v)
+    return keptHarmonics, keptVolumes, removedHarmonics
+
+def prepareHarmonics(pulses, sampleRate_Hz, settings):
+    """
+    Removes the harmonics of pulses, a list of (name, baseFrequency,
+    harmonics, volumes), before any samples are computed: the ones which
+    cannot be represented at sampleRate_Hz (see bandLimitHarmonics and
+    settings['nyquistGuardBand_pc'], None keeps all harmonics; pulses
+    resampled from settings['masterSampleRate_Hz'] are band limited to the
+    cutoff of resample and warned about harmonics in its transition band,
+    see getResamplePassband_pc) and then
+    the ones which are inaudible after scaling to settings['gain'] and
+    quantization (see getPruneVolume and settings['pruneFloor_dBFS'], None
+    keeps all harmonics).
+    Returns the pulses with the remaining harmonics and volumes, the
+    warnings about the harmonics above the Nyquist frequency and their
+    effect on the IEC 60601-1-8 harmonic rules and the pruned harmonics by
+    pulse name (empty if not pruned).
+    """
+    warnings = []
+    dBvalue = str(maxDiffSoundPressureToPulseFrequencyInDB)
+    guardBand_pc = settings['nyquistGuardBand_pc']
+    limitName = "the Nyquist frequency"
+    # pass band edge of the resampler in Hz (None: not resampled)
+    passband_Hz = None
+    masterSampleRate_Hz = settings['masterSampleRate_Hz']
+    if guardBand_pc is not None and masterSampleRate_Hz is not None and masterSampleRate_Hz != sampleRate_Hz and not settings['fixedPoint']:
+        # the resampler removes the harmonics above its cutoff
+        lowerNyquist_Hz = min(masterSampleRate_Hz, sampleRate_Hz) / 2.0
+        passband_Hz = lowerNyquist_Hz * getResamplePassband_pc() / 100.0
+        resampleGuardBand_pc = 100.0 - 100.0 * resampleCutoff * lowerNyquist_Hz / (sampleRate_Hz / 2.0)
+        if resampleGuardBand_pc > guardBand_pc:
+            guardBand_pc = resampleGuardBand_pc
+            limitName = "the cutoff of the resampler"
+    bandLimited = []
+    for name, baseFrequency, harmonics, volumes in pulses:
+        if guardBand_pc is None:
+            bandLimited.append((name, baseFrequency, harmonics, volumes))
+            continue
+        keptHarmonics, keptVolumes, removedHarmonics = bandLimitHarmonics(baseFrequency, harmonics, volumes, sampleRate_Hz, guardBand_pc)
+        if removedHarmonics:
+            # effect on the IEC 60601-1-8 harmonic rules
+            significant = countSignificantVolumesInsideDbRange(volumes, baseFrequency, harmonics)
+            keptSignificant = countSignificantVolumesInsideDbRange(keptVolumes, baseFrequency, keptHarmonics)
+            warnings.append("harmonics " + " ".join(removedHarmonics) + " of " + name + " pulse above " + limitName + " are not synthesized"
+                            + " (harmonics within +-" + dBvalue + "dB: " + str(significant) + " -> " + str(keptSignificant) + ")")
+            if hasEnoughHarmonics(baseFrequency, harmonics) and not hasEnoughHarmonics(baseFrequency, keptHarmonics):
+                warnings.append("less than required number of harmonics in range [300Hz, 4000Hz] in " + name + " pulse below " + limitName)
+            if significant >= 3 and keptSignificant < 3:
+                warnings.append("less than 4 harmonics with volumes +-" + dBvalue + "dB from base frequency's volume in " + name + " pulse below " + limitName)
+        if passband_Hz is not None:
+            attenuatedHarmonics = [h for h in keptHarmonics if int(h) * baseFrequency > passband_Hz]
+            if attenuatedHarmonics:
+                warnings.append("harmonics " + " ".join(attenuatedHarmonics) + " of " + name + " pulse are in the transition band of the resampler above "
+                                + "%.0f" % passband_Hz + "Hz and are attenuated by up to 6dB (synthesize at the sample rate to keep their levels)")
+        bandLimited.append((name, baseFrequency, keptHarmonics, keptVolumes))
+
+    prunedHarmonics = {}
+    if settings['pruneFloor_dBFS'] is None:
+        return bandLimited, warnings, prunedHarmonics
+    minVolume = getPruneVolume([volumes for _, _, _, volumes in bandLimited], settings['gain'], settings['pruneFloor_dBFS'])
+    pruned = []
+    for name, baseFrequency, harmonics, volumes in bandLimited:
+        keptHarmonics, keptVolumes, prunedHarmonics[name] = pruneHarmonics(harmonics, volumes, minVolume)
+        pruned.append((name, baseFrequency, keptHarmonics, keptVolumes))
+    return pruned, warnings, prunedHarmonics
+
+###############################################################################
+# plain Python synthesis (without numpy)
+
+# sine tables of one period by period length (see _getSineTable)
+_sineTables = {}
+
+def _getSineTable(period_samples):
+    """
+    Returns sin(2 pi j / period_samples) for j in [0; period_samples) as
+    array('d'); the tables are kept for reuse
+    """
+    table = _sineTables.get(period_samples)
+    if table is None:
+        table = array('d', [math.sin(2.0 * math.pi * j / period_samples) for j in range(period_samples)])
+        _sineTables[period_samples] = table
+    return table
+
+def createSineArray(frequency_Hz, volume, sampleRate_Hz, numberOfSamples):
+    """
+    Returns volume * sin(2 pi frequency_Hz i / sampleRate_Hz) for i in
+    [0; numberOfSamples) as array('d') without numpy.
+    With sampleRate_Hz / frequency_Hz = p / q (exact) the sine repeats
+    after p samples and sample i is entry (q * i) mod p of the sine table
+    of length p (see _getSineTable), i.e. the phase is an exact integer
+    and no interpolation is needed. If p <= numberOfSamples only one period
+    is looked up and repeated by the array, otherwise (e.g. frequencies
+    like 333.3Hz) math.sin is mapped over the samples (for a single sine
+    this is cheaper than an interpolated table, see
+    _createInterpolatedCarrier for the sum of many harmonics).
+    The samples deviate from math.sin(2 pi frequency_Hz * (i /
+    sampleRate_Hz)) only by the rounding of that argument, i.e. by less
+    than 2 pi frequency_Hz * (i / sampleRate_Hz) * 2^-53 (< 1e-12 for
+    pulses up to 1s and 4kHz).
+    """
+    ratio = fractions.Fraction(sampleRate_Hz) / fractions.Fraction(frequency_Hz)
+    period_samples = ratio.numerator
+    if period_samples <= numberOfSamples:
+        table = _getSineTable(period_samples)
+        q = ratio.denominator % period_samples
+        period = array('d', [volume * table[(q * j) % period_samples] for j in range(period_samples)])
+        return (period * (numberOfSamples // period_samples + 1))[:numberOfSamples]
+    step = 2.0 * math.pi * frequency_Hz / sampleRate_Hz
+    return array('d', [volume * sine for sine in map(math.sin, map(step.__mul__, range(numberOfSamples)))])
+
+def getInterpolatedTableLength(harmonics, volumes):
+    """
+    Returns the smallest power of two N (at least 64) for which the cubic
+    Hermite interpolation of _createInterpolatedCarrier stays below
+    interpolatedCarrierMaxError: (2 pi / N)^4 / 384 * sum(v * h^4)
+    """
+    derivative4 = sum(volume * int(h)**4 for h, volume in zip(harmonics, volumes))
+    length = 64
+    while (2.0 * math.pi / length)**4 / 384.0 * derivative4 > interpolatedCarrierMaxError:
+        length *= 2
+    return length
+
+def _createInterpolatedCarrier(baseFrequency_Hz, harmonics, volumes, sampleRate_Hz, numberOfSamples, tableLength):
+    """
+    Returns the sum of volume * sin(2 pi h baseFrequency_Hz i /
+    sampleRate_Hz) over the harmonics h for i in [0; numberOfSamples) as
+    array('d') without numpy, for base frequencies whose exact period is
+    longer than the pulse (see createSineArray).
+    One period of the base frequency is tabulated at tableLength (N, see
+    getInterpolatedTableLength) points: the sum W of all harmonics and its
+    derivative, both looked up in the sine table of length N (see
+    _getSineTable). Every sample is the cubic Hermite interpolation of W
+    between its two neighbouring table points, i.e. the cost is
+    O(N * harmonics + samples) instead of O(samples * harmonics). The
+    error is at most (2 pi / N)^4 / 384 * max|d^4 W / dx^4| <= (2 pi /
+    N)^4 / 384 * sum(v * h^4), i.e. below interpolatedCarrierMaxError.
+    """
+    table = _getSineTable(tableLength).tolist()
+    # cos(2 pi j / N) = sin(2 pi (j + N / 4) / N)
+    cosTable = table[tableLength // 4:] + table[:tableLength // 4]
+    sums = [0.0] * tableLength
+    # derivatives per table step
+    derivatives = [0.0] * tableLength
+    delta = 2.0 * math.pi / tableLength
+    for h, volume in zip(harmonics, volumes):
+        h = int(h)
+        # table[(h * j) mod N] for j in [0; N): the k-th time around the
+        # table starts at (-k * N) mod h and steps by h
+        sines = []
+        cosines = []
+        for k in range(h):
+            sines += table[(-k * tableLength) % h::h]
+            cosines += cosTable[(-k * tableLength) % h::h]
+        sums = list(map(operator.add, sums, map(volume.__mul__, sines)))
+        derivatives = list(map(operator.add, derivatives, map((volume * h * delta).__mul__, cosines)))
+    # cubic sums[j] + derivatives[j] t + a2[j] t^2 + a3[j] t^3 on [j; j + 1]
+    nextSums = sums[1:] + sums[:1]
+    nextDerivatives = derivatives[1:] + derivatives[:1]
+    differences = list(map(operator.sub, nextSums, sums))
+    a2 = list(map(operator.sub, map(operator.sub, map((3.0).__mul__, differences), map((2.0).__mul__, derivatives)), nextDerivatives))
+    a3 = list(map(operator.add, map(operator.add, map((-2.0).__mul__, differences), derivatives), nextDerivatives))
+    # position of every sample in the table and within its interval
+    step = tableLength * float(baseFrequency_Hz) / sampleRate_Hz
+    positions = list(map(operator.mod, map(step.__mul__, range(numberOfSamples)), [float(tableLength)] * numberOfSamples))
+    indices = list(map(int, positions))
+    t = list(map(operator.sub, positions, indices))
+    # itemgetter of a single index returns the value instead of a tuple
+    lookup = operator.itemgetter(*indices) if numberOfSamples > 1 else (lambda values: [values[i] for i in indices])
+    values = map(operator.mul, t, lookup(a3))
+    values = map(operator.mul, t, map(operator.add, lookup(a2), values))
+    values = map(operator.mul, t, map(operator.add, lookup(derivatives), values))
+    return array('d', map(operator.add, lookup(sums), values))
+
+###############################################################################
+
+class Silence:
+    """
+    A segment of silence that only stores its number of samples.
+    save_wav_segments writes it as zeroed blocks, i.e. the (possibly
+    millions of) zero samples are never created in memory. Iterating
+    yields the zero samples one by one; toArray() creates them all.
+    """
+    def __init__(self, numberOfSamples):
+        # like [0.0] * numberOfSamples a negative length is an empty silence
+        self._numberOfSamples = max(0, numberOfSamples)
+
+    def __len__(self):
+        return self._numberOfSamples
+
+    def __iter__(self):
+        return itertools.repeat(0.0, self._numberOfSamples)
+
+    def toArray(self):
+        if numpy is not None:
+            return numpy.zeros(self._numberOfSamples)
+        return [0.0] * self._numberOfSamples
 
 ###############################################################################
 
@@ -164,12 +500,16 @@ class Pulse:
     _pulseDuration_ms = None
     _riseTime_pc = None
     _fallTime_pc = None
+    _dtype = 'float64'
+    _useNumpy = numpy is not None
     
     # NOTE: 32767 = 0xFFFF / 2
-    def __init__(self, pulseDuration_ms = None, riseTime_pc = None, fallTime_pc = None, sampleRate_Hz = 8000, maxAbsAmplitude = 32767):
+    def __init__(self, pulseDuration_ms = None, riseTime_pc = None, fallTime_pc = None, sampleRate_Hz = 8000, maxAbsAmplitude = 32767, dtype = None):
         """sample_rate and bit_depth must be same across the audio file"""
         self.setSampleRate_Hz(sampleRate_Hz)
         self.setMaxAbsAmplitude(maxAbsAmplitude)
+        if dtype != None:
+            self.setDtype(dtype)
         if pulseDuration_ms != None:
             self.setPulseDuration_ms(pulseDuration_ms)
         if riseTime_pc != None:
@@ -184,6 +524,29 @@ class Pulse:
         
     def setMaxAbsAmplitude (self, maxAbsAmplitude):
         self._maxAbsAmplitude = maxAbsAmplitude
+
+    def setDtype(self, dtype):
+        """
+        Sets the numpy dtype of the created pulses: 'float64' (default) or
+        'float32' which halves their memory. The phases and sines are
+        still computed in float64 (a float32 phase of a long pulse would
+        be off by far more than 1 LSB), only the stored samples are
+        rounded to float32 (relative error 6e-8, i.e. < 0.002 LSB of a
+        16 bit sample). Without numpy the samples are always doubles.
+        """
+        if dtype not in ('float64', 'float32'):
+            raise ValueError('dtype must be float64 or float32')
+        self._dtype = dtype
+
+    def setUseNumpy(self, useNumpy):
+        """
+        Synthesizes with numpy (default if numpy is available) or with the
+        plain Python fallbacks (e.g. for the 'pure' backend, see
+        getSynthesisBackends), which return array('d') samples.
+        """
+        if useNumpy and numpy is None:
+            raise ValueError('numpy is not available')
+        self._useNumpy = useNumpy
         
     def _getSamplesFromMs(self, ms):
         """milliseconds to sample counts"""
@@ -229,26 +592,80 @@ class Pulse:
             raise ValueError('rise time in percent was not set')
         return int(self._fallTime_pc/100.0 * self._getPulseDuration_samples())
         
-    def createSilence(self, duration_ms = None):
+    def createSilence(self, duration_ms = None, lazy = False):
         """Creates a IEC60601-1-8 compliant silence between two pulses,
         i.e. the requested duration of the silence is shortened by 
         the rise and fall time part that is considered silence, too.
         See Terminology 'pulse spacing'.
-        Returns a 'silence array'"""
+        Returns a 'silence array' or a Silence segment if lazy is True"""
         if duration_ms == 0.0:
-            return []
+            return Silence(0) if lazy else []
         if duration_ms is None:
             # take 90% samples of the rise and of the fall as space is measured
             # from the 90% mark in the fall to the 90% mark in the rise
             numberOfSamples = self._getPulseSpacing_samples() - int((self._getRiseTime_samples() + self._getFallTime_samples()) * 0.9)
         else:
             numberOfSamples = self._getSamplesFromMs(duration_ms) - int((self._getRiseTime_samples() + self._getFallTime_samples()) * 0.9)
+        if lazy:
+            return Silence(numberOfSamples)
         silenceArray = [0.0] * numberOfSamples
         return silenceArray
 
+    def _getAmplitudeSlopes(self):
+        """
+        Returns the slopes (per sample) of the rising and the falling
+        amplitude as tuple (rSlope, fSlope). See _createAmplitudeProfile.
+        """
+        return 0.8 / self._getRiseTime_samples(), -0.8 / self._getFallTime_samples()
+
+    def _getAmplitudeProfileSegments_samples(self):
+        """
+        Returns the number of samples of the rising slope (t_0 to t_3),
+        of the full amplitude (t_3 to t_4) and of the falling slope
+        (t_4 to t_7) as tuple (rise, const, fall).
+        The rising slope contains all samples s >= 0 with rSlope * s <= 1.0,
+        the falling slope all samples s >= 0 with fSlope * s + 1.0 >= 0.0.
+        The rising samples from 90% on count towards the pulse duration,
+        the full amplitude covers the rest of the pulse duration up to the
+        start of the fall (1/8th of the fall time above the 90% mark).
+        """
+        rSlope, fSlope = self._getAmplitudeSlopes()
+
+        # last sample of the rising slope: the estimate of the division
+        # is corrected with the products the samples are computed with
+        # (both slopes are monotonic in floating point, too)
+        lastRise = int(1.0 / rSlope)
+        while rSlope * (lastRise + 1) <= 1.0:
+            lastRise += 1
+        while lastRise >= 0 and rSlope * lastRise > 1.0:
+            lastRise -= 1
+        # first sample of the rising slope at 90% or above (t_2)
+        first90 = int(0.9 / rSlope)
+        while first90 > 0 and rSlope * (first90 - 1) >= 0.9:
+            first90 -= 1
+        while rSlope * first90 < 0.9:
+            first90 += 1
+        riseSamples = lastRise + 1
+        pulseDuration_sample = self._getPulseDuration_samples() - max(0, lastRise - first90 + 1)
+
+        # fallTime_samples is the number of samples to fall from 90% to 10%
+        # i.e. fall by 80%. To fall by 10% (from 100% to 90%)
+        # we have 1/8th of fallTime_samples
+        startFall = self._getFallTime_samples()/8.0
+        # number of samples with full amplitude:
+        constSamples = max(0, int(pulseDuration_sample - startFall + 1))
+
+        # last sample of the falling slope
+        lastFall = int(-1.0 / fSlope)
+        while fSlope * (lastFall + 1) + 1.0 >= 0.0:
+            lastFall += 1
+        while lastFall >= 0 and fSlope * lastFall + 1.0 < 0.0:
+            lastFall -= 1
+        fallSamples = lastFall + 1
+
+        return riseSamples, constSamples, fallSamples
+
     def _createAmplitudeProfile(self):
-        ampArray = []
-    
         # Timing Model:
         #                           |<-------- t_s --------|
         #           t_3          t_4.                      .  
@@ -299,49 +716,25 @@ class Pulse:
         # i.e. 1 sample is the time unit
         
         # slopes: _getRise|FallTime_samples() != 0
-        rSlope =  0.8 / self._getRiseTime_samples()
-        fSlope = -0.8 / self._getFallTime_samples()    
-    
-        # counters:
-        pulseDuration_sample = self._getPulseDuration_samples()
-    
-        # create rising slope
-        sample = 0
-        while True:
-            # get the amplitude of the sample
-            amplification = rSlope * sample
-            sample += 1
-            if (amplification > 1.0):     # 100% amplification reached or t_3
-                # no amplification beyond 1.0 gets into ampArray
-                break
-            if (amplification >= 0.9):    # 90% amplification reached or t_2
-                pulseDuration_sample -= 1 # count down pulse duration
-            ampArray.append(amplification)
-    
-        # create flat amplitude
-        # fallTime_samples is the number of samples to fall from 90% to 10%
-        # i.e. fall by 80%. To fall by 10% (from 100% to 90%)
-        # we have 1/8th of fallTime_samples
-        startFall = self._getFallTime_samples()/8.0
-        # number of samples with full amplitude:
-        numberOfSamples = int(pulseDuration_sample - startFall + 1)
-        constAmplitudeArray = [1.0] * numberOfSamples
-        ampArray = ampArray + constAmplitudeArray # concatenate both arrays
-
-        # create falling slope
-        sample = 0
-        while True:
-            # get the amplitude of the sample
-            amplification = fSlope * sample + 1.0
-            sample += 1
-            if (amplification < 0.0):
-                break
-            ampArray.append(amplification)
+        rSlope, fSlope = self._getAmplitudeSlopes()
+        riseSamples, constSamples, fallSamples = self._getAmplitudeProfileSegments_samples()
+
+        # one preallocated array for the whole profile (full amplitude by
+        # default) into which the rising and falling slopes are written
+        if self._useNumpy:
+            ampArray = numpy.ones(riseSamples + constSamples + fallSamples)
+            ampArray[:riseSamples] = rSlope * numpy.arange(riseSamples)
+            ampArray[riseSamples + constSamples:] = fSlope * numpy.arange(fallSamples) + 1.0
+        else:
+            ampArray = [1.0] * (riseSamples + constSamples + fallSamples)
+            ampArray[:riseSamples] = [rSlope * sample for sample in range(riseSamples)]
+            ampArray[riseSamples + constSamples:] = [fSlope * sample + 1.0 for sample in range(fallSamples)]
 
         # assert all volumes in ampArray are in the range [0.0; 1.0]
-        if debug and not all(v <= 1.0 for v in ampArray):
+        # the slopes are monotonic, i.e. it suffices to check their ends
+        if debug and riseSamples > 0 and ampArray[riseSamples - 1] > 1.0:
             raise ValueError('One or more volumes in ampArray exceed 1.0 (100%) in rising slope')
-        if debug and not all(v >= 0.0 for v in ampArray):
+        if debug and fallSamples > 0 and ampArray[-1] < 0.0:
             raise ValueError('One or more volumes in ampArray are negative in rising slope')
         return ampArray
   
@@ -349,22 +742,317 @@ class Pulse:
         """
         Returns an array of samples with amplitudes in [-volume, volume]
         volume is expected to be btw. 0 and 1.0
+        If numpy is available the pulse is computed in one array expression
+        and returned as a contiguous numpy array of floats, otherwise it is
+        returned as array('d') (see createSineArray for the error bound).
         """
         amplitudeProfile = self._createAmplitudeProfile()
         volume = min(max(volume, 0.0), 1.0)
-        pulse = []
-        i = 0
-        for sample in amplitudeProfile:
-            # multiply i with 1.0 to make float (in case __future__ is not there)
-            value = sample * volume * math.sin(2.0 * math.pi * frequency_Hz * ( (1.0 * i) / self._sampleRate_Hz ))
-            pulse.append(value)
-            
+        if self._useNumpy:
+            # time vector in seconds; same operation order as the loop below
+            t = numpy.arange(len(amplitudeProfile)) / float(self._sampleRate_Hz)
+            pulse = numpy.asarray(amplitudeProfile, dtype=float) * volume * numpy.sin(2.0 * math.pi * frequency_Hz * t)
             # assert all values in range [0.0; 1.0]
-            if debug and (abs(value) > 1.0):
+            if debug and len(pulse) > 0 and numpy.abs(pulse).max() > 1.0:
                 raise ValueError('Wave sample out of range [0.0; 1.0]')
-            i += 1
+            return numpy.ascontiguousarray(pulse, dtype=self._dtype)
+        # without numpy: sine table lookups (see createSineArray) multiplied
+        # with the amplitude profile by map
+        wave = createSineArray(frequency_Hz, volume, self._sampleRate_Hz, len(amplitudeProfile))
+        pulse = array('d', map(operator.mul, amplitudeProfile, wave))
+        # assert all values in range [0.0; 1.0]
+        if debug and len(pulse) > 0 and max(map(abs, pulse)) > 1.0:
+            raise ValueError('Wave sample out of range [0.0; 1.0]')
         return pulse
 
+    def createHarmonicWave(self, baseFrequency_Hz, harmonics, volumes):
+        """
+        Returns the sum of the waves of all harmonics (integers or integers
+        represented as strings) of baseFrequency_Hz with the given volumes
+        (each limited to [0.0; 1.0]) and its maximum absolute amplitude as
+        tuple (pulse, maxAbs).
+        This equals the merge of createWave for every harmonic by
+        PulseMerger without creating one pulse per harmonic (see
+        _createCarrier).
+        """
+        if len(harmonics) != len(volumes):
+            raise ValueError('Equal number of harmonics and volumes required')
+        volumes = [min(max(volume, 0.0), 1.0) for volume in volumes]
+        amplitudeProfile = self._createAmplitudeProfile()
+        numberOfSamples = len(amplitudeProfile)
+        pulse = self._createCarrier(baseFrequency_Hz, harmonics, volumes, numberOfSamples)
+        if self._useNumpy:
+            pulse *= amplitudeProfile
+            maxAbs = numpy.abs(pulse).max() if numberOfSamples > 0 else 0
+            return pulse, maxAbs
+        pulse = array('d', map(operator.mul, pulse, amplitudeProfile))
+        maxAbs = max(map(abs, pulse)) if numberOfSamples > 0 else 0
+        return pulse, maxAbs
+
+    def _createCarrier(self, baseFrequency_Hz, harmonics, volumes, numberOfSamples):
+        """
+        Returns the first numberOfSamples samples of the carrier, i.e. the
+        sum of the sines of the harmonics of baseFrequency_Hz with volumes
+        (numpy array or array('d')) without amplitude profile. With numpy
+        the harmonics are synthesized as (harmonics x samples) blocks of
+        synthesisBlock_samples samples. Without numpy the harmonics are
+        accumulated over one period of their sum (see getPeriod_samples
+        and createSineArray) which is repeated across the samples, or, if
+        the period is longer than numberOfSamples, interpolated from a
+        table of one period of the base frequency (see
+        _createInterpolatedCarrier) if this is cheaper than a sine per
+        harmonic and sample (see interpolatedCarrierSampleCost).
+        """
+        frequencies_Hz = [baseFrequency_Hz * int(h) for h in harmonics]
+        if self._useNumpy:
+            omegas = 2.0 * math.pi * numpy.array(frequencies_Hz, dtype=float)
+            volumes = numpy.array(volumes, dtype=float)
+            carrier = numpy.empty(numberOfSamples, dtype=self._dtype)
+            for start in range(0, numberOfSamples, synthesisBlock_samples):
+                stop = min(start + synthesisBlock_samples, numberOfSamples)
+                t = numpy.arange(start, stop) / float(self._sampleRate_Hz)
+                carrier[start:stop] = volumes.dot(numpy.sin(numpy.outer(omegas, t)))
+            return carrier
+        period_samples = self.getPeriod_samples(baseFrequency_Hz) if numberOfSamples > 0 else 0
+        if period_samples > numberOfSamples:
+            tableLength = getInterpolatedTableLength(harmonics, volumes)
+            # the table and the interpolation vs. a sine per harmonic and sample
+            if tableLength * len(harmonics) + interpolatedCarrierSampleCost * numberOfSamples < len(harmonics) * numberOfSamples:
+                return _createInterpolatedCarrier(baseFrequency_Hz, harmonics, volumes, self._sampleRate_Hz, numberOfSamples, tableLength)
+            period_samples = numberOfSamples
+        # accumulate one period of all harmonics (the period of every
+        # harmonic divides it) and repeat it
+        period = array('d', [0.0]) * period_samples
+        for frequency_Hz, volume in zip(frequencies_Hz, volumes):
+            period = array('d', map(operator.add, period, createSineArray(frequency_Hz, volume, self._sampleRate_Hz, period_samples)))
+        if period_samples == numberOfSamples:
+            return period
+        return (period * (numberOfSamples // period_samples + 1))[:numberOfSamples]
+
+    def getPeriod_samples(self, baseFrequency_Hz):
+        """
+        Returns the number of samples after which the sum of all harmonics
+        of baseFrequency_Hz repeats exactly: with sampleRate_Hz /
+        baseFrequency_Hz = p / q (exact, also for non integer periods) q
+        periods of the base frequency take exactly p samples.
+        """
+        return (fractions.Fraction(self._sampleRate_Hz) / fractions.Fraction(baseFrequency_Hz)).numerator
+
+    def getLevels(self, baseFrequency_Hz, harmonics, volumes):
+        """
+        Returns the RMS and the A-weighted RMS (see aWeighting_dB) of the
+        pulse createHarmonicWave synthesizes for these harmonics, computed
+        from the synthesis parameters instead of the samples: the mean
+        square of the amplitude profile (linear slopes, i.e. a closed form
+        over its segments) times the mean square v^2/2 of each harmonic.
+        The volumes of a harmonic listed more than once are summed first
+        (its sines add in phase). Harmonics above the Nyquist frequency are
+        expected to be removed (see bandLimitHarmonics).
+        """
+        riseSamples, constSamples, fallSamples = self._getAmplitudeProfileSegments_samples()
+        numberOfSamples = riseSamples + constSamples + fallSamples
+        if numberOfSamples == 0:
+            return 0.0, 0.0
+        rSlope, fSlope = self._getAmplitudeSlopes()
+        # sum of (r k)^2 and (1 + f k)^2 over k in [0; n) of both slopes
+        R = riseSamples
+        F = fallSamples
+        profileSquares = rSlope**2 * (R - 1) * R * (2 * R - 1) / 6.0 + constSamples + \
+                         F + fSlope * F * (F - 1) + fSlope**2 * (F - 1) * F * (2 * F - 1) / 6.0
+        harmonicVolumes = {}
+        for h, volume in zip(harmonics, volumes):
+            harmonicVolumes[int(h)] = harmonicVolumes.get(int(h), 0.0) + min(max(volume, 0.0), 1.0)
+        meanSquare = 0.0
+        meanSquareA = 0.0
+        for h, volume in harmonicVolumes.items():
+            meanSquare += volume**2 / 2.0
+            meanSquareA += (volume * 10.0**(aWeighting_dB(baseFrequency_Hz * h) / 20.0))**2 / 2.0
+        profileMeanSquare = profileSquares / numberOfSamples
+        return math.sqrt(meanSquare * profileMeanSquare), math.sqrt(meanSquareA * profileMeanSquare)
+
+    def createHarmonicWaveTiled(self, baseFrequency_Hz, harmonics, volumes):
+        """
+        Returns (pulse, maxAbs) like createHarmonicWave, but synthesizes
+        only one period of the sum of the harmonics (see getPeriod_samples)
+        and repeats it across the pulse before applying the amplitude
+        profile, i.e. the cost is O(period * harmonics + samples) instead
+        of O(samples * harmonics). Falls back to createHarmonicWave if the
+        period is not shorter than the pulse (e.g. for a base frequency
+        like 333.3Hz whose period is no fraction of small integers).
+        The samples equal the ones of createHarmonicWave up to rounding
+        (the sines are computed at the time within the period).
+        """
+        if len(harmonics) != len(volumes):
+            raise ValueError('Equal number of harmonics and volumes required')
+        amplitudeProfile = self._createAmplitudeProfile()
+        numberOfSamples = len(amplitudeProfile)
+        period_samples = self.getPeriod_samples(baseFrequency_Hz)
+        if period_samples >= numberOfSamples:
+            return self.createHarmonicWave(baseFrequency_Hz, harmonics, volumes)
+        volumes = [min(max(volume, 0.0), 1.0) for volume in volumes]
+        period = self._createCarrier(baseFrequency_Hz, harmonics, volumes, period_samples)
+        if self._useNumpy:
+            # numpy.resize repeats the period
+            pulse = numpy.resize(period.astype(self._dtype), numberOfSamples)
+            pulse *= amplitudeProfile
+            maxAbs = numpy.abs(pulse).max() if numberOfSamples > 0 else 0
+            return pulse, maxAbs
+        # the array repeats the period (as in createSineArray)
+        carrier = (period * (numberOfSamples // period_samples + 1))[:numberOfSamples]
+        pulse = array('d', map(operator.mul, carrier, amplitudeProfile))
+        maxAbs = max(map(abs, pulse)) if numberOfSamples > 0 else 0
+        return pulse, maxAbs
+
+    def createHarmonicWaveIFFT(self, baseFrequency_Hz, harmonics, volumes):
+        """
+        Returns (pulse, maxAbs) like createHarmonicWave, but creates one
+        period of the carrier (see getPeriod_samples) by one inverse FFT
+        of length period: harmonic h (q periods of the base frequency in p
+        samples) is the bin q * h with its volume; bins beyond the Nyquist
+        frequency are folded back like the direct synthesis aliases them.
+        The cost is O(period * log(period) + samples) for any number of
+        harmonics. The period is tiled as in createHarmonicWaveTiled.
+        Falls back to createHarmonicWaveTiled without numpy or if the
+        period has prime factors > 7 (slow FFT lengths; periods of integer
+        base frequencies divide the sample rate and are fine).
+        """
+        if len(harmonics) != len(volumes):
+            raise ValueError('Equal number of harmonics and volumes required')
+        period_samples = self.getPeriod_samples(baseFrequency_Hz)
+        amplitudeProfile = self._createAmplitudeProfile()
+        numberOfSamples = len(amplitudeProfile)
+        if not self._useNumpy or not _isFastFFTLength(period_samples) or period_samples >= numberOfSamples:
+            return self.createHarmonicWaveTiled(baseFrequency_Hz, harmonics, volumes)
+        q = (fractions.Fraction(self._sampleRate_Hz) / fractions.Fraction(baseFrequency_Hz)).denominator
+        bins = (q * numpy.array([int(h) for h in harmonics])) % period_samples
+        volumes = numpy.clip(numpy.array(volumes, dtype=float), 0.0, 1.0)
+        # sin(2 pi (p - m) j / p) = -sin(2 pi m j / p); bin 0 and p / 2 are 0
+        folded = bins > period_samples / 2.0
+        bins = numpy.where(folded, period_samples - bins, bins)
+        volumes = numpy.where(folded, -volumes, volumes)
+        spectrum = numpy.zeros(period_samples // 2 + 1, dtype=complex)
+        # a sine of amplitude a in bin m of an N point irfft is -1j * a * N / 2
+        numpy.add.at(spectrum, bins, -0.5j * period_samples * volumes)
+        spectrum[0] = 0
+        if period_samples % 2 == 0:
+            spectrum[-1] = 0
+        period = numpy.fft.irfft(spectrum, period_samples)
+        pulse = numpy.resize(period.astype(self._dtype), numberOfSamples)
+        pulse *= amplitudeProfile
+        maxAbs = numpy.abs(pulse).max() if numberOfSamples > 0 else 0
+        return pulse, maxAbs
+
+    def _createCarrierRecurrence(self, baseFrequency_Hz, harmonics, volumes, numberOfSamples):
+        """
+        Returns the first numberOfSamples samples of the carrier like
+        _createCarrier, but computes only sin(theta) and cos(theta) of the
+        base frequency per sample; the harmonics follow from the Chebyshev
+        recurrence sin((n + 1) theta) = 2 cos(theta) sin(n theta) -
+        sin((n - 1) theta).
+        """
+        # summed volume per harmonic number (index 0 is silent: sin(0) = 0)
+        maxHarmonic = max([int(h) for h in harmonics] + [0])
+        weights = [0.0] * (maxHarmonic + 1)
+        for h, volume in zip(harmonics, volumes):
+            weights[int(h)] += volume
+        omega = 2.0 * math.pi * baseFrequency_Hz
+        if self._useNumpy:
+            theta = omega * (numpy.arange(numberOfSamples) / float(self._sampleRate_Hz))
+            twoCos = 2.0 * numpy.cos(theta)
+            previous = numpy.zeros(numberOfSamples)
+            current = numpy.sin(theta)
+            carrier = numpy.zeros(numberOfSamples)
+            for n in range(1, maxHarmonic + 1):
+                if weights[n] != 0.0:
+                    carrier += weights[n] * current
+                previous, current = current, twoCos * current - previous
+            return carrier
+        carrier = array('d', [0.0]) * numberOfSamples
+        for i in range(numberOfSamples):
+            theta = omega * ((1.0 * i) / self._sampleRate_Hz)
+            twoCos = 2.0 * math.cos(theta)
+            previous = 0.0
+            current = math.sin(theta)
+            value = 0.0
+            for n in range(1, maxHarmonic + 1):
+                value += weights[n] * current
+                previous, current = current, twoCos * current - previous
+            carrier[i] = value
+        return carrier
+
+    def createHarmonicWaveRecurrence(self, baseFrequency_Hz, harmonics, volumes):
+        """
+        Returns (pulse, maxAbs) like createHarmonicWave, but without a sine
+        per harmonic and sample (see _createCarrierRecurrence). Each
+        harmonic up to 40 deviates by at most ~1e-11 from math.sin at
+        96kHz (see recurrencePrecisionReport), i.e. far below 1 LSB of a
+        16 bit sample.
+        """
+        if len(harmonics) != len(volumes):
+            raise ValueError('Equal number of harmonics and volumes required')
+        volumes = [min(max(volume, 0.0), 1.0) for volume in volumes]
+        amplitudeProfile = self._createAmplitudeProfile()
+        numberOfSamples = len(amplitudeProfile)
+        pulse = self._createCarrierRecurrence(baseFrequency_Hz, harmonics, volumes, numberOfSamples)
+        if self._useNumpy:
+            pulse = pulse.astype(self._dtype, copy=False)
+            pulse *= amplitudeProfile
+            maxAbs = numpy.abs(pulse).max() if numberOfSamples > 0 else 0
+            return pulse, maxAbs
+        pulse = array('d', map(operator.mul, pulse, amplitudeProfile))
+        maxAbs = max(map(abs, pulse)) if numberOfSamples > 0 else 0
+        return pulse, maxAbs
+
+    def createHarmonicWaveQ15(self, baseFrequency_Hz, harmonics, volumes):
+        """
+        Returns (pulse, maxAbs) like createHarmonicWave in fixed point: the
+        pulse is an int32 array (numpy or array('i')) in Q15, i.e. 32768
+        is 1.0, and maxAbs is an integer.
+        Fixed point semantics (as in a firmware mixer):
+        - sines, volumes and the amplitude profile are rounded to Q15 and
+          saturated to [-32768; 32767] (see toQ15); the sines of one
+          carrier period are a table with exact integer phases (see
+          createSineArray)
+        - a product of two Q15 values is (a * b + 0x4000) >> 15 with an
+          arithmetic shift, i.e. rounded half up
+        - the harmonics are accumulated in int32 without saturation (the
+          sum of up to 65535 harmonics cannot overflow); saturation to
+          int16 happens when the gain is applied (see scaleSamplesQ15)
+        """
+        if len(harmonics) != len(volumes):
+            raise ValueError('Equal number of harmonics and volumes required')
+        volumesQ15 = toQ15([min(max(volume, 0.0), 1.0) for volume in volumes])
+        amplitudeProfile = toQ15(self._createAmplitudeProfile())
+        numberOfSamples = len(amplitudeProfile)
+        ratio = fractions.Fraction(self._sampleRate_Hz) / fractions.Fraction(baseFrequency_Hz)
+        period_samples = ratio.numerator
+        if period_samples >= numberOfSamples:
+            # no repetition within the pulse: the "table" is the pulse
+            period_samples = numberOfSamples
+        if self._useNumpy:
+            j = numpy.arange(period_samples, dtype=numpy.int64)
+            carrier = numpy.zeros(period_samples, dtype=numpy.int32)
+            for h, volumeQ15 in zip(harmonics, volumesQ15):
+                # the same sines as createSineArray
+                harmonicRatio = fractions.Fraction(self._sampleRate_Hz) / fractions.Fraction(baseFrequency_Hz * int(h))
+                if harmonicRatio.numerator <= period_samples:
+                    p = harmonicRatio.numerator
+                    sines = numpy.sin(2.0 * math.pi * ((harmonicRatio.denominator % p) * j % p) / p)
+                else:
+                    sines = numpy.sin((2.0 * math.pi * baseFrequency_Hz * int(h) / self._sampleRate_Hz) * j)
+                carrier += (toQ15(sines) * int(volumeQ15) + 0x4000) >> 15
+            carrier = numpy.resize(carrier, numberOfSamples).astype(numpy.int64)
+            pulse = ((carrier * amplitudeProfile + 0x4000) >> 15).astype(numpy.int32)
+            maxAbs = int(numpy.abs(pulse).max()) if numberOfSamples > 0 else 0
+            return pulse, maxAbs
+        carrier = [0] * period_samples
+        for h, volumeQ15 in zip(harmonics, volumesQ15):
+            sinesQ15 = toQ15(createSineArray(baseFrequency_Hz * int(h), 1.0, self._sampleRate_Hz, period_samples))
+            carrier = [c + ((sine * volumeQ15 + 0x4000) >> 15) for c, sine in zip(carrier, sinesQ15)]
+        pulse = array('i', [(carrier[i % period_samples] * a + 0x4000) >> 15 for i, a in enumerate(amplitudeProfile)])
+        maxAbs = max(map(abs, pulse)) if numberOfSamples > 0 else 0
+        return pulse, maxAbs
+
 # \details Inherits from Pulse and adds setters and range checkers
 #          as specified by IEC_60601_1_8. Setting a out of range value
 #          is allowed however a warning will be printed.
@@ -460,14 +1148,202 @@ class IEC_60601_1_8_Pulse(Pulse):
         return riseTime_samples + fallTime_samples <= pulseSpacing_samples
 
 
+def _withoutNumpy(pulse):
+    """returns a copy of pulse which synthesizes in plain Python"""
+    plainPulse = copy.copy(pulse)
+    plainPulse.setUseNumpy(False)
+    return plainPulse
+
+def recurrencePrecisionReport(sampleRate_Hz = 96000, baseFrequency_Hz = 1000, harmonics = range(1, 41), pulseDuration_ms = 250):
+    """
+    Prints and returns the maximum absolute deviation of every harmonic
+    created by the recurrence of Pulse._createCarrierRecurrence (with
+    numpy if available and in plain Python) from math.sin over a pulse of
+    pulseDuration_ms at sampleRate_Hz as list of tuples (harmonic,
+    numpy deviation or None, plain Python deviation).
+    """
+    pulse = Pulse(pulseDuration_ms, 10, 10, sampleRate_Hz)
+    numberOfSamples = pulse._getPulseDuration_samples()
+    report = []
+    print "harmonic  numpy      plain Python   (" + str(numberOfSamples) + " samples at " + str(sampleRate_Hz) + "Hz)"
+    for h in harmonics:
+        reference = [math.sin(2.0 * math.pi * baseFrequency_Hz * int(h) * ((1.0 * i) / sampleRate_Hz)) for i in range(numberOfSamples)]
+        numpyDeviation = None
+        if numpy is not None:
+            carrier = pulse._createCarrierRecurrence(baseFrequency_Hz, [h], [1.0], numberOfSamples)
+            numpyDeviation = numpy.abs(carrier - numpy.array(reference)).max()
+        carrier = _withoutNumpy(pulse)._createCarrierRecurrence(baseFrequency_Hz, [h], [1.0], numberOfSamples)
+        pureDeviation = getMax(abs(value - r) for value, r in zip(carrier, reference))
+        print "%8d  %-9s  %.3g" % (int(h), "%.3g" % numpyDeviation if numpyDeviation is not None else "-", pureDeviation)
+        report.append((int(h), numpyDeviation, pureDeviation))
+    return report
+
+###############################################################################
+# synthesis backends: every backend creates (pulse, maxAbs) like
+# Pulse.createHarmonicWave
+
+def _carrierLoop(omegas, volumes, sampleRate_Hz, carrier):
+    """the carrier of Pulse._createCarrier as plain loops (for numba)"""
+    for i in range(carrier.shape[0]):
+        t = i / sampleRate_Hz
+        value = 0.0
+        for k in range(omegas.shape[0]):
+            value += volumes[k] * math.sin(omegas[k] * t)
+        carrier[i] = value
+
+_numbaCarrierLoop = None
+
+def _createHarmonicWaveNumba(pulse, baseFrequency_Hz, harmonics, volumes):
+    global _numbaCarrierLoop
+    if len(harmonics) != len(volumes):
+        raise ValueError('Equal number of harmonics and volumes required')
+    if _numbaCarrierLoop is None:
+        _numbaCarrierLoop = numba.njit(_carrierLoop)
+    amplitudeProfile = pulse._createAmplitudeProfile()
+    omegas = 2.0 * math.pi * numpy.array([baseFrequency_Hz * int(h) for h in harmonics], dtype=float)
+    volumes = numpy.clip(numpy.array(volumes, dtype=float), 0.0, 1.0)
+    wave = numpy.empty(len(amplitudeProfile))
+    _numbaCarrierLoop(omegas, volumes, float(pulse._sampleRate_Hz), wave)
+    wave = wave.astype(pulse._dtype, copy=False)
+    wave *= amplitudeProfile
+    maxAbs = numpy.abs(wave).max() if len(wave) > 0 else 0
+    return wave, maxAbs
+
+def _createHarmonicWavePure(pulse, baseFrequency_Hz, harmonics, volumes):
+    wave, maxAbs = _withoutNumpy(pulse).createHarmonicWave(baseFrequency_Hz, harmonics, volumes)
+    if numpy is not None:
+        wave = numpy.array(wave, dtype=pulse._dtype)
+    return wave, maxAbs
+
+def _isFastFFTLength(length):
+    """returns True if length has no prime factors > 7"""
+    for factor in (2, 3, 5, 7):
+        while length % factor == 0:
+            length //= factor
+    return length == 1
+
+# name: (create function, is available, cost function); the cost functions
+# return the work (in units of the backend) of a pulse of S samples with H
+# harmonics and a carrier period of P samples or None if the backend would
+# fall back to another one
+_synthesisBackends = collections.OrderedDict([
+    ('pure',       (_createHarmonicWavePure,
+                    lambda: True,
+                    # see Pulse._createCarrier (the interpolation table is
+                    # short compared to the pulse)
+                    lambda S, H, P: P * H + S if P <= S else min(S * H, interpolatedCarrierSampleCost * S))),
+    ('numpy',      (lambda pulse, *arguments: pulse.createHarmonicWave(*arguments),
+                    lambda: numpy is not None,
+                    lambda S, H, P: S * H)),
+    ('tiled',      (lambda pulse, *arguments: pulse.createHarmonicWaveTiled(*arguments),
+                    lambda: True,
+                    lambda S, H, P: P * H + S if P < S else None)),
+    ('ifft',       (lambda pulse, *arguments: pulse.createHarmonicWaveIFFT(*arguments),
+                    lambda: numpy is not None,
+                    lambda S, H, P: P * math.log(P + 1, 2) + S if P < S and _isFastFFTLength(P) else None)),
+    ('recurrence', (lambda pulse, *arguments: pulse.createHarmonicWaveRecurrence(*arguments),
+                    lambda: True,
+                    lambda S, H, P: S * H)),
+    ('numba',      (_createHarmonicWaveNumba,
+                    lambda: numpy is not None and numba is not None,
+                    lambda S, H, P: S * H)),
+])
+
+# (overhead_s, seconds per unit of work) of every backend measured by
+# benchmarkSynthesisBackends
+_synthesisBenchmark = collections.OrderedDict()
+
+def getSynthesisBackends():
+    """Returns the names of the synthesis backends available here"""
+    return [name for name, (create, isAvailable, cost) in _synthesisBackends.items() if isAvailable()]
+
+def benchmarkSynthesisBackends():
+    """
+    Measures every available backend with a short and a long pulse and
+    returns (and caches for this process) the fitted (overhead_s, seconds
+    per unit of work) of every backend
+    """
+    if _synthesisBenchmark:
+        return _synthesisBenchmark
+    # 400Hz at 48kHz: period of 120 samples
+    runs = [(Pulse(10, 10, 10, 48000), 4), (Pulse(100, 10, 10, 48000), 32)]
+    for name in getSynthesisBackends():
+        create, isAvailable, cost = _synthesisBackends[name]
+        measurements = []
+        for pulse, numberOfHarmonics in runs:
+            harmonics = range(1, numberOfHarmonics + 1)
+            volumes = [1.0 / numberOfHarmonics] * numberOfHarmonics
+            numberOfSamples = sum(pulse._getAmplitudeProfileSegments_samples())
+            work = cost(numberOfSamples, numberOfHarmonics, pulse.getPeriod_samples(400))
+            # best of 3 (the first run includes e.g. the numba compilation)
+            duration_s = None
+            for repetition in range(3):
+                start = time.time()
+                create(pulse, 400, harmonics, volumes)
+                elapsed_s = time.time() - start
+                duration_s = elapsed_s if duration_s is None else min(duration_s, elapsed_s)
+            measurements.append((work, duration_s))
+        (work1, duration1_s), (work2, duration2_s) = measurements
+        if duration2_s > duration1_s:
+            perWork_s = (duration2_s - duration1_s) / (work2 - work1)
+            overhead_s = max(duration1_s - perWork_s * work1, 0.0)
+        else:
+            # too fast to separate the overhead
+            perWork_s = duration2_s / work2
+            overhead_s = 0.0
+        _synthesisBenchmark[name] = (overhead_s, perWork_s)
+    return _synthesisBenchmark
+
+def selectSynthesisBackend(pulse, baseFrequency_Hz, numberOfHarmonics):
+    """
+    Returns the name of the backend with the lowest estimated time for the
+    pulse: the cost model of every backend (from the number of samples,
+    harmonics and the carrier period) scaled by benchmarkSynthesisBackends
+    """
+    numberOfSamples = sum(pulse._getAmplitudeProfileSegments_samples())
+    period_samples = pulse.getPeriod_samples(baseFrequency_Hz)
+    best = None
+    for name, (overhead_s, perWork_s) in benchmarkSynthesisBackends().items():
+        work = _synthesisBackends[name][2](numberOfSamples, numberOfHarmonics, period_samples)
+        if work is None:
+            continue
+        estimate_s = overhead_s + perWork_s * work
+        if best is None or estimate_s < best[0]:
+            best = (estimate_s, name)
+    return best[1]
+
+def synthesizeHarmonicWave(pulse, baseFrequency_Hz, harmonics, volumes, backend = None):
+    """
+    Returns (pulse, maxAbs) of pulse.createHarmonicWave(baseFrequency_Hz,
+    harmonics, volumes) created by the backend with the given name (see
+    getSynthesisBackends), by the fastest one if backend is 'auto' or by
+    synthesisBackend if backend is None. All backends agree up to rounding
+    errors (~1e-11).
+    """
+    if backend is None:
+        backend = synthesisBackend
+    if backend == 'auto':
+        backend = selectSynthesisBackend(pulse, baseFrequency_Hz, len(harmonics))
+    if backend not in _synthesisBackends:
+        raise ValueError('unknown synthesis backend ' + str(backend) + ', available: ' + ", ".join(getSynthesisBackends()))
+    create, isAvailable, cost = _synthesisBackends[backend]
+    if not isAvailable():
+        raise ValueError('synthesis backend ' + backend + ' is not available, available: ' + ", ".join(getSynthesisBackends()))
+    return create(pulse, baseFrequency_Hz, harmonics, volumes)
+
 ###############################################################################
 
 class PulseMerger:
     """
     Merges pulses which must have the same number of samples
     """
-    def __init__(self, pulses):
+    def __init__(self, pulses, dtype = None):
+        """
+        if dtype (e.g. 'float32') is given, merge returns a numpy array
+        of this dtype (if numpy is available) instead of a list
+        """
         self._pulses = pulses
+        self._dtype = dtype
         self._maxHarmonic = len(pulses) - 1
         for i in range(self._maxHarmonic):
             if (len(pulses[self._maxHarmonic]) != len(pulses[i])):
@@ -477,16 +1353,22 @@ class PulseMerger:
         """
         Pulses is an array of pulses with different harmonics
         """
-        audio = []
-        self._maxAbs = 0
-        for i, sample1 in enumerate(self._pulses[self._maxHarmonic]):
-            sample = sample1
+        if numpy is not None:
+            # sum in the same order as the loop below
+            merged = numpy.array(self._pulses[self._maxHarmonic], dtype=self._dtype or float)
             for harmonic in range(self._maxHarmonic):
-                sample += self._pulses[harmonic][i]
-            if (abs(sample) > self._maxAbs):
-                self._maxAbs = abs(sample)
-            audio.append(sample)
-        return audio
+                merged += self._pulses[harmonic]
+            self._maxAbs = numpy.abs(merged).max() if len(merged) > 0 else 0
+            if self._dtype is not None:
+                return merged
+            # a list as without numpy
+            return merged.tolist()
+        # without numpy: accumulate into one array('d') by map
+        merged = array('d', self._pulses[self._maxHarmonic])
+        for harmonic in range(self._maxHarmonic):
+            merged = array('d', map(operator.add, merged, self._pulses[harmonic]))
+        self._maxAbs = max(map(abs, merged)) if len(merged) > 0 else 0
+        return merged.tolist()
 
     def getMaxVolume(self):
         return self._maxAbs
@@ -494,16 +1376,412 @@ class PulseMerger:
         
     
 
+###############################################################################
+
+def _besselI0(x):
+    """modified Bessel function of the first kind of order 0 (power series)"""
+    term = 1.0
+    result = 1.0
+    k = 1
+    while term > 1e-17 * result:
+        term *= (x / (2.0 * k))**2
+        result += term
+        k += 1
+    return result
+
+def _getResampleFilter(L, M):
+    """
+    Returns (taps, coefficients) of the polyphase filter of resample:
+    coefficients[p][j] weights the input sample taps[j] (relative to the
+    input sample before the output sample) for the output samples of phase
+    p, i.e. with a fractional input position of p / L.
+    """
+    # cutoff in cycles per input sample (anti aliasing when downsampling)
+    cutoff = 0.5 * resampleCutoff * min(1.0, float(L) / M)
+    # half width of the windowed sinc in input samples
+    halfWidth = resampleHalfLength / (2.0 * cutoff)
+    K = int(math.ceil(halfWidth))
+    taps = list(range(-K + 1, K + 1))
+    if numpy is not None:
+        t = numpy.array(taps, dtype=float)[numpy.newaxis, :] - numpy.arange(L)[:, numpy.newaxis] / float(L)
+        x = numpy.clip(t / halfWidth, -1.0, 1.0)
+        window = numpy.i0(resampleKaiserBeta * numpy.sqrt(1.0 - x * x)) / numpy.i0(resampleKaiserBeta)
+        coefficients = 2.0 * cutoff * numpy.sinc(2.0 * cutoff * t) * window * (numpy.abs(t) < halfWidth)
+        # DC gain 1 for every phase
+        coefficients /= coefficients.sum(axis=1)[:, numpy.newaxis]
+        return taps, coefficients
+    coefficients = []
+    i0Beta = _besselI0(resampleKaiserBeta)
+    for p in range(L):
+        row = []
+        for j in taps:
+            t = j - float(p) / L
+            if abs(t) >= halfWidth:
+                row.append(0.0)
+                continue
+            x = t / halfWidth
+            window = _besselI0(resampleKaiserBeta * math.sqrt(1.0 - x * x)) / i0Beta
+            sinc = math.sin(math.pi * 2.0 * cutoff * t) / (math.pi * 2.0 * cutoff * t) if t != 0 else 1.0
+            row.append(2.0 * cutoff * sinc * window)
+        total = sum(row)
+        coefficients.append([c / total for c in row])
+    return taps, coefficients
+
+def resample(samples, fromSampleRate_Hz, toSampleRate_Hz, numberOfSamples = None):
+    """
+    Resamples samples from fromSampleRate_Hz to toSampleRate_Hz by a
+    polyphase rational resampler: with toSampleRate_Hz / fromSampleRate_Hz
+    = L / M (exact) output sample n is the Kaiser windowed sinc
+    interpolation of the input at n * M / L. The filter is a low pass at
+    resampleCutoff of the lower Nyquist frequency, i.e. frequencies above
+    the Nyquist frequency of toSampleRate_Hz are suppressed. Samples
+    before and after samples are 0.
+    Returns numberOfSamples (default: len(samples) * L / M) samples (as
+    numpy array if numpy is available and as list otherwise).
+    """
+    ratio = fractions.Fraction(int(toSampleRate_Hz), int(fromSampleRate_Hz))
+    L = ratio.numerator
+    M = ratio.denominator
+    if numberOfSamples is None:
+        numberOfSamples = len(samples) * L // M
+    taps, coefficients = _getResampleFilter(L, M)
+    if numpy is not None:
+        positions = numpy.arange(numberOfSamples, dtype=numpy.int64) * M
+        first = positions // L
+        phases = positions % L
+        K = -taps[0]
+        # pad so that every tap of every output sample is inside
+        padded = numpy.zeros(K + max(len(samples), (first[-1] + 1) if numberOfSamples > 0 else 0) + len(taps))
+        padded[K:K + len(samples)] = samples
+        resampled = numpy.zeros(numberOfSamples)
+        # one vectorized pass per tap
+        for index, j in enumerate(taps):
+            resampled += coefficients[phases, index] * padded[first + j + K]
+        return resampled
+    resampled = []
+    for n in range(numberOfSamples):
+        first, phase = divmod(n * M, L)
+        row = coefficients[phase]
+        value = 0.0
+        for index, j in enumerate(taps):
+            if 0 <= first + j < len(samples):
+                value += row[index] * samples[first + j]
+        resampled.append(value)
+    return resampled
+
+###############################################################################
+
+class PulseCache:
+    """
+    Content addressed cache of pulses created by Pulse.createHarmonicWave.
+    The key is a hash of every parameter that affects the merged pulse
+    (sample rate, pulse duration, rise and fall time, base frequency,
+    harmonics, volumes and the synthesis backend, as the backends differ
+    by rounding errors), i.e. equal pulses are only synthesized once,
+    e.g. pulse 1 and 2 of a burst with equal settings or the same pulse
+    across many alarm variants.
+    The cache has two tiers:
+    - an in-memory LRU tier of at most maxEntries pulses and
+    - an optional on-disk tier in directory (requires numpy) where every
+      pulse is stored as .npy file that is memory mapped on a hit. If
+      the files exceed maxDiskSize_bytes the least recently used files
+      are removed.
+    The returned pulses are read-only and shared between all users.
+    """
+    # bump if the synthesis changes so old disk entries are not used
+    version = 1
+
+    def __init__(self, maxEntries = 32, directory = None, maxDiskSize_bytes = 256 * 1024 * 1024):
+        self._maxEntries = maxEntries
+        self._entries = collections.OrderedDict()
+        self._directory = directory if numpy is not None else None
+        self._maxDiskSize_bytes = maxDiskSize_bytes
+        if self._directory is not None and not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+        self.hits = 0
+        self.misses = 0
+
+    def getKey(self, pulse, baseFrequency_Hz, harmonics, volumes, masterSampleRate_Hz = None, backend = None):
+        """
+        Returns the hash of all parameters that affect the pulse created by
+        synthesizeHarmonicWave(pulse, baseFrequency_Hz, harmonics, volumes,
+        backend) (resampled from masterSampleRate_Hz if given). The pulses
+        of backend 'auto' share one key whichever backend is selected.
+        """
+        if backend is None:
+            backend = synthesisBackend
+        parameters = (self.version,
+                      pulse._sampleRate_Hz,
+                      pulse._pulseDuration_ms,
+                      pulse._riseTime_pc,
+                      pulse._fallTime_pc,
+                      baseFrequency_Hz,
+                      tuple(int(h) for h in harmonics),
+                      tuple(min(max(float(v), 0.0), 1.0) for v in volumes),
+                      backend)
+        if masterSampleRate_Hz is not None:
+            parameters += (masterSampleRate_Hz, resampleHalfLength, resampleKaiserBeta, resampleCutoff)
+        if pulse._dtype != 'float64':
+            parameters += (pulse._dtype,)
+        return hashlib.sha1(repr(parameters).encode('utf-8')).hexdigest()
+
+    def createHarmonicWave(self, pulse, baseFrequency_Hz, harmonics, volumes, masterSampleRate_Hz = None, backend = None):
+        """
+        Returns (pulse, maxAbs) like pulse.createHarmonicWave but takes the
+        pulse from the cache if it was created before. New pulses are
+        created by synthesizeHarmonicWave with backend.
+        If masterSampleRate_Hz is given the pulse is synthesized at
+        masterSampleRate_Hz (and cached) and resampled to the sample rate of
+        pulse, i.e. all sample rates share one synthesis. The number of
+        samples equals the one of the direct synthesis.
+        """
+        if masterSampleRate_Hz == pulse._sampleRate_Hz:
+            masterSampleRate_Hz = None
+        key = self.getKey(pulse, baseFrequency_Hz, harmonics, volumes, masterSampleRate_Hz, backend)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            entry = self._load(key)
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if masterSampleRate_Hz is None:
+                wave, maxAbs = synthesizeHarmonicWave(pulse, baseFrequency_Hz, harmonics, volumes, backend)
+            else:
+                masterPulse = copy.copy(pulse)
+                masterPulse.setSampleRate_Hz(masterSampleRate_Hz)
+                masterWave, masterMaxAbs = self.createHarmonicWave(masterPulse, baseFrequency_Hz, harmonics, volumes, None, backend)
+                wave = resample(masterWave, masterSampleRate_Hz, pulse._sampleRate_Hz, sum(pulse._getAmplitudeProfileSegments_samples()))
+                if numpy is not None:
+                    wave = wave.astype(pulse._dtype, copy=False)
+                    maxAbs = numpy.abs(wave).max() if len(wave) > 0 else 0
+                else:
+                    maxAbs = getMax(abs(sample) for sample in wave)
+            if numpy is not None:
+                wave.flags.writeable = False
+            else:
+                wave = tuple(wave)
+            entry = (wave, maxAbs)
+            self._store(key, wave)
+        # (re-)insert as most recently used
+        self._entries[key] = entry
+        while len(self._entries) > self._maxEntries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _getFileName(self, key):
+        return os.path.join(self._directory, key + ".npy")
+
+    def _load(self, key):
+        if self._directory is None:
+            return None
+        fileName = self._getFileName(key)
+        try:
+            wave = numpy.load(fileName, mmap_mode='r')
+            # mark as recently used for the eviction
+            os.utime(fileName, None)
+        except (IOError, OSError, ValueError):
+            return None
+        maxAbs = numpy.abs(wave).max() if len(wave) > 0 else 0
+        return wave, maxAbs
+
+    def _store(self, key, wave):
+        if self._directory is None:
+            return
+        fileName = self._getFileName(key)
+        # write to a temporary file first so that concurrent readers never
+        # map a partially written file
+        tmpFileName = self._getTmpFileName(fileName)
+        with open(tmpFileName, "wb") as f:
+            numpy.save(f, wave)
+        os.rename(tmpFileName, fileName)
+        self._evict()
+
+    def _getTmpFileName(self, fileName):
+        return fileName + "." + str(os.getpid()) + ".tmp"
+
+    def removeTmpFiles(self):
+        """
+        removes the temporary files of this process, e.g. of a _store which
+        was interrupted by a timeout
+        """
+        if self._directory is None:
+            return
+        suffix = self._getTmpFileName("")
+        for name in os.listdir(self._directory):
+            if name.endswith(suffix):
+                try:
+                    os.remove(os.path.join(self._directory, name))
+                except OSError:
+                    pass
+
+    def _evict(self):
+        """removes least recently used files until maxDiskSize_bytes is met"""
+        files = []
+        diskSize_bytes = 0
+        for name in os.listdir(self._directory):
+            if name.endswith(".npy"):
+                fileName = os.path.join(self._directory, name)
+                try:
+                    stat = os.stat(fileName)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, fileName))
+                diskSize_bytes += stat.st_size
+        files.sort()
+        for mtime, size, fileName in files:
+            if diskSize_bytes <= self._maxDiskSize_bytes:
+                break
+            try:
+                os.remove(fileName)
+            except OSError:
+                pass
+            diskSize_bytes -= size
+
+def getNormalizedPeak(normalization, gain, maxAbs, level, targetLevel_dBFS):
+    """
+    Returns the peak (at most gain) to which pulses with the peak maxAbs
+    are scaled: gain for normalization 'peak'; for 'rms' and 'aweighted'
+    the peak at which level (the RMS or A-weighted RMS, see
+    Pulse.getLevels, of the loudest pulse at the peak maxAbs) becomes
+    targetLevel_dBFS.
+    """
+    if normalization == 'peak':
+        return gain
+    if normalization not in ('rms', 'aweighted'):
+        raise ValueError('normalization must be peak, rms or aweighted')
+    if level == 0:
+        return gain
+    return min(gain, 10.0**(targetLevel_dBFS / 20.0) / level * maxAbs)
+
+def normalize(pulse, pulses, maxAbs, settings):
+    """
+    Returns (peak, levels_dBFS, warnings) for the pulses, a list of (name,
+    baseFrequency, harmonics, volumes) synthesized by pulse where the
+    loudest one has the peak maxAbs (in Q15 for settings['fixedPoint']):
+    the peak of the loudest pulse in the output (see getNormalizedPeak and
+    settings['normalization'], 'gain' and 'targetLevel_dBFS'), the 'rms'
+    and 'aweighted' levels of every pulse in the output (see
+    Pulse.getLevels) by name and the warnings (levels of two pulses more
+    than maxDiffSoundPressureAnyPulsesInDB apart, target level not
+    reached).
+    """
+    levels = [pulse.getLevels(baseFrequency, harmonics, volumes) for _, baseFrequency, harmonics, volumes in pulses]
+    # the pulses are compared and normalized by their A-weighted levels for
+    # 'aweighted' normalization and by their RMS levels otherwise
+    measure = 1 if settings['normalization'] == 'aweighted' else 0
+    nonZeroLevels = [pulseLevels[measure] for pulseLevels in levels if pulseLevels[measure] != 0]
+    maxLevel = max(nonZeroLevels + [0.0])
+    warnings = []
+    if nonZeroLevels and maxLevel / min(nonZeroLevels) > 10.0**(maxDiffSoundPressureAnyPulsesInDB / 20.0):
+        warnings.append("more than " + str(maxDiffSoundPressureAnyPulsesInDB) + "dB difference in " + ("A-weighted " if measure else "") + "level between pulses")
+
+    maxAbs_FS = maxAbs / 32768.0 if settings['fixedPoint'] else maxAbs
+    peak = getNormalizedPeak(settings['normalization'], settings['gain'], maxAbs_FS, maxLevel, settings['targetLevel_dBFS'])
+    levels_dBFS = {}
+    for (name, _, _, _), pulseLevels in zip(pulses, levels):
+        levels_dBFS[name] = dict((measureName, 20 * math.log10(level * peak / maxAbs_FS) if level * peak != 0 else float('-inf'))
+                                 for measureName, level in zip(('rms', 'aweighted'), pulseLevels))
+    if settings['normalization'] != 'peak' and maxLevel != 0 and \
+       20 * math.log10(maxLevel * peak / maxAbs_FS) < settings['targetLevel_dBFS'] - 0.05:
+        warnings.append("target level of " + str(settings['targetLevel_dBFS']) + " dBFS not reached: peak limited to the gain")
+    return peak, levels_dBFS, warnings
+
+def getFixedPointWarnings(settings, pulseCache = None):
+    """
+    Returns the warnings about the settings which are ignored as the
+    pulses are synthesized in fixed point (settings['fixedPoint'], see
+    Pulse.createHarmonicWaveQ15): settings['masterSampleRate_Hz'],
+    settings['synthesisBackend'] and the directory of pulseCache (see
+    pulseCacheDirectory of the generator scripts).
+    """
+    warnings = []
+    if not settings['fixedPoint']:
+        return warnings
+    if settings['masterSampleRate_Hz'] is not None:
+        warnings.append("masterSampleRate_Hz ignored in fixed point: pulses are synthesized at the sample rate")
+    if settings['synthesisBackend'] is not None:
+        warnings.append("synthesisBackend ignored in fixed point: pulses are synthesized in Q15")
+    if pulseCache is not None and pulseCache._directory is not None:
+        warnings.append("pulseCacheDirectory ignored in fixed point: pulses are not cached")
+    return warnings
+
+def toQ15(samples):
+    """
+    Returns the floating point samples in Q15 (32768 = 1.0): rounded half
+    up and saturated to [-32768; 32767] as int32 (numpy array or list)
+    """
+    if numpy is not None:
+        q15 = numpy.floor(numpy.asarray(samples, dtype=float) * 32768 + 0.5)
+        return numpy.clip(q15, -32768, 32767).astype(numpy.int32)
+    return [min(max(int(math.floor(sample * 32768 + 0.5)), -32768), 32767) for sample in samples]
+
+def scaleSamplesQ15(samples, gain, maxAbs):
+    """
+    Returns the Q15 samples (see Pulse.createHarmonicWaveQ15) scaled such
+    that maxAbs becomes gain * 32767 as int16 samples (numpy array or
+    array('h')) ready for save_wav: the scale is an integer factor F with
+    15 fractional bits and every sample becomes (x * F + 0x4000) >> 15
+    saturated to [-32768; 32767].
+    """
+    factor = int(math.floor(gain * 32767 * 32768.0 / maxAbs + 0.5)) if maxAbs != 0 else 0
+    if numpy is not None:
+        scaled = (numpy.asarray(samples, dtype=numpy.int64) * factor + 0x4000) >> 15
+        return numpy.clip(scaled, -32768, 32767).astype(numpy.int16)
+    return array('h', [min(max((sample * factor + 0x4000) >> 15, -32768), 32767) for sample in samples])
+
 def save_wav(audio, file_name, sample_rate, bit_depth=32767):
+    save_wav_segments([audio], file_name, sample_rate, bit_depth)
+
+def save_wav_segments(segments, file_name, sample_rate, bit_depth=32767):
+    """
+    Writes the segments (arrays of samples e.g. pulses and silences) one
+    after the other into one wav file. segments may be any iterable, e.g.
+    a generator, so only one segment at a time needs to be in memory.
+    """
+    wav_file = _openWav(file_name, sample_rate)
+
+    # WAV files here are using short, 16 bit, signed integers for the 
+    # sample size.  So we multiply the floating point data we have by 32767, the
+    # maximum value for a short integer.  NOTE: It is theortically possible to
+    # use the floating point -1.0 to 1.0 data directly in a WAV file but not
+    # obvious how to do that using the wave module in python.
+    # The samples are converted and written in blocks of writeBlock_samples.
+    # Silence segments are written as zeroed blocks.
+    zeroBlock = None
+    for segment in segments:
+        if isinstance(segment, Silence):
+            if zeroBlock is None:
+                zeroBlock = b'\x00\x00' * writeBlock_samples
+            for start in range(0, len(segment), writeBlock_samples):
+                wav_file.writeframesraw(zeroBlock[:2 * min(writeBlock_samples, len(segment) - start)])
+            continue
+        for start in range(0, len(segment), writeBlock_samples):
+            wav_file.writeframesraw(toInt16Frames(segment[start:start + writeBlock_samples], bit_depth))
+
+    wav_file.close()
+
+    return
+
+class WavFileLockedError(IOError):
+    """
+    Raised by save_wav/save_wav_segments/save_wav_plan if the wav file
+    cannot be opened for writing (e.g. locked by a player), so that the
+    caller can retry after the file was closed.
+    """
+    pass
+
+def _openWav(file_name, sample_rate):
+    """
+    Opens the wav file file_name for writing 16 bit mono samples at
+    sample_rate. Raises WavFileLockedError if the file cannot be opened
+    (e.g. locked by another application).
+    """
     # Open up a wav file
-    repeat = True
-    while repeat:
-        try:
-            wav_file=wave.open(file_name,"w")
-            repeat = False
-        except:
-            print(file_name + " locked by other application - please close\n")
-            raw_input()
+    try:
+        wav_file=wave.open(file_name,"w")
+    except EnvironmentError as e:
+        raise WavFileLockedError(file_name + " locked by other application (" + str(e) + ")")
     # wav params
     nchannels = 1
 
@@ -512,20 +1790,207 @@ def save_wav(audio, file_name, sample_rate, bit_depth=32767):
     # 44100 is the industry standard sample rate - CD quality.  If you need to
     # save on file size you can adjust it downwards. The stanard for low quality
     # is 8000 or 8kHz.
-    nframes = len(audio)
+    # The number of frames is not known before all segments are written;
+    # the wave module corrects the header when the file is closed.
+    nframes = 0
     comptype = "NONE"
     compname = "not compressed"
     wav_file.setparams((nchannels, sampwidth, sample_rate, nframes, comptype, compname))
+    return wav_file
 
-    # WAV files here are using short, 16 bit, signed integers for the 
-    # sample size.  So we multiply the floating point data we have by 32767, the
-    # maximum value for a short integer.  NOTE: It is theortically possible to
-    # use the floating point -1.0 to 1.0 data directly in a WAV file but not
-    # obvious how to do that using the wave module in python.
-    for sample in audio:
-        wav_file.writeframes(struct.pack('h', int( sample * bit_depth )))
+def toInt16Frames(samples, bit_depth=32767):
+    """
+    Converts floating point samples (expected in [-1.0; 1.0]) to the bytes
+    of little endian 16 bit signed integers (see toInt16Samples).
+    """
+    samples = toInt16Samples(samples, bit_depth)
+    if numpy is not None and isinstance(samples, numpy.ndarray):
+        return samples.astype('<i2').tobytes()
+    frames = array('h', samples)
+    if sys.byteorder == 'big':
+        frames.byteswap()
+    return frames.tobytes() if hasattr(frames, 'tobytes') else frames.tostring()
 
-    wav_file.close()
+def toInt16Samples(samples, bit_depth=32767):
+    """
+    Converts floating point samples (expected in [-1.0; 1.0]) to 16 bit
+    signed integers (numpy int16 array or array('h')): each sample is
+    multiplied by bit_depth (which may include the gain, see
+    RenderPlan.segments), rounded to the nearest integer (halves are
+    rounded up) and saturated to [-32768; 32767].
+    int16 samples (numpy int16 arrays or array('h'), see scaleSamplesQ15)
+    are returned as they are.
+    Uses numpy if available and the array module otherwise.
+    """
+    if isinstance(samples, array) and samples.typecode == 'h':
+        return samples
+    if numpy is not None and getattr(samples, 'dtype', None) == numpy.int16:
+        return samples
+    if numpy is not None:
+        data = numpy.floor(numpy.asarray(samples, dtype=float) * bit_depth + 0.5)
+        numpy.clip(data, -32768, 32767, out=data)
+        return data.astype(numpy.int16)
+    return array('h', [min(max(int(math.floor(sample * bit_depth + 0.5)), -32768), 32767) for sample in samples])
 
-    return
-    
+###############################################################################
+# timelines: declarative layout of the pulses and silences of an alarm
+#
+# A timeline is a list of events:
+#   ('pulse', name)           the pulse name, e.g. 'p1'
+#   ('spacing', duration_ms)  silence between two pulses measured from the
+#                             90% marks (see Pulse.createSilence); None is
+#                             the pulse spacing
+#   ('silence', duration_ms)  silence of exactly duration_ms
+
+class RenderPlan:
+    """
+    A compiled timeline (see compileTimeline): the sample offset of every
+    pulse event (as list of (offset, name)), the number of samples of a
+    pulse and the total number of samples.
+    """
+    def __init__(self, pulseEvents, pulseLength_samples, length_samples):
+        self.pulseEvents = pulseEvents
+        self.pulseLength_samples = pulseLength_samples
+        self.length_samples = length_samples
+
+    def getPulseNames(self):
+        """the names of the pulses in order of their first event"""
+        names = []
+        for offset, name in self.pulseEvents:
+            if name not in names:
+                names.append(name)
+        return names
+
+    def segments(self, pulses, bit_depth=32767, scale=1.0):
+        """
+        Yields the segments of the plan for save_wav_segments: the pulses
+        (by name from pulses) at their offsets and Silence segments for
+        the gaps, i.e. the silences are streamed as zeroed blocks and never
+        created in memory. Every pulse is scaled (by scale, e.g. the gain
+        over the peak of the pulses) and quantized to int16 once and
+        yielded at each of its offsets. int16 pulses (see scaleSamplesQ15)
+        are yielded as they are.
+        """
+        pulseSamples = {}
+        position = 0
+        for offset, name in self.pulseEvents:
+            if name not in pulseSamples:
+                if len(pulses[name]) != self.pulseLength_samples:
+                    raise ValueError('pulse ' + name + ' has ' + str(len(pulses[name])) + ' instead of ' + str(self.pulseLength_samples) + ' samples')
+                pulseSamples[name] = toInt16Samples(pulses[name], bit_depth * scale)
+            yield Silence(offset - position)
+            yield pulseSamples[name]
+            position = offset + self.pulseLength_samples
+        yield Silence(self.length_samples - position)
+
+def compileTimeline(timeline, pulse):
+    """
+    Compiles a timeline (see above) into a RenderPlan with the sample
+    offsets of the pulses at the sample rate and timing of pulse.
+    """
+    pulseLength_samples = sum(pulse._getAmplitudeProfileSegments_samples())
+    pulseEvents = []
+    offset = 0
+    for event in timeline:
+        if event[0] == 'pulse':
+            pulseEvents.append((offset, event[1]))
+            offset += pulseLength_samples
+        elif event[0] == 'spacing':
+            offset += len(pulse.createSilence(event[1], lazy=True))
+        elif event[0] == 'silence':
+            offset += len(Silence(pulse._getSamplesFromMs(event[1])))
+        else:
+            raise ValueError('unknown timeline event ' + str(event[0]))
+    return RenderPlan(pulseEvents, pulseLength_samples, offset)
+
+def save_wav_plan(plan, pulses, file_name, sample_rate, bit_depth=32767, scale=1.0):
+    """
+    Renders the RenderPlan plan with the samples of pulses (by name)
+    scaled by scale and writes it into one wav file.
+    """
+    save_wav_segments(plan.segments(pulses, bit_depth, scale), file_name, sample_rate)
+
+class IEC_60601_1_8_Medium_Priority_Pulse(IEC_60601_1_8_Pulse):
+    """
+    Inherits from IEC_60601_1_8_Pulse and sets pulseDuration_ms_min|max
+    and burstSpacing_ms_min|max for Medium Priority alarms. A medium
+    priority burst has 3 pulses (see mediumPriorityTimeline).
+    """
+    # medium priority alarm pulse duration (t_d): 125ms to 250ms
+    pulseDuration_ms_min=125
+    pulseDuration_ms_max=250
+
+    burstSpacing_ms_min=2500
+    burstSpacing_ms_max=30000
+    _burstSpacing_ms = None
+
+    def setBurstSpacing_ms(self, bs = None):
+        """
+        spacing between two bursts in milliseconds (measured from 90% mark of the rise
+        to 90% mark of the fall)
+        """
+        if bs is None:
+            self._burstSpacing_ms = (self.burstSpacing_ms_min + self.burstSpacing_ms_max) / 2.0
+        else:
+            self._burstSpacing_ms = max(0, bs)
+        return self._burstSpacing_ms
+
+    def getBurstSpacing_ms(self):
+        return self._burstSpacing_ms
+
+    def isBurstSpacingInRange(self):
+        return self._burstSpacing_ms >= self.burstSpacing_ms_min and self._burstSpacing_ms <= self.burstSpacing_ms_max
+
+def mediumPriorityTimeline(pulse, startWithSilence_ms = 0):
+    """
+    Timeline (see compileTimeline) of a medium priority burst of pulse
+    (an IEC_60601_1_8_Medium_Priority_Pulse): the silence at start, the
+    pulses 'p1', 'p2' and 'p3' (which may have different frequencies)
+    with the pulse spacing between them and the burst spacing.
+    """
+    return [('silence', startWithSilence_ms),
+            ('pulse',   'p1'),
+            ('spacing', None),
+            ('pulse',   'p2'),
+            ('spacing', None),
+            ('pulse',   'p3'),
+            ('spacing', pulse.getBurstSpacing_ms())]
+
+###############################################################################
+
+def loadConfig(fileName):
+    """
+    Reads a configuration file (valid Python, e.g. example_HP_config.py)
+    and returns its settings as dictionary
+    """
+    config = {}
+    with open(fileName) as f:
+        exec(compile(f.read(), fileName, 'exec'), config)
+    return dict((name, value) for name, value in config.items() if not name.startswith('__'))
+
+def runBatch(configFileNames, generate, outputDirectory = '.', pulseCacheDirectory = None):
+    """
+    Renders the configuration files configFileNames without any query (see
+    the --batch option of the generator scripts): generate(config,
+    outputFilePath, pulseCache) is called for every configuration file and
+    the sound is saved as outputDirectory/<config name>.wav.
+    All configurations share one PulseCache.
+    Returns the exit status (1 if any configuration failed).
+    """
+    if not os.path.isdir(outputDirectory):
+        os.makedirs(outputDirectory)
+
+    pulseCache = PulseCache(directory=pulseCacheDirectory)
+    status = 0
+    for configFileName in configFileNames:
+        outputFilePath = os.path.join(outputDirectory, os.path.splitext(os.path.basename(configFileName))[0] + ".wav")
+        try:
+            result = generate(loadConfig(configFileName), outputFilePath, pulseCache)
+        except Exception as e:
+            print("*** ERROR: " + configFileName + ": " + str(e))
+            status = 1
+            continue
+        print(configFileName + " -> " + result['outputFilePath'])
+        for warning in result['warnings']:
+            print("*** WARNING: " + warning)
+    return status